@@ -47,8 +47,12 @@ except ImportError:
 
 try:
     from .undo_manager import UndoManager
+    from .undo_commands import UndoCommand, CardDelta, SnapshotCommand
 except ImportError:
     UndoManager = None
+    UndoCommand = None
+    CardDelta = None
+    SnapshotCommand = None
 
 try:
     from .node_shapes import NodeShapeFactory
@@ -83,6 +87,9 @@ __all__ = [
     'SmartConnection',
     'GradientConnection',
     'UndoManager',
+    'UndoCommand',
+    'CardDelta',
+    'SnapshotCommand',
     'NodeShapeFactory',
     'IconManager',
     'TagManager',
@@ -253,6 +253,7 @@ class AssociativeLineManager:
     def __init__(self, scene):
         self.scene = scene
         self.line_list = []  # [(line_item, from_node, to_node), ...]
+        self._lines_by_node = {}  # 节点 -> 与其相连的关联线列表（节点移动时只更新这些线）
         self.active_line = None
         self.is_creating_line = False
         self.creating_start_node = None
@@ -272,6 +273,8 @@ class AssociativeLineManager:
         
         # 保存到列表
         self.line_list.append((line_item, from_node, to_node))
+        self._lines_by_node.setdefault(from_node, []).append(line_item)
+        self._lines_by_node.setdefault(to_node, []).append(line_item)
         
         # 更新节点数据
         self._update_node_data(from_node, to_node)
@@ -287,9 +290,19 @@ class AssociativeLineManager:
                     self.scene.removeItem(item.text_item)
                 self.scene.removeItem(item)
                 self.line_list.pop(i)
+                self._unindex_line(item, fn, tn)
                 self._remove_from_node_data(fn, tn)
                 break
     
+    def _unindex_line(self, line_item, from_node, to_node):
+        """从节点索引中移除关联线"""
+        for node in (from_node, to_node):
+            lines = self._lines_by_node.get(node)
+            if lines and line_item in lines:
+                lines.remove(line_item)
+                if not lines:
+                    del self._lines_by_node[node]
+
     def set_active_line(self, line_item):
         """设置激活的关联线"""
         # 取消之前的激活
@@ -366,6 +379,7 @@ class AssociativeLineManager:
                 self.scene.removeItem(line_item.text_item)
             self.scene.removeItem(line_item)
         self.line_list.clear()
+        self._lines_by_node.clear()
         
         # 重新创建所有关联线
         for vn in self.scene.visual_nodes:
@@ -375,8 +389,59 @@ class AssociativeLineManager:
                     if target_vn:
                         self.create_line(vn, target_vn)
     
+    def render_lines_for_node(self, node):
+        """
+        只为一个新加入场景的节点创建关联线（它指向的目标和指向它的节点），
+        不像 render_all_lines 那样删除并重建全部关联线
+        """
+        targets = getattr(node.tree_node, 'associative_line_targets', None) or ()
+        for target_id in targets:
+            target_vn = self.scene.find_node_by_id(target_id)
+            if target_vn:
+                self.create_line(node, target_vn)
+        node_id = node.tree_node.id
+        for vn in self.scene.visual_nodes:
+            if vn is not node and node_id in (getattr(vn.tree_node, 'associative_line_targets', None) or ()):
+                self.create_line(vn, node)
+
+    def detach_lines_for_nodes(self, nodes):
+        """
+        移除与指定节点相连的关联线图形项（节点被折叠隐藏时调用）
+        与 remove_line 不同，不修改节点数据中的关联线目标，展开后 render_all_lines 重新创建
+        """
+        nodes = set(nodes)
+        kept = []
+        for line_item, fn, tn in self.line_list:
+            if fn in nodes or tn in nodes:
+                if line_item is self.active_line:
+                    self.active_line = None
+                if line_item.text_item and line_item.text_item.scene() is self.scene:
+                    self.scene.removeItem(line_item.text_item)
+                self.scene.removeItem(line_item)
+                self._unindex_line(line_item, fn, tn)
+            else:
+                kept.append((line_item, fn, tn))
+        self.line_list[:] = kept
+
+    def reset(self):
+        """
+        清空关联线登记（图形项已随 scene.clear() 删除时调用，不再从场景中移除）
+        节点数据中的关联线目标保留，重新渲染时 render_all_lines 据此创建
+        """
+        self.line_list.clear()
+        self._lines_by_node.clear()
+        self.active_line = None
+        self.is_creating_line = False
+        self.creating_start_node = None
+        self.creating_line_item = None
+
     def update_all_lines(self):
         """更新所有关联线路径"""
         for line_item, _, _ in self.line_list:
             line_item.update_path()
 
+    def update_lines_for_node(self, node):
+        """只更新与指定节点相连的关联线路径"""
+        for line_item in self._lines_by_node.get(node, ()):
+            line_item.update_path()
+
@@ -0,0 +1,140 @@
+"""
+后端注册表 - 一次性解析连线渲染器和布局引擎
+场景构造时按优先级选定可用后端并缓存，连线样式改变时才重新解析，
+避免每次重绘/拖动重新布局时都去导入不存在的模块
+"""
+
+import importlib
+
+
+class BackendRegistry:
+    """连线渲染器/布局引擎注册表"""
+
+    # 连线渲染器候选（按优先级排列）：(模块名, 类名, 连线样式映射)
+    # 样式映射的值是渲染器类上的常量名
+    CONNECTION_RENDERERS = [
+        ('simple_mind_map_connections', 'SimpleMindMapConnectionRenderer', {
+            "fixed": "LINE_STYLE_STRAIGHT",
+            "straight": "LINE_STYLE_STRAIGHT",
+            "direct": "LINE_STYLE_DIRECT",
+            "curve": "LINE_STYLE_CURVE",
+            "bezier": "LINE_STYLE_CURVE",
+            "smart": "LINE_STYLE_CURVE",
+            "gradient": "LINE_STYLE_CURVE",
+            "default": "LINE_STYLE_STRAIGHT",
+        }),
+        ('enhanced_connections', 'EnhancedConnectionRenderer', {
+            "fixed": "LINE_STYLE_STRAIGHT",
+            "bezier": "LINE_STYLE_BEZIER",
+            "smart": "LINE_STYLE_CURVE",
+            "gradient": "LINE_STYLE_BEZIER",
+            "default": "LINE_STYLE_STRAIGHT",
+        }),
+    ]
+
+    # 布局引擎候选（按优先级排列）：(模块名, 类名, 布局类型映射)
+    LAYOUT_ENGINES = [
+        ('tidy_tree_layout', 'TidyTreeLayoutEngine', {
+            "mind_map": "LAYOUT_MIND_MAP",
+            "logical": "LAYOUT_LOGICAL_RIGHT",
+            "logical_left": "LAYOUT_LOGICAL_LEFT",
+            "logical_right": "LAYOUT_LOGICAL_RIGHT",
+            "timeline": "LAYOUT_TIMELINE",
+            "timeline_vertical": "LAYOUT_TIMELINE_VERTICAL",
+            "fishbone": "LAYOUT_FISHBONE",
+            "organization": "LAYOUT_ORGANIZATION",
+            "catalog": "LAYOUT_CATALOG",
+        }),
+        ('simple_mind_map_layout', 'SimpleMindMapLayoutEngine', {
+            "mind_map": "LAYOUT_MIND_MAP",
+            "logical": "LAYOUT_LOGICAL_RIGHT",
+            "logical_left": "LAYOUT_LOGICAL_LEFT",
+            "logical_right": "LAYOUT_LOGICAL_RIGHT",
+            "timeline": "LAYOUT_TIMELINE",
+            "timeline_vertical": "LAYOUT_TIMELINE_VERTICAL",
+            "fishbone": "LAYOUT_FISHBONE",
+            "organization": "LAYOUT_ORGANIZATION",
+            "catalog": "LAYOUT_CATALOG",
+        }),
+        ('enhanced_layout', 'EnhancedLayoutEngine', {
+            "mind_map": "LAYOUT_MIND_MAP",
+            "logical": "LAYOUT_LOGICAL_RIGHT",
+            "logical_left": "LAYOUT_LOGICAL_LEFT",
+            "logical_right": "LAYOUT_LOGICAL_RIGHT",
+            "timeline": "LAYOUT_TIMELINE",
+            "timeline_vertical": "LAYOUT_TIMELINE_VERTICAL",
+            "fishbone": "LAYOUT_FISHBONE",
+            "organization": "LAYOUT_ORGANIZATION",
+            "catalog": "LAYOUT_CATALOG",
+        }),
+    ]
+
+    def __init__(self, connection_style="fixed"):
+        self.resolution_count = 0  # 后端解析次数（用于确认没有在重绘时重复解析）
+
+        self.connection_style = connection_style
+        self.connection_renderer = None
+        self.line_style = None
+
+        self.layout_engine = None
+        self._layout_type_map = {}
+        self._default_layout_type = None
+
+        self._resolve_connection_renderer()
+        self._resolve_layout_engine()
+
+    def _load(self, candidates):
+        """按优先级加载第一个可用的后端类"""
+        self.resolution_count += 1
+        for module_name, class_name, style_map in candidates:
+            try:
+                module = importlib.import_module(f".{module_name}", __package__)
+                return getattr(module, class_name), style_map
+            except (ImportError, AttributeError):
+                continue
+        return None, {}
+
+    def _resolve_connection_renderer(self):
+        """解析连线渲染器，并计算当前样式对应的渲染器样式"""
+        renderer_cls, style_map = self._load(self.CONNECTION_RENDERERS)
+        if renderer_cls is None:
+            self.connection_renderer = None
+            self.line_style = None
+            return
+
+        default_style = getattr(renderer_cls, style_map["default"], None)
+        attr_name = style_map.get(self.connection_style)
+        self.connection_renderer = renderer_cls()
+        self.line_style = getattr(renderer_cls, attr_name, default_style) if attr_name else default_style
+
+    def _resolve_layout_engine(self):
+        """解析布局引擎"""
+        engine_cls, type_map = self._load(self.LAYOUT_ENGINES)
+        if engine_cls is None:
+            self.layout_engine = None
+            self._layout_type_map = {}
+            self._default_layout_type = None
+            return
+
+        self.layout_engine = engine_cls()
+        self._layout_type_map = {
+            name: getattr(engine_cls, attr_name)
+            for name, attr_name in type_map.items()
+            if hasattr(engine_cls, attr_name)
+        }
+        self._default_layout_type = self._layout_type_map.get("mind_map")
+
+    def set_connection_style(self, style):
+        """连线样式改变时重新解析渲染器"""
+        if style == self.connection_style:
+            return
+        self.connection_style = style
+        self._resolve_connection_renderer()
+
+    def supports_layout_type(self, layout_type):
+        """当前布局引擎是否有与场景布局类型对应的布局（没有时由 LayoutEngine 计算）"""
+        return layout_type in self._layout_type_map
+
+    def map_layout_type(self, layout_type):
+        """将场景布局类型映射为当前布局引擎的布局常量"""
+        return self._layout_type_map.get(layout_type, self._default_layout_type)
@@ -8,6 +8,10 @@ from PyQt6.QtWidgets import (QGraphicsRectItem, QGraphicsTextItem,
 from PyQt6.QtCore import Qt, QRectF, QPointF, pyqtSignal
 from PyQt6.QtGui import (QPen, QBrush, QColor, QFont, QPainterPath,
                          QCursor, QAction, QPainter)
+
+from .level_of_detail import DETAIL_FULL, apply_detail_level, paint_reduced
+from .chrome_cache import apply_cache_mode, cached_path, paint_chrome
+from .static_text import StaticTextBlock, paint_text_blocks, shared_font
 class ConnectionPoint(QGraphicsRectItem):
     """连接点图形项"""
 
@@ -48,6 +52,7 @@ class KnowledgeCard(QGraphicsRectItem):
     CARD_HEIGHT = 180
     HEADER_HEIGHT = 35
     BORDER_RADIUS = 8
+    CHROME_MARGIN = 5  # 外观超出卡片矩形的范围（阴影、连接点）
 
     # 定义信号
     request_edit = pyqtSignal(object)  # 请求编辑卡片
@@ -74,6 +79,7 @@ class KnowledgeCard(QGraphicsRectItem):
         self.source_text = ""  # 存储生成卡片时的源文本
         self.source_text_start = -1  # 源文本在文档中的起始位置
         self.source_text_end = -1  # 源文本在文档中的结束位置
+        self.detail_level = DETAIL_FULL  # 细节层次（视图缩小时由场景切换）
 
         # 设置卡片属性
         self.setPos(x, y)
@@ -85,6 +91,7 @@ class KnowledgeCard(QGraphicsRectItem):
         # 设置卡片样式
         self.setPen(QPen(QColor(100, 100, 100), 2))
         self.setBrush(QBrush(QColor(255, 255, 255)))
+        apply_cache_mode(self)
 
         # 创建文本显示项
         self.create_text_items()
@@ -93,35 +100,23 @@ class KnowledgeCard(QGraphicsRectItem):
         self.update_connection_points()
 
     def create_text_items(self):
-        """创建文本显示项"""
+        """创建文本显示项（在 paint 中绘制的静态文本，不是子图形项）"""
         # 创建标题文本
-        self.title_item = QGraphicsTextItem(self)
-        self.title_item.setPlainText(self._truncate_text(self.title_text, 30))
-        self.title_item.setPos(10, 5)
-        title_font = QFont("Arial", 11, QFont.Weight.Bold)
-        self.title_item.setFont(title_font)
-        self.title_item.setDefaultTextColor(QColor(255, 255, 255))
-        self.title_item.setTextInteractionFlags(Qt.TextInteractionFlag.NoTextInteraction)
+        self.title_item = StaticTextBlock(
+            self, self._truncate_text(self.title_text, 30),
+            shared_font("Arial", 11, QFont.Weight.Bold), QColor(255, 255, 255), 10, 5)
 
         # 创建问题文本
-        self.question_item = QGraphicsTextItem(self)
-        self.question_item.setPlainText("Q: " + self._truncate_text(self.question_text, 60))
-        self.question_item.setPos(10, self.HEADER_HEIGHT + 5)
-        question_font = QFont("Arial", 9, QFont.Weight.Bold)
-        self.question_item.setFont(question_font)
-        self.question_item.setDefaultTextColor(QColor(70, 130, 180))
-        self.question_item.setTextWidth(self.CARD_WIDTH - 20)
-        self.question_item.setTextInteractionFlags(Qt.TextInteractionFlag.NoTextInteraction)
+        self.question_item = StaticTextBlock(
+            self, "Q: " + self._truncate_text(self.question_text, 60),
+            shared_font("Arial", 9, QFont.Weight.Bold), QColor(70, 130, 180),
+            10, self.HEADER_HEIGHT + 5, self.CARD_WIDTH - 20)
 
         # 创建答案文本
-        self.answer_item = QGraphicsTextItem(self)
-        self.answer_item.setPlainText("A: " + self._truncate_text(self.answer_text, 120))
-        self.answer_item.setPos(10, self.HEADER_HEIGHT + 50)
-        answer_font = QFont("Arial", 8)
-        self.answer_item.setFont(answer_font)
-        self.answer_item.setDefaultTextColor(QColor(60, 60, 60))
-        self.answer_item.setTextWidth(self.CARD_WIDTH - 20)
-        self.answer_item.setTextInteractionFlags(Qt.TextInteractionFlag.NoTextInteraction)
+        self.answer_item = StaticTextBlock(
+            self, "A: " + self._truncate_text(self.answer_text, 120),
+            shared_font("Arial", 8), QColor(60, 60, 60),
+            10, self.HEADER_HEIGHT + 50, self.CARD_WIDTH - 20)
 
     # 修复：添加缺失的连接点方法
     def update_connection_points(self):
@@ -166,6 +161,8 @@ class KnowledgeCard(QGraphicsRectItem):
 
     def remove_connection(self, to_card):
         """移除连接"""
+        if to_card.scene() and hasattr(to_card.scene(), 'record_card_reparent'):
+            to_card.scene().record_card_reparent(to_card)
         self.connections = [conn for conn in self.connections if conn['to_card'] != to_card]
         if to_card in self.child_cards:
             self.child_cards.remove(to_card)
@@ -197,11 +194,11 @@ class KnowledgeCard(QGraphicsRectItem):
             self.edit_card()
             event.accept()
         elif event.button() == Qt.MouseButton.RightButton:
-            # 右键双击删除卡片
-            if self.scene() and hasattr(self.scene(), '_save_state_for_undo'):
-                self.scene()._save_state_for_undo("删除卡片")
-                self.scene().remove_card(self)
-                self.scene().update()
+            # 右键双击删除卡片（场景记录删除用于撤销）
+            if self.scene() and hasattr(self.scene(), 'remove_card'):
+                scene = self.scene()
+                scene.remove_card(self)
+                scene.update()
             event.accept()
         else:
             super().mouseDoubleClickEvent(event)
@@ -246,20 +243,26 @@ class KnowledgeCard(QGraphicsRectItem):
         layout.addWidget(buttons)
         
         if dialog.exec() == QDialog.DialogCode.Accepted:
+            # 记录修改前的内容用于撤销
+            if self.scene() and hasattr(self.scene(), 'record_card_edit'):
+                self.scene().record_card_edit(self)
             self.title_text = title_edit.text()
             self.question_text = question_edit.toPlainText()
             self.answer_text = answer_edit.toPlainText()
-            
-            # 更新显示
-            self.title_item.setPlainText(self._truncate_text(self.title_text, 30))
-            self.question_item.setPlainText("Q: " + self._truncate_text(self.question_text, 60))
-            self.answer_item.setPlainText("A: " + self._truncate_text(self.answer_text, 120))
-            
-            # 发送内容改变信号
+            self.refresh_text()
+
+    def refresh_text(self, notify=True):
+        """内容属性改变后更新显示的文本（notify 为 False 时不发送内容改变信号，撤销恢复时使用）"""
+        self.title_item.setPlainText(self._truncate_text(self.title_text, 30))
+        self.question_item.setPlainText("Q: " + self._truncate_text(self.question_text, 60))
+        self.answer_item.setPlainText("A: " + self._truncate_text(self.answer_text, 120))
+        
+        # 发送内容改变信号
+        if notify:
             self.content_changed.emit(self)
-            
-            if self.scene():
-                self.scene().update()
+        
+        if self.scene():
+            self.scene().update()
 
     def keyPressEvent(self, event):
         """键盘事件处理"""
@@ -349,6 +352,9 @@ class KnowledgeCard(QGraphicsRectItem):
 
     def set_parent_card(self, parent):
         """设置父卡片并更新层级，然后自动应用布局（参考madmap）"""
+        # 记录原来的父卡片用于撤销
+        if self.scene() and hasattr(self.scene(), 'record_card_reparent'):
+            self.scene().record_card_reparent(self)
         if self.parent_card:
             self.parent_card.child_cards.remove(self)
         self.parent_card = parent
@@ -364,6 +370,10 @@ class KnowledgeCard(QGraphicsRectItem):
             self.level = 0
             self._update_children_levels()
         
+        # 父子关系改变，场景需要重新同步连线
+        if self.scene() and hasattr(self.scene(), 'mark_connection_topology_dirty'):
+            self.scene().mark_connection_topology_dirty()
+
         # 成为子节点后，根据布局自动更新连线和位置（参考madmap）
         if self.scene() and hasattr(self.scene(), '_apply_layout_to_subtree'):
             # 找到根节点
@@ -403,8 +413,29 @@ class KnowledgeCard(QGraphicsRectItem):
             "parent_id": self.parent_card.card_id if self.parent_card else None
         }
 
+    def set_detail_level(self, level):
+        """切换细节层次（视图缩小时只画单色矩形 + 标题或一个点，文本子项隐藏）"""
+        apply_detail_level(self, level)
+
     def paint(self, painter, option, widget=None):
         """自定义绘制卡片"""
+        if self.detail_level != DETAIL_FULL:
+            color = QColor(255, 140, 0) if self.isSelected() else QColor(70, 130, 180)
+            paint_reduced(painter, self, self.rect(), color, self.title_text)
+            return
+
+        # 绘制卡片外观（阴影、背景、标题栏、连接点），按选中状态共享缓存位图
+        paint_chrome(painter, ('knowledge_card', self.CARD_WIDTH, self.CARD_HEIGHT, self.isSelected()),
+                     QRectF(-self.CHROME_MARGIN, -self.CHROME_MARGIN,
+                            self.CARD_WIDTH + 2 * self.CHROME_MARGIN,
+                            self.CARD_HEIGHT + 2 * self.CHROME_MARGIN),
+                     self._paint_chrome)
+
+        # 绘制文本（排版结果缓存在文本块中）
+        paint_text_blocks(painter, (self.title_item, self.question_item, self.answer_item))
+
+    def _paint_chrome(self, painter):
+        """绘制卡片外观（不含文本），结果由 chrome_cache 缓存"""
         # 绘制阴影效果
         shadow_rect = QRectF(3, 3, self.CARD_WIDTH, self.CARD_HEIGHT)
         painter.setBrush(QBrush(QColor(0, 0, 0, 30)))
@@ -426,17 +457,9 @@ class KnowledgeCard(QGraphicsRectItem):
         painter.setPen(Qt.PenStyle.NoPen)
 
         # 绘制圆角标题栏
-        path = QPainterPath()
-        path.moveTo(0, self.HEADER_HEIGHT)
-        path.lineTo(0, self.BORDER_RADIUS)
-        path.quadTo(0, 0, self.BORDER_RADIUS, 0)
-        path.lineTo(self.CARD_WIDTH - self.BORDER_RADIUS, 0)
-        path.quadTo(self.CARD_WIDTH, 0, self.CARD_WIDTH, self.BORDER_RADIUS)
-        path.lineTo(self.CARD_WIDTH, self.HEADER_HEIGHT)
-        path.closeSubpath()
-        painter.drawPath(path)
+        painter.drawPath(cached_path(('knowledge_card_header', self.CARD_WIDTH, self.HEADER_HEIGHT,
+                                      self.BORDER_RADIUS), self._build_header_path))
 
-        # 绘制连接点（仅在选中时显示）
         # 绘制连接点（仅在选中时显示）
         if self.isSelected():
             painter.setBrush(QBrush(QColor(255, 255, 255)))
@@ -446,12 +469,34 @@ class KnowledgeCard(QGraphicsRectItem):
                 # 使用QRectF来绘制椭圆
                 painter.drawEllipse(QRectF(point.x() - 4, point.y() - 4, 8, 8))
 
+    def _build_header_path(self):
+        """圆角标题栏路径"""
+        path = QPainterPath()
+        path.moveTo(0, self.HEADER_HEIGHT)
+        path.lineTo(0, self.BORDER_RADIUS)
+        path.quadTo(0, 0, self.BORDER_RADIUS, 0)
+        path.lineTo(self.CARD_WIDTH - self.BORDER_RADIUS, 0)
+        path.quadTo(self.CARD_WIDTH, 0, self.CARD_WIDTH, self.BORDER_RADIUS)
+        path.lineTo(self.CARD_WIDTH, self.HEADER_HEIGHT)
+        path.closeSubpath()
+        return path
 
     def itemChange(self, change, value):
         """卡片位置改变时的回调"""
         if change == QGraphicsItem.GraphicsItemChange.ItemPositionHasChanged:
             # 更新连接点位置
             self.update_connection_points()
+            # 更新场景中的卡片空间索引
+            if self.scene() and hasattr(self.scene(), 'update_card_index'):
+                self.scene().update_card_index(self)
+            # 与本卡片相连的连线需要重新计算路径
+            if self.scene() and hasattr(self.scene(), 'mark_connections_dirty'):
+                self.scene().mark_connections_dirty(self)
+            # 批量修改期间（布局、对齐等）只记录移动，由场景在提交时统一检测和重绘
+            if self.scene() and hasattr(self.scene(), 'is_batch_updating') and \
+                    self.scene().is_batch_updating():
+                self.scene().defer_card_moved(self)
+                return super().itemChange(change, value)
             # 自动检测并建立父子关系
             if self.scene() and hasattr(self.scene(), 'check_auto_connect'):
                 self.scene().check_auto_connect(self)
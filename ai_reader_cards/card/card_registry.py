@@ -0,0 +1,83 @@
+"""
+卡片注册表 - MindMapScene 的有序卡片集合
+按 card_id 建立索引，插入、删除、查找都是 O(1)，
+同时保留列表式的迭代顺序和接口（append/remove/clear/len/in/切片）
+"""
+
+from itertools import islice
+
+
+class CardRegistry:
+    """有序卡片注册表（按 card_id 索引）"""
+
+    def __init__(self, cards=None):
+        # 以卡片对象本身为键保存插入顺序，card_id 重复时也不会丢卡片
+        self._cards = {}  # id(card) -> card（有序）
+        self._by_card_id = {}  # card_id -> {id(card): card}（card_id 重复时保留全部）
+        for card in cards or ():
+            self.append(card)
+
+    def append(self, card):
+        """注册卡片（已注册时忽略）"""
+        key = id(card)
+        if key in self._cards:
+            return
+        self._cards[key] = card
+        self._by_card_id.setdefault(card.card_id, {})[key] = card
+
+    def remove(self, card):
+        """移除卡片（与 list.remove 一样，不存在时抛出 ValueError）"""
+        if self._cards.pop(id(card), None) is None:
+            raise ValueError("card not in registry")
+        same_id = self._by_card_id.get(card.card_id)
+        if same_id is not None:
+            same_id.pop(id(card), None)
+            if not same_id:
+                del self._by_card_id[card.card_id]
+
+    def discard(self, card):
+        """移除卡片（不存在时忽略）"""
+        if card in self:
+            self.remove(card)
+
+    def get(self, card_id, default=None):
+        """根据 card_id 查找卡片（card_id 重复时返回最早注册的）"""
+        same_id = self._by_card_id.get(card_id)
+        if not same_id:
+            return default
+        return next(iter(same_id.values()))
+
+    def clear(self):
+        """清空注册表"""
+        self._cards.clear()
+        self._by_card_id.clear()
+
+    def __contains__(self, card):
+        return self._cards.get(id(card)) is card
+
+    def __iter__(self):
+        # 遍历当前卡片的快照：循环中增删卡片（如 for card in scene.cards: scene.remove_card(card)）是安全的
+        return iter(list(self._cards.values()))
+
+    def __len__(self):
+        return len(self._cards)
+
+    def __getitem__(self, index):
+        # 兼容 self.cards[:]、self.cards[0] 等列表写法
+        if isinstance(index, slice):
+            return list(self._cards.values())[index]
+        # 整数下标只走到目标位置为止（cards[0] / cards[-1] 为 O(1)），不复制整个注册表
+        if index < 0:
+            values, index = reversed(self._cards.values()), -index - 1
+        else:
+            values = iter(self._cards.values())
+        card = next(islice(values, index, None), None)
+        if card is None:
+            raise IndexError("card registry index out of range")
+        return card
+
+    def __bool__(self):
+        return bool(self._cards)
+
+    def __repr__(self):
+        return f"CardRegistry({list(self._cards.values())!r})"
@@ -0,0 +1,146 @@
+"""
+卡片外观缓存 - 卡片背景、边框、标题栏等"外壳"预先渲染成位图，所有卡片共享
+卡片外观只有少数几种状态（形状、大小、是否选中、层级配色），
+按 (外观键, 缩放档位, 设备像素比) 缓存位图，paint 时直接贴图，不再每次重建路径和画笔
+
+缩放档位取得很细（每倍 ZOOM_STEPS 档，相邻档位相差不到 0.3%），位图按设备像素渲染，
+贴图时在设备坐标中 1:1 绘制，没有缩放插值；缩放改变后每种外观只需重新渲染一次（很快），
+旧档位的位图由 LRU 淘汰。旋转 / 斜切 / 翻转或放大超过 MAX_ZOOM 时直接矢量绘制
+
+另外提供按卡片开关的 QGraphicsItem.DeviceCoordinateCache（设置中的"设备坐标缓存"，默认关闭）：
+打开后 Qt 把整张卡片（含文字）缓存为设备坐标位图，平移时更快，但缩放时需要重新渲染、占用更多显存
+"""
+
+import math
+from collections import OrderedDict
+
+from PyQt6.QtCore import QPointF, Qt
+from PyQt6.QtGui import QPainter, QPixmap, QTransform
+from PyQt6.QtWidgets import QGraphicsItem
+
+MIN_ZOOM = 0.05  # 低于此缩放直接矢量绘制（此时卡片通常已经简化绘制）
+MAX_ZOOM = 4.0  # 高于此缩放直接矢量绘制（位图过大）
+ZOOM_STEPS = 256  # 每倍缩放的档位数
+MAX_CACHE_BYTES = 64 * 1024 * 1024  # 位图缓存上限，超过时淘汰最久未用的
+
+_pixmaps = OrderedDict()  # (外观键, 档位, 设备像素比) -> QPixmap
+_pixmap_bytes = 0
+_paths = {}  # 路径缓存 {键: QPainterPath}
+_enabled = True
+_device_coordinate_cache = False
+
+
+def zoom_bucket(scale):
+    """缩放所在档位（2 的 1/ZOOM_STEPS 次幂的整数倍）"""
+    return 2.0 ** (round(math.log2(scale) * ZOOM_STEPS) / ZOOM_STEPS)
+
+
+def cached_path(key, build):
+    """共享的 QPainterPath（按键缓存，build() 只在第一次调用）"""
+    path = _paths.get(key)
+    if path is None:
+        path = build()
+        _paths[key] = path
+    return path
+
+
+def paint_chrome(painter, key, bounds, draw):
+    """
+    绘制卡片外观：命中缓存时直接贴图，否则调用 draw(painter) 渲染到位图并缓存
+    Args:
+        key: 外观键（可哈希，需包含影响外观的全部状态）
+        bounds: 外观在卡片坐标系中的范围
+        draw: draw(painter) 在卡片坐标系中绘制外观
+    """
+    transform = painter.combinedTransform()
+    scale = transform.m11()
+    if not _enabled or transform.type().value > QTransform.TransformationType.TxScale.value or \
+            not MIN_ZOOM <= scale <= MAX_ZOOM or abs(transform.m22() - scale) > 1e-9:
+        draw(painter)
+        return
+
+    device = painter.device()
+    dpr = device.devicePixelRatioF() if device is not None else 1.0
+    bucket = zoom_bucket(scale)
+    pixmap = _get_pixmap((key, bucket, dpr), bounds, bucket * dpr, dpr, draw)
+
+    # 在设备坐标中对齐到像素贴图（不经过缩放变换）
+    origin = transform.map(bounds.topLeft())
+    painter.save()
+    painter.resetTransform()
+    painter.drawPixmap(QPointF(round(origin.x() * dpr) / dpr, round(origin.y() * dpr) / dpr), pixmap)
+    painter.restore()
+
+
+def _get_pixmap(cache_key, bounds, factor, dpr, draw):
+    """位图按 factor（档位 × 设备像素比）渲染"""
+    global _pixmap_bytes
+    pixmap = _pixmaps.get(cache_key)
+    if pixmap is not None:
+        _pixmaps.move_to_end(cache_key)
+        return pixmap
+
+    pixmap = QPixmap(max(1, math.ceil(bounds.width() * factor)),
+                     max(1, math.ceil(bounds.height() * factor)))
+    pixmap.fill(Qt.GlobalColor.transparent)
+    pixmap_painter = QPainter(pixmap)
+    pixmap_painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    pixmap_painter.scale(factor, factor)
+    pixmap_painter.translate(-bounds.x(), -bounds.y())
+    draw(pixmap_painter)
+    pixmap_painter.end()
+    pixmap.setDevicePixelRatio(dpr)
+
+    _pixmaps[cache_key] = pixmap
+    _pixmap_bytes += pixmap.width() * pixmap.height() * 4
+    while _pixmap_bytes > MAX_CACHE_BYTES and len(_pixmaps) > 1:
+        _, old = _pixmaps.popitem(last=False)
+        _pixmap_bytes -= old.width() * old.height() * 4
+    return pixmap
+
+
+def clear_chrome_cache():
+    """清空位图和路径缓存（例如修改了卡片配色之后）"""
+    global _pixmap_bytes
+    _pixmaps.clear()
+    _paths.clear()
+    _pixmap_bytes = 0
+
+
+def set_chrome_cache_enabled(enabled):
+    """开关位图缓存（关闭后每次矢量绘制，用于对比或排查绘制问题）"""
+    global _enabled
+    _enabled = bool(enabled)
+    if not _enabled:
+        clear_chrome_cache()
+
+
+def chrome_cache_stats():
+    """缓存统计：位图数量和占用字节数"""
+    return {'pixmaps': len(_pixmaps), 'bytes': _pixmap_bytes, 'paths': len(_paths)}
+
+
+# ========== DeviceCoordinateCache（按卡片，可选） ==========
+
+def apply_cache_mode(item):
+    """按当前设置设置卡片的缓存模式（卡片创建时调用）"""
+    mode = QGraphicsItem.CacheMode.DeviceCoordinateCache if _device_coordinate_cache \
+        else QGraphicsItem.CacheMode.NoCache
+    if item.cacheMode() != mode:
+        item.setCacheMode(mode)
+
+
+def set_device_coordinate_cache(enabled, items=()):
+    """
+    开关卡片的 DeviceCoordinateCache（之后创建的卡片也按此设置）
+    Args:
+        items: 需要立即切换的现有卡片
+    """
+    global _device_coordinate_cache
+    _device_coordinate_cache = bool(enabled)
+    for item in items:
+        apply_cache_mode(item)
+
+
+def device_coordinate_cache_enabled():
+    return _device_coordinate_cache
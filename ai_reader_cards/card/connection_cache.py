@@ -0,0 +1,159 @@
+"""
+连线路径缓存 - 按 (父节点id, 子节点id, 连线样式, 布局类型) 缓存连线对象
+只有端点节点位置改变（ItemPositionHasChanged）时才重新计算路径，
+重绘时直接复用缓存的 QPainterPath
+
+连线的包围盒登记在均匀网格中，drawForeground 只绘制与暴露区域相交的连线
+"""
+
+from PyQt6.QtCore import QRectF
+
+from .spatial_grid import SpatialGrid
+
+
+class ConnectionPathCache:
+    """连线路径缓存"""
+
+    GRID_CELL_SIZE = 512  # 网格单元大小（场景坐标）
+    BOUNDS_MARGIN = 16  # 包围盒外扩（箭头、画笔宽度）
+
+    def __init__(self):
+        self._connections = {}  # key -> 连线对象
+        self._keys_by_node = {}  # 节点id -> 涉及该节点的 key 集合
+        self._dirty_keys = set()  # 需要重新计算路径的 key
+        self.recompute_count = 0  # 路径重新计算次数（用于确认重绘时没有重复计算）
+
+        # 连线包围盒的空间索引（均匀网格）
+        self._grid = SpatialGrid(self.GRID_CELL_SIZE)
+
+        # 父子关系改变（增删节点、重新挂接）后需要与场景重新同步
+        self.topology_dirty = True
+
+    def get(self, parent, child, parent_id, child_id, style, layout_type, factory):
+        """
+        获取连线对象（必要时创建或重新计算路径）
+        Args:
+            parent: 父节点图形项
+            child: 子节点图形项
+            parent_id: 父节点id
+            child_id: 子节点id
+            style: 连线样式
+            layout_type: 布局类型
+            factory: 创建连线对象的函数 factory(parent, child)
+        """
+        key = (parent_id, child_id, style, layout_type)
+        connection = self._connections.get(key)
+
+        # 节点被重新创建（撤销恢复、刷新场景等）时，旧连线对象不能复用
+        if connection is not None and (connection.parent_node is not parent or
+                                       connection.child_node is not child):
+            connection = None
+
+        if connection is None:
+            connection = factory(parent, child)
+            self._connections[key] = connection
+            self._keys_by_node.setdefault(parent_id, set()).add(key)
+            self._keys_by_node.setdefault(child_id, set()).add(key)
+            self._recompute(key, connection)
+            self._dirty_keys.discard(key)
+        elif key in self._dirty_keys:
+            self._recompute(key, connection)
+            self._dirty_keys.discard(key)
+
+        return connection
+
+    def sync(self, edges, style, layout_type, factory):
+        """
+        与场景的父子关系重新同步（只在 topology_dirty 时调用）
+        Args:
+            edges: 可迭代的 (父节点, 子节点, 父节点id, 子节点id)
+        """
+        active_keys = set()
+        for parent, child, parent_id, child_id in edges:
+            self.get(parent, child, parent_id, child_id, style, layout_type, factory)
+            active_keys.add((parent_id, child_id, style, layout_type))
+
+        # 移除已经不存在的父子关系
+        for key in [k for k in self._connections if k not in active_keys]:
+            self._remove_key(key)
+
+        self.topology_dirty = False
+
+    def visible(self, rect):
+        """返回包围盒与暴露区域相交的连线（先重新计算被标记的连线）"""
+        for key in list(self._dirty_keys):
+            connection = self._connections.get(key)
+            if connection is not None:
+                self._recompute(key, connection)
+        self._dirty_keys.clear()
+
+        keys = self._grid.query(rect.left(), rect.top(), rect.right(), rect.bottom())
+        return [self._connections[key] for key in keys]
+
+    def _recompute(self, key, connection):
+        """重新计算连线几何并更新空间索引"""
+        self.recompute_count += 1
+        if hasattr(connection, 'refresh'):
+            connection.refresh()
+        else:
+            connection.update_path()
+        self._index(key, connection)
+
+    def _connection_bounds(self, connection):
+        """连线包围盒（路径不可用时退回两端节点的包围盒）"""
+        path = getattr(connection, 'path', None)
+        if path is not None and not path.isEmpty():
+            rect = path.boundingRect()
+        else:
+            rect = QRectF()
+            for node in (connection.parent_node, connection.child_node):
+                if hasattr(node, 'sceneBoundingRect'):
+                    rect = rect.united(node.sceneBoundingRect())
+        m = self.BOUNDS_MARGIN
+        return (rect.left() - m, rect.top() - m, rect.right() + m, rect.bottom() + m)
+
+    def _index(self, key, connection):
+        """把连线登记到网格"""
+        self._grid.update(key, *self._connection_bounds(connection))
+
+    def _remove_key(self, key):
+        """移除单条连线"""
+        self._connections.pop(key, None)
+        self._dirty_keys.discard(key)
+        self._grid.remove(key)
+        for node_id in (key[0], key[1]):
+            node_keys = self._keys_by_node.get(node_id)
+            if node_keys is not None:
+                node_keys.discard(key)
+                if not node_keys:
+                    del self._keys_by_node[node_id]
+
+    def mark_dirty(self, node_id):
+        """标记与节点相连的所有连线需要重新计算"""
+        keys = self._keys_by_node.get(node_id)
+        if keys:
+            self._dirty_keys.update(keys)
+
+    def mark_topology_dirty(self):
+        """父子关系改变，下次绘制前与场景重新同步"""
+        self.topology_dirty = True
+
+    def discard_node(self, node_id):
+        """移除与节点相连的所有连线（节点被删除或重新挂接时调用）"""
+        keys = self._keys_by_node.pop(node_id, None)
+        self.topology_dirty = True
+        if not keys:
+            return
+        for key in list(keys):
+            self._remove_key(key)
+
+    def clear(self):
+        """清空缓存（连线样式改变、场景清空时调用）"""
+        self._connections.clear()
+        self._keys_by_node.clear()
+        self._dirty_keys.clear()
+        self._grid.clear()
+        self.topology_dirty = True
+
+    def __len__(self):
+        return len(self._connections)
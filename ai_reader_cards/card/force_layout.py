@@ -0,0 +1,185 @@
+"""
+力导向布局 - Barnes–Hut 近似的 NumPy 实现（不依赖 Qt）
+同时考虑层级边（父子）和关联边（关联线），用于关联线较多、已经不是树的导图
+
+斥力用分层网格（四叉树的各层）近似：在每一层，节点只与"父单元相邻、自身单元不相邻"的
+单元（足够远）按质心整体计算斥力，更近的部分交给下一层；最细一层相邻单元内的节点逐对精确计算。
+每层对所有节点做同样的数组运算，单次迭代约 O(n log n)
+
+支持热启动（从当前位置继续迭代，初始温度较低，不会打乱已有布局）
+以及迭代次数 / 时间预算，几千个节点时仍能保持交互
+"""
+
+import time
+
+import numpy as np
+
+
+def _far_offsets():
+    """
+    远场单元偏移表：按节点所在单元的奇偶（4 种）各列出 27 个偏移，
+    即父单元相邻（两层网格中父单元切比雪夫距离 ≤ 1）、自身单元不相邻（距离 ≥ 2）的单元
+    """
+    table_x = np.zeros((4, 27), dtype=np.int32)
+    table_y = np.zeros((4, 27), dtype=np.int32)
+    for parity_x in (0, 1):
+        for parity_y in (0, 1):
+            offsets = [(dx, dy)
+                       for dx in range(-2 - parity_x, 4 - parity_x)
+                       for dy in range(-2 - parity_y, 4 - parity_y)
+                       if max(abs(dx), abs(dy)) >= 2]
+            table_x[parity_x * 2 + parity_y] = [o[0] for o in offsets]
+            table_y[parity_x * 2 + parity_y] = [o[1] for o in offsets]
+    return table_x, table_y
+
+
+_FAR_X, _FAR_Y = _far_offsets()
+_NEAR_OFFSETS = [(dx, dy) for dx in range(-1, 2) for dy in range(-1, 2)]
+
+
+def _repulsion(px, py, k2):
+    """
+    Barnes–Hut 斥力（Fruchterman–Reingold：大小 k² / d）
+    Returns:
+        (fx, fy)
+    """
+    n = len(px)
+    if n < 2:
+        return np.zeros(n), np.zeros(n)
+
+    # 最细一层平均每个单元不超过一个节点
+    depth = max(2, int(np.ceil(np.log(n) / np.log(4))))
+    size = 1 << depth
+    x0, y0 = px.min(), py.min()
+    span = max(px.max() - x0, py.max() - y0, 1e-9)
+    ix = np.minimum(((px - x0) / span * size).astype(np.int32), size - 1)
+    iy = np.minimum(((py - y0) / span * size).astype(np.int32), size - 1)
+
+    # 所有相互作用：受力节点、相对位移、作用方质量
+    targets, dxs, dys, masses = [], [], [], []
+
+    # 远场：第 2 层起（第 0、1 层的单元两两相邻），每层一次处理所有节点的 27 个远场单元
+    for level in range(2, depth + 1):
+        # 网格四周各留 3 个空单元，越界的偏移落在空单元上，不需要逐个检查边界
+        g = (1 << level) + 6
+        cx = (ix >> (depth - level)) + 3
+        cy = (iy >> (depth - level)) + 3
+        cell = cx * g + cy
+        mass = np.bincount(cell, minlength=g * g).astype(float)
+        com_x = np.bincount(cell, weights=px, minlength=g * g) / np.maximum(mass, 1)
+        com_y = np.bincount(cell, weights=py, minlength=g * g) / np.maximum(mass, 1)
+
+        parity = ((cx - 3) & 1) * 2 + ((cy - 3) & 1)
+        other = (cell[:, None] + _FAR_X[parity] * g + _FAR_Y[parity]).ravel()
+        occupied = np.flatnonzero(mass[other] > 0)
+        other = other[occupied]
+        target = occupied // _FAR_X.shape[1]
+        targets.append(target)
+        dxs.append(px[target] - com_x[other])
+        dys.append(py[target] - com_y[other])
+        masses.append(mass[other])
+
+    # 近场：最细一层相邻单元内的节点逐对计算
+    cell = ix * size + iy
+    order = np.argsort(cell, kind='stable')
+    counts = np.bincount(cell, minlength=size * size)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    for ox, oy in _NEAR_OFFSETS:
+        nx = ix + ox
+        ny = iy + oy
+        source = np.flatnonzero((nx >= 0) & (nx < size) & (ny >= 0) & (ny < size))
+        other = (nx * size + ny)[source]
+        cnt = counts[other]
+        total = int(cnt.sum())
+        if not total:
+            continue
+        target = np.repeat(source, cnt)
+        within = np.arange(total) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+        partner = order[np.repeat(starts[other], cnt) + within]
+        distinct = target != partner
+        target, partner = target[distinct], partner[distinct]
+        targets.append(target)
+        dxs.append(px[target] - px[partner])
+        dys.append(py[target] - py[partner])
+        masses.append(np.ones(len(target)))
+
+    # 一次累加
+    target = np.concatenate(targets)
+    dx = np.concatenate(dxs)
+    dy = np.concatenate(dys)
+    scale = k2 * np.concatenate(masses) / np.maximum(dx * dx + dy * dy, 1e-9)
+    fx = np.bincount(target, weights=dx * scale, minlength=n)
+    fy = np.bincount(target, weights=dy * scale, minlength=n)
+    return fx, fy
+
+
+def force_directed_layout(x, y, width, height, edges, weights=None, ideal_length=300.0,
+                          iterations=200, time_budget=None, temperature=None, pinned=(), seed=0):
+    """
+    力导向布局（坐标为左上角，按节点中心计算受力）
+    Args:
+        x, y: 初始坐标（热启动，直接从这里继续迭代）
+        width, height: 节点大小
+        edges: 边 [(i, j)]（层级边和关联边）
+        weights: 边的引力权重（None 表示全为 1）
+        ideal_length: 理想边长 k
+        iterations: 最大迭代次数
+        time_budget: 最长计算时间（秒），None 表示不限
+        temperature: 初始最大位移（None 表示 ideal_length；热启动时取较小值避免打乱布局）
+        pinned: 位置固定的节点下标
+        seed: 重合节点错开用的随机种子（结果可复现）
+    Returns:
+        (x, y, 实际迭代次数)
+    """
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    width = np.asarray(width, dtype=float)
+    height = np.asarray(height, dtype=float)
+    n = len(width)
+    px = np.asarray(x, dtype=float) + width / 2
+    py = np.asarray(y, dtype=float) + height / 2
+
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    weights = np.ones(len(edges)) if weights is None else np.asarray(weights, dtype=float)
+    src, dst = edges[:, 0], edges[:, 1]
+
+    movable = np.ones(n, dtype=bool)
+    movable[list(pinned)] = False
+
+    # 完全重合的节点之间没有斥力方向，先轻微错开
+    rng = np.random.default_rng(seed)
+    jitter = ideal_length * 1e-3
+    px[movable] += rng.uniform(-jitter, jitter, int(movable.sum()))
+    py[movable] += rng.uniform(-jitter, jitter, int(movable.sum()))
+
+    k = float(ideal_length)
+    k2 = k * k
+    t = k if temperature is None else float(temperature)
+    done = 0
+    while done < iterations and n > 1:
+        fx, fy = _repulsion(px, py, k2)
+
+        # 引力（大小 d² / k），沿边作用于两端
+        if len(edges):
+            dx = px[dst] - px[src]
+            dy = py[dst] - py[src]
+            scale = weights * np.sqrt(dx * dx + dy * dy) / k
+            fx += np.bincount(src, weights=dx * scale, minlength=n)
+            fx -= np.bincount(dst, weights=dx * scale, minlength=n)
+            fy += np.bincount(src, weights=dy * scale, minlength=n)
+            fy -= np.bincount(dst, weights=dy * scale, minlength=n)
+
+        # 位移不超过当前温度
+        length = np.maximum(np.sqrt(fx * fx + fy * fy), 1e-9)
+        step = np.minimum(length, t) / length
+        step[~movable] = 0.0
+        px += fx * step
+        py += fy * step
+
+        done += 1
+        t *= 0.95
+        if t < k * 1e-3:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+
+    return px - width / 2, py - height / 2, done
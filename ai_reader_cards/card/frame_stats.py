@@ -0,0 +1,45 @@
+"""
+帧时间统计 - 记录视图每次重绘的耗时，用于确认大导图平移 / 缩放时能否保持 60 fps
+只保留最近 capacity 帧，交互帧（平移 / 缩放中的降质绘制）和普通帧分开统计
+"""
+
+import time
+from collections import deque
+
+TARGET_FRAME_MS = 1000.0 / 60  # 60 fps 对应的单帧预算
+
+
+class FrameStats:
+    """最近若干帧的重绘耗时"""
+
+    def __init__(self, capacity=600):
+        self.frames = deque(maxlen=capacity)  # (结束时间, 耗时 ms, 是否交互帧)
+
+    def record(self, duration_ms, interactive=False):
+        """记录一帧"""
+        self.frames.append((time.perf_counter(), duration_ms, interactive))
+
+    def reset(self):
+        self.frames.clear()
+
+    def summary(self, interactive=None):
+        """
+        统计
+        Args:
+            interactive: True 只统计交互帧，False 只统计普通帧，None 统计全部
+        Returns:
+            {'frames', 'mean_ms', 'p95_ms', 'max_ms', 'fps', 'over_budget'}；
+            fps 按平均重绘耗时折算（重绘能跟上的最高帧率），over_budget 为超过 60 fps 预算的帧数
+        """
+        durations = sorted(d for _, d, i in self.frames if interactive is None or i == interactive)
+        if not durations:
+            return {'frames': 0, 'mean_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0, 'fps': 0.0, 'over_budget': 0}
+        mean = sum(durations) / len(durations)
+        return {
+            'frames': len(durations),
+            'mean_ms': mean,
+            'p95_ms': durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+            'max_ms': durations[-1],
+            'fps': 1000.0 / mean if mean > 0 else float('inf'),
+            'over_budget': sum(1 for d in durations if d > TARGET_FRAME_MS),
+        }
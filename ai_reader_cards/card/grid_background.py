@@ -0,0 +1,112 @@
+"""
+网格背景 - 网格预先渲染成一块平铺位图，drawBackground 用平铺画刷一次填充
+不再在 Python 中逐条 drawLine：缩小视图时暴露区域很大，逐条画线每帧要上千次调用
+
+平铺块按缩放档位（与 chrome_cache 相同）和设备像素比缓存，在设备坐标中平铺
+（画刷只有平移，走光栅引擎的快速路径；带缩放的纹理填充要慢一个数量级）。
+块边长必须是整数个设备像素，因此每块包含的网格数选取为使块边长最接近整数的值，
+网格间距与场景坐标的偏差在 0.3% 以内（含缩放档位的误差）；画刷原点固定在场景原点，平移时各次重绘之间没有接缝
+"""
+
+import math
+from collections import OrderedDict
+
+from PyQt6.QtCore import QLineF, QPointF, Qt
+from PyQt6.QtGui import QBrush, QColor, QPainter, QPen, QPixmap, QTransform
+
+from .chrome_cache import zoom_bucket
+
+GRID_SIZE = 50
+GRID_COLOR = QColor(240, 240, 240)
+GRID_PEN_WIDTH = 0.5
+TILE_MIN_PIXELS = 256  # 平铺块至少这么多设备像素（网格很密时一块包含多个网格）
+TILE_CANDIDATES = 16  # 选取每块网格数时尝试的个数
+MIN_CELL_PIXELS = 2.0  # 网格小于此设备像素时网格线已连成一片，不再绘制
+MAX_TILES = 8  # 缓存的平铺块数量（缩放档位之间切换时复用）
+
+_tiles = OrderedDict()  # (网格大小, 档位, 设备像素比, 颜色, 线宽) -> (QPixmap, 块边长（逻辑像素）)
+
+
+def paint_grid(painter, rect, grid_size=GRID_SIZE, color=GRID_COLOR, pen_width=GRID_PEN_WIDTH):
+    """
+    在场景矩形 rect 内绘制网格（网格线位于 grid_size 的整数倍处）
+    旋转 / 斜切 / 翻转时退回逐条画线
+    """
+    transform = painter.combinedTransform()
+    scale = transform.m11()
+    if transform.type().value > QTransform.TransformationType.TxScale.value or \
+            scale <= 0 or abs(transform.m22() - scale) > 1e-9:
+        draw_grid_lines(painter, rect, grid_size, color, pen_width)
+        return
+
+    device = painter.device()
+    dpr = device.devicePixelRatioF() if device is not None else 1.0
+    if grid_size * scale * dpr < MIN_CELL_PIXELS:
+        return
+    tile, period = _get_tile(grid_size, zoom_bucket(scale), dpr, color, pen_width)
+
+    # 画刷原点放在场景原点对应的设备像素上（取模避免坐标过大）
+    origin = transform.map(QPointF(0, 0))
+    brush = QBrush(tile)
+    brush.setTransform(QTransform.fromTranslate(round(math.fmod(origin.x(), period) * dpr) / dpr,
+                                                round(math.fmod(origin.y(), period) * dpr) / dpr))
+    device_rect = transform.mapRect(rect)
+
+    painter.save()
+    painter.resetTransform()
+    painter.fillRect(device_rect, brush)
+    painter.restore()
+
+
+def _get_tile(grid_size, bucket, dpr, color, pen_width):
+    """平铺块（按需渲染并缓存）"""
+    key = (grid_size, bucket, dpr, color.rgba(), pen_width)
+    cached = _tiles.get(key)
+    if cached is not None:
+        _tiles.move_to_end(key)
+        return cached
+
+    cell = grid_size * bucket * dpr  # 一个网格的设备像素
+    first = max(1, math.ceil(TILE_MIN_PIXELS / cell))
+    cells = min(range(first, first + TILE_CANDIDATES),
+                key=lambda n: abs(n * cell - round(n * cell)) / n)
+    size = round(cells * cell)
+    span = cells * grid_size  # 一块覆盖的场景长度
+
+    tile = QPixmap(size, size)
+    tile.fill(Qt.GlobalColor.transparent)
+    tile_painter = QPainter(tile)
+    tile_painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    tile_painter.scale(size / span, size / span)
+    tile_painter.setPen(QPen(color, pen_width))
+    # 块两侧边界上的线都画：线宽跨过边界的一半由相邻块的同一条线补齐
+    lines = []
+    for offset in range(0, span + 1, grid_size):
+        lines.append(QLineF(offset, 0, offset, span))
+        lines.append(QLineF(0, offset, span, offset))
+    tile_painter.drawLines(lines)
+    tile_painter.end()
+    tile.setDevicePixelRatio(dpr)
+
+    cached = (tile, size / dpr)
+    _tiles[key] = cached
+    while len(_tiles) > MAX_TILES:
+        _tiles.popitem(last=False)
+    return cached
+
+
+def draw_grid_lines(painter, rect, grid_size=GRID_SIZE, color=GRID_COLOR, pen_width=GRID_PEN_WIDTH):
+    """逐条画网格线（变换不是纯缩放时使用）"""
+    painter.setPen(QPen(color, pen_width))
+    left = math.floor(rect.left() / grid_size) * grid_size
+    top = math.floor(rect.top() / grid_size) * grid_size
+    lines = [QLineF(x, rect.top(), x, rect.bottom())
+             for x in range(int(left), int(math.ceil(rect.right())), grid_size)]
+    lines += [QLineF(rect.left(), y, rect.right(), y)
+              for y in range(int(top), int(math.ceil(rect.bottom())), grid_size)]
+    painter.drawLines(lines)
+
+
+def clear_grid_cache():
+    """清空平铺块缓存"""
+    _tiles.clear()
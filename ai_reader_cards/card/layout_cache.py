@@ -0,0 +1,99 @@
+"""
+布局结果缓存 - 按树结构的 Merkle 哈希缓存布局结果（有界 LRU）
+键 = 根节点子树哈希（拓扑 + 节点大小）+ 布局参数（布局类型、间距等），与节点id无关；
+在布局之间来回切换且树没有改变时，直接取缓存结果，不再重新计算
+
+对子树布局与位置无关的布局，还按分支（根节点的子节点）哈希缓存子树内各节点
+相对分支根节点的偏移，只有部分分支改变时，未改变的分支直接复用偏移
+"""
+
+from collections import OrderedDict
+
+
+class LayoutResultCache:
+    """布局结果缓存（有界 LRU）"""
+
+    def __init__(self, max_results=16, max_branches=256):
+        self.max_results = max_results
+        self.max_branches = max_branches
+        self._results = OrderedDict()  # (根哈希, 参数) -> 前序排列的坐标元组
+        self._branches = OrderedDict()  # (分支哈希, 参数) -> 前序排列的相对偏移元组
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, snapshot, params):
+        """
+        查找整棵树的布局结果
+        Args:
+            snapshot: TreeSnapshot
+            params: 布局参数（可哈希，如 (布局类型, 间距...)）
+        Returns:
+            {节点id: (x, y)}，未命中时返回 None
+        """
+        if not len(snapshot):
+            return None
+        key = (snapshot.subtree_hashes()[0], params)
+        coords = self._results.get(key)
+        if coords is None:
+            self.misses += 1
+            return None
+        self._results.move_to_end(key)
+        self.hits += 1
+        return dict(zip(snapshot.ids, coords))
+
+    def store(self, snapshot, params, positions, cache_branches=False):
+        """
+        保存布局结果
+        Args:
+            positions: {节点id: (x, y)}
+            cache_branches: 是否同时按分支缓存相对偏移（子树布局与位置无关时才可以）
+        """
+        if not len(snapshot):
+            return
+        try:
+            coords = tuple(positions[node_id] for node_id in snapshot.ids)
+        except KeyError:
+            # 结果不完整（如节点id重复），不缓存
+            return
+
+        self._put(self._results, (snapshot.subtree_hashes()[0], params), coords, self.max_results)
+
+        if cache_branches:
+            hashes = snapshot.subtree_hashes()
+            for index in snapshot.children_of(0):
+                bx, by = coords[index]
+                offsets = tuple((x - bx, y - by) for x, y in coords[index:snapshot.subtree_end(index)])
+                self._put(self._branches, (hashes[index], params), offsets, self.max_branches)
+
+    def branch_offsets(self, snapshot, params):
+        """
+        未改变的分支（哈希命中）的缓存偏移
+        Returns:
+            {分支根节点下标: 相对偏移元组}
+        """
+        if not len(snapshot):
+            return {}
+        hashes = snapshot.subtree_hashes()
+        result = {}
+        for index in snapshot.children_of(0):
+            key = (hashes[index], params)
+            offsets = self._branches.get(key)
+            if offsets is not None:
+                self._branches.move_to_end(key)
+                result[index] = offsets
+        return result
+
+    @staticmethod
+    def _put(table, key, value, max_entries):
+        table[key] = value
+        table.move_to_end(key)
+        while len(table) > max_entries:
+            table.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        self._results.clear()
+        self._branches.clear()
+
+    def __len__(self):
+        return len(self._results)
@@ -0,0 +1,291 @@
+"""
+向量化布局核心 - 不依赖 Qt 的 NumPy 实现
+树用整数数组表示：parent（父节点下标）、first_child（第一个子节点）、next_sibling（下一个兄弟），
+节点大小用 width / height 浮点数组；节点按层（广度优先）排列，同一父节点的子节点连续存放
+
+所有布局都写成"子节点相对父节点的偏移"：偏移由兄弟节点的分段前缀和一次性算出，
+再按层把父节点坐标加到子节点上（每层一次数组运算，没有递归）
+
+LayoutEngine 和 CardLayoutEngine 是这里的薄适配层；
+也可以在测试和命令行工具中直接使用（不需要 QApplication）：
+python ai_reader_cards/card/layout_core.py [节点数]
+"""
+
+import numpy as np
+
+
+class LayoutTree:
+    """数组表示的树（节点按层排列，下标 0 为根节点）"""
+
+    def __init__(self, parent, width=None, height=None):
+        """
+        Args:
+            parent: 父节点下标（根节点为 -1），要求按层排列且同一父节点的子节点连续
+            width: 节点宽度（None 表示全为 0）
+            height: 节点高度（None 表示全为 0）
+        """
+        self.parent = np.asarray(parent, dtype=np.int64)
+        n = len(self.parent)
+        self.width = np.zeros(n) if width is None else np.asarray(width, dtype=float)
+        self.height = np.zeros(n) if height is None else np.asarray(height, dtype=float)
+
+        idx = np.arange(n)
+        par = self.parent[1:]
+        # 兄弟节点连续存放：父节点与前一个节点不同的位置就是第一个子节点
+        is_first = np.ones(n - 1, dtype=bool) if n > 1 else np.zeros(0, dtype=bool)
+        if n > 2:
+            is_first[1:] = par[1:] != par[:-1]
+
+        self.first_child = np.full(n, -1, dtype=np.int64)
+        self.first_child[par[is_first]] = idx[1:][is_first]
+        self.child_count = np.bincount(par, minlength=n) if n > 1 else np.zeros(n, dtype=np.int64)
+
+        self.next_sibling = np.full(n, -1, dtype=np.int64)
+        if n > 2:
+            same = par[1:] == par[:-1]
+            self.next_sibling[1:-1][same] = idx[2:][same]
+
+        # 兄弟序号（在父节点的子节点中的位置）
+        self.sibling_index = np.zeros(n, dtype=np.int64)
+        self.sibling_index[1:] = idx[1:] - self.first_child[par]
+
+        # 深度与每层的下标范围：按层排列时 parent 单调不减，
+        # 下一层就是父节点落在当前层内的那一段
+        self.depth = np.zeros(n, dtype=np.int64)
+        self.levels = []
+        start, end = 0, min(n, 1)
+        while start < end:
+            self.levels.append((start, end))
+            self.depth[start:end] = len(self.levels) - 1
+            start, end = end, int(np.searchsorted(self.parent, end, side='left'))
+
+    def __len__(self):
+        return len(self.parent)
+
+    @classmethod
+    def from_nodes(cls, root, size_of=None, frozen=()):
+        """
+        从具有 children 属性的节点对象构建数组树
+        Args:
+            root: 根节点
+            size_of: size_of(node) -> (宽, 高)；None 表示节点视为点
+            frozen: 只定位自身、不展开子树的节点
+            （collapsed 为真的节点同样不展开：折叠的子树不参与布局）
+        Returns:
+            (LayoutTree, 节点列表)，节点列表与数组下标一一对应
+        """
+        nodes = [root]
+        parent = [-1]
+        i = 0
+        while i < len(nodes):
+            node = nodes[i]
+            if node not in frozen and not getattr(node, 'collapsed', False):
+                for child in node.children:
+                    nodes.append(child)
+                    parent.append(i)
+            i += 1
+
+        if size_of is None:
+            return cls(parent), nodes
+        sizes = np.array([size_of(node) for node in nodes], dtype=float).reshape(len(nodes), 2)
+        return cls(parent, sizes[:, 0], sizes[:, 1]), nodes
+
+    # ========== 向量化工具 ==========
+
+    def sibling_prefix(self, values):
+        """兄弟节点之间的分段前缀和（不含自身），根节点为 0"""
+        values = np.asarray(values, dtype=float)
+        excl = np.cumsum(values) - values
+        result = np.zeros(len(self))
+        if len(self) > 1:
+            result[1:] = excl[1:] - excl[self.first_child[self.parent[1:]]]
+        return result
+
+    def children_total(self, values):
+        """每个节点的子节点 values 之和"""
+        if len(self) < 2:
+            return np.zeros(len(self))
+        return np.bincount(self.parent[1:], weights=np.asarray(values, dtype=float)[1:],
+                           minlength=len(self))
+
+    def accumulate(self, root_value, delta):
+        """按层累加：value[子] = value[父] + delta[子]"""
+        out = np.empty(len(self))
+        out[0] = root_value
+        for s, e in self.levels[1:]:
+            out[s:e] = out[self.parent[s:e]] + delta[s:e]
+        return out
+
+    def inherit(self, values):
+        """按层继承：深度 ≥ 2 的节点取父节点的值（深度 1 的值保持不变）"""
+        out = np.array(values, dtype=float)
+        for s, e in self.levels[2:]:
+            out[s:e] = out[self.parent[s:e]]
+        return out
+
+    def of_parent(self, values):
+        """每个节点的父节点的值（根节点为 0）"""
+        result = np.zeros(len(self))
+        if len(self) > 1:
+            result[1:] = np.asarray(values, dtype=float)[self.parent[1:]]
+        return result
+
+
+# ========== CardLayoutEngine 的布局（支持动态节点大小，坐标为左上角） ==========
+
+def card_mind_map(tree, h_spacing=200, v_spacing=100, y0=0.0, depth0=0):
+    """
+    所有子节点向右展开；子节点组以父节点为中心垂直分布
+    Args:
+        y0: 根节点 y
+        depth0: 根节点深度（x = 深度 * h_spacing）
+    """
+    h = tree.height
+    count = tree.of_parent(tree.child_count)
+    total = tree.of_parent(tree.children_total(h)) + v_spacing * (count - 1)
+    first_h = np.zeros(len(tree))
+    if len(tree) > 1:
+        first_h[1:] = h[tree.first_child[tree.parent[1:]]]
+    dy = -total / 2 + first_h / 2 + tree.sibling_prefix(h + v_spacing)
+    dy[0] = 0.0
+
+    x = (depth0 + tree.depth) * float(h_spacing)
+    y = tree.accumulate(y0, dy)
+    return x, y
+
+
+def card_logical(tree, h_spacing=200, v_spacing=120, origin=(0.0, 0.0)):
+    """
+    逻辑结构：子节点在父节点右侧，第一个子节点与父节点顶部对齐，后续依次向下
+    水平步长为子节点自己的宽度 + h_spacing（不是父节点的宽度），与 CardLayoutEngine.logical 保持一致
+    """
+    dx = tree.width + h_spacing
+    dy = tree.sibling_prefix(tree.height + v_spacing)
+    return tree.accumulate(origin[0], dx), tree.accumulate(origin[1], dy)
+
+
+def card_timeline(tree, h_spacing=200, origin=(0.0, 0.0)):
+    """时间轴：子节点从父节点右侧依次横向排列，垂直方向按序号上下错开"""
+    dx = tree.of_parent(tree.width) + h_spacing + tree.sibling_prefix(tree.width + h_spacing)
+    half = tree.of_parent(tree.child_count) // 2
+    dy = (tree.sibling_index - half) * np.maximum(100, tree.height + 20)
+    return tree.accumulate(origin[0], dx), tree.accumulate(origin[1], dy)
+
+
+def card_fishbone(tree, h_spacing=200, v_spacing=100, origin=(0.0, 0.0), depth0=0, direction=None):
+    """鱼骨图（动态节点大小），参数见 fishbone"""
+    spacing = np.maximum(v_spacing, tree.height + 20)
+    return fishbone(tree, h_spacing, spacing, origin, depth0, direction)
+
+
+# ========== LayoutEngine 的布局（节点视为点） ==========
+
+def point_mind_map(tree, h_spacing=250, v_spacing=150):
+    """左右树形：根节点的子节点交替分到左（偶数序号）右（奇数序号）两侧"""
+    index = tree.sibling_index
+    count = tree.of_parent(tree.child_count)
+    dy = -v_spacing * (count - 1) / 2 + index * v_spacing
+
+    direction = np.ones(len(tree))
+    if len(tree) > 1:
+        s, e = tree.levels[1]
+        k = tree.child_count[0]
+        left = index[s:e] % 2 == 0
+        group_index = index[s:e] // 2
+        group_size = np.where(left, (k + 1) // 2, k // 2)
+        dy[s:e] = -v_spacing * (group_size - 1) / 2 + group_index * v_spacing
+        direction[s:e] = np.where(left, -1.0, 1.0)
+        direction = tree.inherit(direction)
+    dy[0] = 0.0
+
+    x = tree.depth * float(h_spacing) * direction
+    y = tree.accumulate(0.0, dy)
+    return x, y
+
+
+def point_logical(tree, h_spacing=250, v_spacing=180):
+    """自上而下逻辑结构：子节点以父节点为中心水平分布，y = 深度 * v_spacing"""
+    count = tree.of_parent(tree.child_count)
+    dx = -h_spacing * (count - 1) / 2 + tree.sibling_index * h_spacing
+    dx[0] = 0.0
+    return tree.accumulate(0.0, dx), tree.depth * float(v_spacing)
+
+
+def point_timeline(tree, h_spacing=200):
+    """时间轴：子节点从父节点右侧每隔 h_spacing 横向排列"""
+    dx = (tree.sibling_index + 1) * float(h_spacing)
+    half = tree.of_parent(tree.child_count) // 2
+    dy = (tree.sibling_index - half) * 100.0
+    dx[0] = dy[0] = 0.0
+    return tree.accumulate(0.0, dx), tree.accumulate(0.0, dy)
+
+
+def point_fishbone(tree, h_spacing=200, v_spacing=100, origin=(0.0, 0.0)):
+    """鱼骨图（节点视为点），参数见 fishbone"""
+    return fishbone(tree, h_spacing, np.full(len(tree), float(v_spacing)), origin)
+
+
+def fishbone(tree, h_spacing, spacing, origin=(0.0, 0.0), depth0=0, direction=None):
+    """
+    鱼骨图：x = 深度 * h_spacing * 方向，子节点 y = 父节点 y + (序号 - 子节点数 // 2) * spacing
+    Args:
+        spacing: 每个节点作为子节点时使用的垂直间距
+        origin: 根节点位置
+        direction: None 表示整棵树（根节点不动，子节点按序号偶左奇右，第一层 y 为 0）；
+            否则只布局子树，所有节点沿用该方向，根节点 x = depth0 * h_spacing * direction
+    """
+    half = tree.of_parent(tree.child_count) // 2
+    dy = (tree.sibling_index - half) * spacing
+    dy[0] = 0.0
+
+    if direction is None:
+        dirs = np.ones(len(tree))
+        if len(tree) > 1:
+            s, e = tree.levels[1]
+            dirs[s:e] = np.where(tree.sibling_index[s:e] % 2 == 0, -1.0, 1.0)
+            dy[s:e] = 0.0
+            dirs = tree.inherit(dirs)
+        x = tree.depth * float(h_spacing) * dirs
+        y = tree.accumulate(0.0, dy)
+        x[0], y[0] = origin
+        return x, y
+
+    x = (depth0 + tree.depth) * float(h_spacing) * direction
+    y = tree.accumulate(origin[1], dy)
+    return x, y
+
+
+def write_positions(nodes, x, y):
+    """把坐标数组写回节点对象的 x / y"""
+    for node, node_x, node_y in zip(nodes, x.tolist(), y.tolist()):
+        node.x = node_x
+        node.y = node_y
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = np.random.default_rng(0)
+    # 随机树：按层生成，保证同一父节点的子节点连续
+    parents = [-1]
+    frontier = [0]
+    while len(parents) < count:
+        next_frontier = []
+        for p in frontier:
+            for _ in range(int(rng.integers(0, 5))):
+                if len(parents) >= count:
+                    break
+                next_frontier.append(len(parents))
+                parents.append(p)
+        frontier = next_frontier or [len(parents) - 1]
+    tree = LayoutTree(parents, rng.uniform(150, 300, len(parents)), rng.uniform(80, 200, len(parents)))
+
+    for name, func in [("card_mind_map", card_mind_map), ("card_logical", card_logical),
+                       ("card_timeline", card_timeline), ("card_fishbone", card_fishbone),
+                       ("point_mind_map", point_mind_map), ("point_logical", point_logical),
+                       ("point_timeline", point_timeline), ("point_fishbone", point_fishbone)]:
+        start = time.perf_counter()
+        func(tree)
+        print(f"{name:16s} {len(tree)} 节点 {(time.perf_counter() - start) * 1000:.1f} ms")
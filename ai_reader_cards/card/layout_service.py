@@ -0,0 +1,339 @@
+"""
+后台布局服务 - 在工作线程中计算布局，不阻塞界面
+GUI 线程把树结构拍成不可变、不含 Qt 对象的快照（TreeSnapshot），
+工作线程只在快照的副本上运行布局引擎，得到 {节点id: (x, y)}，
+结果通过信号回到 GUI 线程一次性应用；
+较新的请求会使旧请求的结果作废，应用前再与当前树比对快照，树已改变则丢弃
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QObject, QPointF, pyqtSignal
+
+
+class TreeSnapshot:
+    """
+    不可变的树快照（只包含普通 Python 数据，可以安全地交给工作线程）
+    节点按前序排列，下标 0 为根节点
+    """
+
+    __slots__ = ('ids', 'parents', 'widths', 'heights', 'expanded', 'root_center', 'key',
+                 '_hashes', '_subtree_ends')
+
+    def __init__(self, ids, parents, widths, heights, expanded, root_center=(0.0, 0.0)):
+        self.ids = tuple(ids)  # 节点id
+        self.parents = tuple(parents)  # 父节点下标（根节点为 -1）
+        self.widths = tuple(widths)
+        self.heights = tuple(heights)
+        self.expanded = tuple(expanded)  # 是否展开（收起的节点不布局子树）
+        self.root_center = tuple(root_center)  # 根节点中心（部分布局引擎以此为基准）
+        # 比较两个快照是否描述同一棵树（结构、大小、根节点中心都相同）
+        self.key = (self.ids, self.parents, self.widths, self.heights, self.expanded, self.root_center)
+        self._hashes = None
+        self._subtree_ends = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __eq__(self, other):
+        return isinstance(other, TreeSnapshot) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def subtree_hashes(self):
+        """
+        每个节点子树的 Merkle 哈希（节点大小、展开状态 + 子节点哈希，与节点id无关）
+        结构和大小都相同的子树哈希相同，可以复用缓存的布局结果
+        """
+        if self._hashes is None:
+            count = len(self.ids)
+            child_hashes = [[] for _ in range(count)]
+            hashes = [0] * count
+            # 前序排列中子节点的下标总是大于父节点，倒序遍历即为自底向上
+            for index in range(count - 1, -1, -1):
+                child_hashes[index].reverse()
+                hashes[index] = hash((self.widths[index], self.heights[index], self.expanded[index],
+                                      tuple(child_hashes[index])))
+                parent_index = self.parents[index]
+                if parent_index >= 0:
+                    child_hashes[parent_index].append(hashes[index])
+            self._hashes = hashes
+        return self._hashes
+
+    def subtree_end(self, index):
+        """前序排列中节点子树的结束下标（子树占据 [index, end)）"""
+        if self._subtree_ends is None:
+            ends = list(range(1, len(self.ids) + 1))
+            for i in range(len(self.ids) - 1, 0, -1):
+                parent_index = self.parents[i]
+                ends[parent_index] = max(ends[parent_index], ends[i])
+            self._subtree_ends = ends
+        return self._subtree_ends[index]
+
+    def children_of(self, index):
+        """节点的子节点下标"""
+        end = self.subtree_end(index)
+        result = []
+        child = index + 1
+        while child < end:
+            result.append(child)
+            child = self.subtree_end(child)
+        return result
+
+    @classmethod
+    def from_cards(cls, root_card):
+        """从 KnowledgeCard 树（child_cards）构建快照"""
+        ids, parents, widths, heights, expanded = [], [], [], [], []
+        visited = set()
+        stack = [(root_card, -1)]
+        while stack:
+            card, parent_index = stack.pop()
+            if id(card) in visited:
+                continue
+            visited.add(id(card))
+            index = len(ids)
+            ids.append(card.card_id)
+            parents.append(parent_index)
+            if hasattr(card, 'get_actual_size'):
+                width, height = card.get_actual_size()
+            else:
+                width, height = card.CARD_WIDTH, card.CARD_HEIGHT
+            widths.append(float(width))
+            heights.append(float(height))
+            expanded.append(bool(getattr(card, 'is_expanded', True)))
+            for child_card in reversed(getattr(card, 'child_cards', [])):
+                stack.append((child_card, index))
+
+        center = root_card.get_center_pos()
+        return cls(ids, parents, widths, heights, expanded, (center.x(), center.y()))
+
+    @classmethod
+    def from_tree_nodes(cls, root, sizes, default_size=(0, 0)):
+        """
+        从 CardTreeNode / TreeNode 树（children）构建快照
+        Args:
+            root: 根节点
+            sizes: {tree_node: (宽, 高)}
+            default_size: 没有登记大小的节点使用的大小
+        """
+        ids, parents, widths, heights, expanded = [], [], [], [], []
+        stack = [(root, -1)]
+        while stack:
+            node, parent_index = stack.pop()
+            index = len(ids)
+            ids.append(node.id)
+            parents.append(parent_index)
+            width, height = sizes.get(node, default_size)
+            widths.append(float(width))
+            heights.append(float(height))
+            collapsed = getattr(node, 'collapsed', False)
+            expanded.append(not collapsed)
+            if collapsed:
+                continue  # 折叠的子树不参与布局
+            for child in reversed(node.children):
+                stack.append((child, index))
+        return cls(ids, parents, widths, heights, expanded)
+
+    def build_tree_nodes(self):
+        """
+        在快照副本上构建可修改的树节点（供 CardLayoutEngine / LayoutEngine 使用）
+        Returns:
+            (节点列表, {节点: (宽, 高)})，节点列表与快照下标一一对应
+        """
+        nodes = []
+        for index, node_id in enumerate(self.ids):
+            node = _WorkNode(node_id)
+            parent_index = self.parents[index]
+            if parent_index >= 0:
+                parent = nodes[parent_index]
+                node.parent = parent
+                node.level = parent.level + 1
+                parent.children.append(node)
+            nodes.append(node)
+        sizes = {node: (self.widths[i], self.heights[i]) for i, node in enumerate(nodes)}
+        return nodes, sizes
+
+    def build_cards(self):
+        """在快照副本上构建卡片替身（供 EnhancedLayoutEngine 系列使用）"""
+        cards = []
+        for index, card_id in enumerate(self.ids):
+            parent_index = self.parents[index]
+            parent = cards[parent_index] if parent_index >= 0 else None
+            card = _WorkCard(card_id, parent, self.widths[index], self.heights[index], self.expanded[index])
+            if parent is not None:
+                parent.child_cards.append(card)
+            cards.append(card)
+        return cards
+
+
+class _WorkNode:
+    """工作线程中使用的树节点（只属于一次布局计算）"""
+
+    __slots__ = ('id', 'x', 'y', 'level', 'parent', 'children')
+
+    def __init__(self, node_id):
+        self.id = node_id
+        self.x = 0
+        self.y = 0
+        self.level = 0
+        self.parent = None
+        self.children = []
+
+
+class _WorkCard:
+    """工作线程中使用的卡片替身（提供布局引擎读取的属性）"""
+
+    __slots__ = ('card_id', 'parent_card', 'child_cards', 'CARD_WIDTH', 'CARD_HEIGHT', 'is_expanded')
+
+    def __init__(self, card_id, parent_card, width, height, is_expanded=True):
+        self.card_id = card_id
+        self.parent_card = parent_card
+        self.child_cards = []
+        self.CARD_WIDTH = width
+        self.CARD_HEIGHT = height
+        self.is_expanded = is_expanded
+
+    def get_actual_size(self):
+        return self.CARD_WIDTH, self.CARD_HEIGHT
+
+
+# ========== 工作线程中执行的布局计算（只访问快照） ==========
+
+def compute_card_layout(snapshot, layout_name, resolve_overlaps=False, branch_offsets=None):
+    """
+    用 CardLayoutEngine 计算布局，返回 {节点id: (x, y)}
+    Args:
+        branch_offsets: {分支根节点下标: 子树各节点相对分支根节点的偏移（前序）}，
+            这些分支只定位分支根节点，子树直接按缓存的偏移放置
+    """
+    from .madmap_based_layout import CardLayoutEngine
+
+    nodes, sizes = snapshot.build_tree_nodes()
+    if not nodes:
+        return {}
+    root = nodes[0]
+    if branch_offsets:
+        frozen = {nodes[index] for index in branch_offsets}
+        getattr(CardLayoutEngine, layout_name)(root, sizes=sizes, frozen=frozen)
+        for index, offsets in branch_offsets.items():
+            branch = nodes[index]
+            for node, (dx, dy) in zip(nodes[index:snapshot.subtree_end(index)], offsets):
+                node.x = branch.x + dx
+                node.y = branch.y + dy
+    else:
+        getattr(CardLayoutEngine, layout_name)(root, sizes=sizes)
+    if resolve_overlaps and layout_name != 'auto_arrange':
+        CardLayoutEngine.resolve_overlaps(root, sizes=sizes)
+    return {node.id: (node.x, node.y) for node in nodes}
+
+
+def compute_tree_layout(snapshot, layout_name, origin=(0.0, 0.0)):
+    """
+    用 LayoutEngine 计算布局（节点视为点），返回 {节点id: (x, y)}
+    Args:
+        origin: 根节点的位置（LayoutEngine 以根节点为原点，结果整体平移到这里）
+    """
+    from .layout_engine import LayoutEngine
+
+    nodes, _ = snapshot.build_tree_nodes()
+    if not nodes:
+        return {}
+    getattr(LayoutEngine, layout_name)(nodes[0])
+    dx = origin[0] - nodes[0].x
+    dy = origin[1] - nodes[0].y
+    return {node.id: (node.x + dx, node.y + dy) for node in nodes}
+
+
+def compute_engine_layout(snapshot, engine_cls, layout_type, margin_x=80, margin_y=40):
+    """
+    用 EnhancedLayoutEngine 系列计算布局，返回 {卡片id: (left, top)}
+    每次计算使用独立的引擎实例，不与 GUI 线程共享状态
+    """
+    cards = snapshot.build_cards()
+    if not cards:
+        return {}
+    engine = engine_cls(margin_x, margin_y)
+    engine.set_root_center(QPointF(*snapshot.root_center))
+    positions = engine.layout_nodes(cards[0], cards, layout_type)
+    return {card_id: (pos.x(), pos.y()) for card_id, pos in positions.items()}
+
+
+class LayoutService(QObject):
+    """
+    后台布局服务（每个场景一个）
+    只保留最新一次请求的回调，旧请求的结果到达时直接丢弃
+    """
+
+    _finished = pyqtSignal(int, object)  # (请求序号, Future)，从工作线程发出，排队回到 GUI 线程
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._executor = None
+        self._generation = 0  # 最新请求的序号
+        self._pending = {}  # 请求序号 -> (快照, 回调)
+        self.dropped_count = 0  # 被丢弃的过期结果数
+        self._finished.connect(self._on_finished)
+
+    def submit(self, snapshot, compute, on_ready, on_error=None):
+        """
+        提交布局计算
+        Args:
+            snapshot: TreeSnapshot
+            compute: compute(snapshot) -> {节点id: (x, y)}，在工作线程中执行
+            on_ready: on_ready(snapshot, positions)，在 GUI 线程中执行；
+                结果已过期（计算期间树已改变）时返回 False，由服务计入 dropped_count
+            on_error: on_error(异常)，计算失败时在 GUI 线程中执行（节点保持原位置）
+        Returns:
+            请求序号
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="layout")
+
+        self._generation += 1
+        generation = self._generation
+        # 新请求使之前的请求全部作废
+        self._pending = {generation: (snapshot, on_ready, on_error)}
+
+        future = self._executor.submit(compute, snapshot)
+        future.add_done_callback(lambda f: self._emit_finished(generation, f))
+        return generation
+
+    def _emit_finished(self, generation, future):
+        try:
+            self._finished.emit(generation, future)
+        except RuntimeError:
+            # 场景已经销毁
+            pass
+
+    def _on_finished(self, generation, future):
+        """GUI 线程：应用最新请求的结果"""
+        entry = self._pending.pop(generation, None)
+        if entry is None:
+            self.dropped_count += 1
+            return
+        snapshot, on_ready, on_error = entry
+        try:
+            positions = future.result()
+        except Exception as e:
+            print(f"后台布局失败: {e}")
+            if on_error:
+                on_error(e)
+            return
+        if on_ready(snapshot, positions) is False:
+            self.dropped_count += 1
+
+    def cancel(self):
+        """作废所有未完成的请求"""
+        self._pending.clear()
+
+    def is_pending(self):
+        """是否有未完成的请求"""
+        return bool(self._pending)
+
+    def shutdown(self):
+        """关闭工作线程"""
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,95 @@
+"""
+细节层次（LOD）- 缩小视图时简化卡片绘制
+视图缩放低于阈值时卡片只画一个单色矩形和标题，缩放极小时只画一个点；
+此时卡片的文本、图标、图片、标签等子项全部隐藏，Qt 不再为它们排版和绘制
+
+场景记录当前细节层次（set_view_scale），只在缩放跨过阈值时遍历一次卡片切换子项可见性；
+视图平移 / 缩放过程中（交互模式）按更低的缩放取细节层次，交互结束后恢复
+"""
+
+from PyQt6.QtCore import QPointF, QRectF, Qt
+from PyQt6.QtGui import QColor, QFont, QStaticText
+
+DETAIL_FULL = 0  # 完整绘制
+DETAIL_SIMPLE = 1  # 单色矩形 + 标题
+DETAIL_DOT = 2  # 只画一个点
+
+SIMPLE_SCALE = 0.5  # 缩放低于此值时简化绘制
+DOT_SCALE = 0.2  # 缩放低于此值时只画点
+INTERACTIVE_SCALE_BIAS = 0.5  # 交互过程中按 缩放 × 此值 取细节层次（缩放 1.0 时仍完整绘制）
+
+TITLE_PIXEL_SIZE = 40  # 简化绘制时标题字号（场景像素，缩小后仍然可读）
+TITLE_PADDING = 12
+
+_title_font = None
+_title_color = QColor(255, 255, 255)
+
+
+def detail_level_for_scale(scale, interactive=False):
+    """视图缩放对应的细节层次（interactive 为 True 时表示正在平移 / 缩放）"""
+    if interactive:
+        scale *= INTERACTIVE_SCALE_BIAS
+    if scale < DOT_SCALE:
+        return DETAIL_DOT
+    if scale < SIMPLE_SCALE:
+        return DETAIL_SIMPLE
+    return DETAIL_FULL
+
+
+def apply_detail_level(item, level):
+    """切换卡片的细节层次：非完整绘制时隐藏所有子项"""
+    item.detail_level = level
+    sync_children(item)
+    item.update()
+
+
+def sync_children(item):
+    """按卡片当前细节层次设置子项可见性（卡片新增子项后调用）"""
+    full = item.detail_level == DETAIL_FULL
+    for child in item.childItems():
+        if child.isVisible() != full:
+            child.setVisible(full)
+
+
+def paint_reduced(painter, item, rect, color, title):
+    """
+    简化绘制（item.detail_level 不是 DETAIL_FULL 时由卡片的 paint 调用）
+    Args:
+        item: 卡片（缓存标题排版结果）
+        rect: 卡片矩形
+        color: 填充颜色
+        title: 标题文本
+    """
+    if item.detail_level == DETAIL_DOT:
+        size = min(rect.width(), rect.height()) / 2
+        center = rect.center()
+        painter.fillRect(QRectF(center.x() - size / 2, center.y() - size / 2, size, size), color)
+        return
+
+    painter.fillRect(rect, color)
+    painter.setFont(_get_title_font())
+    painter.setPen(_title_color)
+    painter.drawStaticText(QPointF(rect.x() + TITLE_PADDING, rect.y() + TITLE_PADDING),
+                           _get_title_text(item, title, rect.width() - 2 * TITLE_PADDING))
+
+
+def _get_title_font():
+    global _title_font
+    if _title_font is None:
+        _title_font = QFont("Microsoft YaHei")
+        _title_font.setPixelSize(TITLE_PIXEL_SIZE)
+        _title_font.setBold(True)
+    return _title_font
+
+
+def _get_title_text(item, title, width):
+    """卡片标题的 QStaticText（标题或宽度改变时才重新排版）"""
+    cached = getattr(item, '_lod_title', None)
+    if cached is None or cached[0] != title or cached[1] != width:
+        static_text = QStaticText(title)
+        static_text.setTextFormat(Qt.TextFormat.PlainText)
+        static_text.setTextWidth(width)
+        static_text.prepare(font=_get_title_font())
+        cached = (title, width, static_text)
+        item._lod_title = cached
+    return cached[2]
@@ -57,9 +57,19 @@ class ProfessionalConnection:
         self.child_node = child_node
         self.path = QPainterPath()
         self.animation = None
+        self.cached_points = None  # refresh() 计算出的连接点，绘制箭头时复用
+
+    def refresh(self):
+        """重新计算连接点和路径（供连线缓存在端点移动后调用）"""
+        self.cached_points = None
+        self.cached_points = self.get_connection_points()
+        self.update_path()
 
     def get_connection_points(self):
         """计算连接点位置"""
+        if self.cached_points is not None:
+            return self.cached_points
+
         parent_center = self.parent_node.center_pos() if hasattr(self.parent_node, "center_pos") else QPointF(
             self.parent_node.pos().x(), self.parent_node.pos().y()
         )
@@ -2,237 +2,199 @@
 基于 madmap 的布局引擎
 参考 test/madmap/layout.py
 支持动态节点大小
+
+各布局的 visual_nodes 参数保留兼容；推荐传入 sizes（{tree_node: (宽, 高)}，
+由场景的 NodeSizeCache 构建），避免每次取大小都扫描全部节点
+
+布局计算由 layout_core（NumPy 向量化，不依赖 Qt）完成，这里只负责取节点大小和写回坐标
 """
 
+import numpy as np
+
+from . import layout_core
+from .force_layout import force_directed_layout
+from .layout_core import LayoutTree
+from .overlap_resolver import resolve_tree_overlaps
+
+
+def _size_getter(visual_nodes=None, sizes=None):
+    """
+    返回 get_node_size(node) 函数，按 tree_node 查表 O(1)
+    Args:
+        visual_nodes: 可视化节点列表（没有 sizes 时据此建表，每次布局只建一次）
+        sizes: 预先计算好的大小表 {tree_node: (宽, 高)}
+    """
+    from .madmap_based_nodes import CardVisualNode
+    default_size = (CardVisualNode.WIDTH, CardVisualNode.HEIGHT)
+
+    if sizes is None:
+        sizes = {vn.tree_node: tuple(vn.get_actual_size()) for vn in visual_nodes or ()}
+
+    def get_node_size(node):
+        """获取节点实际大小（查表，未登记的节点使用默认大小）"""
+        return sizes.get(node, default_size)
+
+    get_node_size.table = sizes
+    return get_node_size
+
+
+def _node_depth(node):
+    """节点深度（根节点为 0）"""
+    depth = 0
+    while node.parent is not None:
+        node = node.parent
+        depth += 1
+    return depth
+
 
 class CardLayoutEngine:
     """
     卡片布局引擎 - 基于 madmap 的 LayoutEngine
     参考 test/madmap/layout.py
+
+    mind_map / logical / timeline / fishbone 支持 start 参数：只重新布局 start 的子树，
+    start 自身位置保持不变（插入或删除子节点后只影响该父节点的子节点带及其子树）
+
+    mind_map / logical / timeline 中子树相对子树根节点的偏移与子树所在位置无关，
+    支持 frozen 参数：frozen 中的节点只定位自身，不展开子树（子树由调用方按缓存的偏移放置）
+
+    network 为力导向布局（考虑关联线），从当前位置热启动，不支持 start / frozen
     """
+
+    # 支持 start 参数（子树增量布局）的布局
+    INCREMENTAL_LAYOUTS = ('mind_map', 'logical', 'timeline', 'fishbone')
+
+    # 子树布局与位置无关、支持 frozen 参数的布局
+    SUBTREE_INVARIANT_LAYOUTS = ('mind_map', 'logical', 'timeline')
     
     @staticmethod
-    def mind_map(root, h_spacing=200, v_spacing=100, visual_nodes=None):
-        """左右树形布局（参考 madmap），支持动态节点大小"""
-        def get_node_size(node):
-            """获取节点实际大小"""
-            if visual_nodes:
-                for vn in visual_nodes:
-                    if vn.tree_node == node:
-                        width, height = vn.get_actual_size()
-                        return width, height
-            # 默认大小
-            from .madmap_based_nodes import CardVisualNode
-            return CardVisualNode.WIDTH, CardVisualNode.HEIGHT
-        
-        def layout(node, depth=0, y_offset=0, direction=1):
-            node.x = depth * h_spacing * direction
-            node.y = y_offset
-            _, node_height = get_node_size(node)
-            
-            # 根据子节点总高度计算间距
-            if node.children:
-                total_children_height = sum(get_node_size(c)[1] for c in node.children)
-                total_spacing = v_spacing * (len(node.children) - 1)
-                total_height = total_children_height + total_spacing
-                child_y = y_offset - total_height / 2 + get_node_size(node.children[0])[1] / 2
-                
-                for c in node.children:
-                    _, child_height = get_node_size(c)
-                    layout(c, depth + 1, child_y, direction)
-                    child_y += child_height + v_spacing
-
-        # 根节点在左侧，所有子节点向右展开
-        root.x = 0
-        root.y = 0
-
-        # 所有子节点都向右展开（从左到右）
-        if root.children:
-            total_children_height = sum(get_node_size(c)[1] for c in root.children)
-            total_spacing = v_spacing * (len(root.children) - 1)
-            total_height = total_children_height + total_spacing
-            child_y = -total_height / 2 + get_node_size(root.children[0])[1] / 2
-            
-            for c in root.children:
-                _, child_height = get_node_size(c)
-                layout(c, 1, child_y, 1)  # 向右展开
-                child_y += child_height + v_spacing
+    def mind_map(root, h_spacing=200, v_spacing=100, visual_nodes=None, sizes=None, start=None, frozen=()):
+        """左右树形布局（参考 madmap），支持动态节点大小；根节点在左侧，所有子节点向右展开"""
+        get_node_size = _size_getter(visual_nodes, sizes)
+
+        if start is not None and start is not root:
+            # 只重新布局 start 的子树（所有子节点都向右展开）
+            tree, nodes = LayoutTree.from_nodes(start, get_node_size, frozen)
+            x, y = layout_core.card_mind_map(tree, h_spacing, v_spacing, start.y, _node_depth(start))
+        else:
+            # 根节点的子节点总是展开（根节点不受 frozen 影响）
+            frozen = {node for node in frozen if node is not root}
+            tree, nodes = LayoutTree.from_nodes(root, get_node_size, frozen)
+            x, y = layout_core.card_mind_map(tree, h_spacing, v_spacing)
+        layout_core.write_positions(nodes, x, y)
 
     @staticmethod
-    def logical(root, h_spacing=200, v_spacing=120, visual_nodes=None):
+    def logical(root, h_spacing=200, v_spacing=120, visual_nodes=None, sizes=None, start=None, frozen=()):
         """
         逻辑结构布局：从左到右，父节点 → 子节点
-        水平方向：父节点右边 + 固定间距 → 子节点左边
+        水平方向：父节点左边 + 子节点宽度 + 固定间距 → 子节点左边
         垂直方向：多个子节点垂直分布
         
         数学公式：
         - 父节点 a：左上角 (ax, ay)，大小 (aw, ah)
         - 子节点 b：左上角 (bx, by)，大小 (bw, bh)
-        - 水平：bx = ax + aw + h_spacing
-        - 垂直：第一个子节点 by = ay，后续子节点垂直分布
+        - 水平：bx = ax + bw + h_spacing（步长取子节点自己的宽度，与原实现一致；节点等宽时即 ax + aw + h_spacing）
+        - 垂直：第一个子节点 by = ay，后续子节点依次向下（上一个子节点底部 + v_spacing）
         """
-        def get_node_size(node):
-            """获取节点实际大小"""
-            if visual_nodes:
-                for vn in visual_nodes:
-                    if vn.tree_node == node:
-                        width, height = vn.get_actual_size()
-                        return width, height
-            from .madmap_based_nodes import CardVisualNode
-            return CardVisualNode.WIDTH, CardVisualNode.HEIGHT
-        
-        def layout(node, parent_x=None, parent_y=None, parent_w=None, parent_h=None):
-            """
-            递归布局节点
-            Args:
-                node: 当前节点
-                parent_x: 父节点左上角 x（None 表示根节点）
-                parent_y: 父节点左上角 y
-                parent_w: 父节点宽度
-                parent_h: 父节点高度
-            """
-            # 获取当前节点实际大小
-            node_w, node_h = get_node_size(node)
-            
-            if parent_x is None:
-                # 根节点：左上角在 (0, 0)
-                node.x = 0
-                node.y = 0
-            else:
-                # 子节点：在父节点右侧
-                # 水平方向：父节点右边缘 + 固定间距 = 子节点左边缘
-                # bx = ax + aw + h_spacing
-                node.x = parent_x + parent_w + h_spacing
-                
-                # 垂直方向：第一个子节点与父节点顶部对齐
-                # 如果有多个子节点，需要垂直分布（这里先简化，后续会调整）
-                node.y = parent_y
-            
-            # 布局子节点
-            if node.children:
-                # 先计算所有子节点的大小，用于垂直分布
-                child_sizes = [get_node_size(c) for c in node.children]
-                
-                # 第一个子节点：与父节点顶部对齐
-                first_child = node.children[0]
-                first_child_w, first_child_h = child_sizes[0]
-                layout(first_child, node.x, node.y, first_child_w, first_child_h)
-                
-                # 后续子节点：垂直分布
-                current_y = node.y + first_child_h + v_spacing
-                for i in range(1, len(node.children)):
-                    child = node.children[i]
-                    child_w, child_h = child_sizes[i]
-                    layout(child, node.x, current_y, child_w, child_h)
-                    # 下一个子节点的 y = 当前子节点底部 + 垂直间距
-                    current_y += child_h + v_spacing
-
-        # 从根节点开始布局
-        layout(root)
+        get_node_size = _size_getter(visual_nodes, sizes)
+
+        if start is not None and start is not root:
+            # 只重新布局 start 的子树
+            tree, nodes = LayoutTree.from_nodes(start, get_node_size, frozen)
+            x, y = layout_core.card_logical(tree, h_spacing, v_spacing, (start.x, start.y))
+        else:
+            # 根节点：左上角在 (0, 0)
+            tree, nodes = LayoutTree.from_nodes(root, get_node_size, frozen)
+            x, y = layout_core.card_logical(tree, h_spacing, v_spacing)
+        layout_core.write_positions(nodes, x, y)
 
     @staticmethod
-    def timeline(root, h_spacing=200, visual_nodes=None):
+    def timeline(root, h_spacing=200, visual_nodes=None, sizes=None, start=None, frozen=()):
         """时间轴布局，横向排列（参考 madmap），支持动态节点大小"""
-        def get_node_size(node):
-            """获取节点实际大小"""
-            if visual_nodes:
-                for vn in visual_nodes:
-                    if vn.tree_node == node:
-                        width, height = vn.get_actual_size()
-                        return width, height
-            from .madmap_based_nodes import CardVisualNode
-            return CardVisualNode.WIDTH, CardVisualNode.HEIGHT
-        
-        def layout(node, x_offset=0, y_offset=0):
-            node.x = x_offset
-            node.y = y_offset
-            node_width, _ = get_node_size(node)
-            child_x = x_offset + node_width + h_spacing
-            
-            for i, c in enumerate(node.children):
-                _, child_height = get_node_size(c)
-                layout(c, child_x, y_offset + (i - len(node.children) // 2) * max(100, child_height + 20))
-                child_width, _ = get_node_size(c)
-                child_x += child_width + h_spacing
-
-        layout(root)
+        get_node_size = _size_getter(visual_nodes, sizes)
+
+        if start is not None and start is not root:
+            # 只重新布局 start 的子树
+            tree, nodes = LayoutTree.from_nodes(start, get_node_size, frozen)
+            x, y = layout_core.card_timeline(tree, h_spacing, (start.x, start.y))
+        else:
+            tree, nodes = LayoutTree.from_nodes(root, get_node_size, frozen)
+            x, y = layout_core.card_timeline(tree, h_spacing)
+        layout_core.write_positions(nodes, x, y)
 
     @staticmethod
-    def fishbone(root, h_spacing=200, v_spacing=100, visual_nodes=None):
-        """鱼骨图布局（参考 madmap），支持动态节点大小"""
-        def get_node_size(node):
-            """获取节点实际大小"""
-            if visual_nodes:
-                for vn in visual_nodes:
-                    if vn.tree_node == node:
-                        width, height = vn.get_actual_size()
-                        return width, height
-            from .madmap_based_nodes import CardVisualNode
-            return CardVisualNode.WIDTH, CardVisualNode.HEIGHT
-        
-        def layout(node, depth=0, y_offset=0, direction=1):
-            node.x = depth * h_spacing * direction
-            node.y = y_offset
-            _, node_height = get_node_size(node)
-            
-            for i, c in enumerate(node.children):
-                _, child_height = get_node_size(c)
-                spacing = max(v_spacing, child_height + 20)
-                layout(c, depth + 1, y_offset + (i - len(node.children) // 2) * spacing, direction)
-
-        # 左右对称分布
-        left_children = [c for i, c in enumerate(root.children) if i % 2 == 0]
-        right_children = [c for i, c in enumerate(root.children) if i % 2 == 1]
-
-        for c in left_children:
-            layout(c, 1, 0, -1)
-        for c in right_children:
-            layout(c, 1, 0, 1)
+    def fishbone(root, h_spacing=200, v_spacing=100, visual_nodes=None, sizes=None, start=None):
+        """鱼骨图布局（参考 madmap），支持动态节点大小；根节点位置不变，子节点左右对称分布"""
+        get_node_size = _size_getter(visual_nodes, sizes)
+
+        if start is not None and start is not root:
+            # 只重新布局 start 的子树（方向沿用 start 当前所在的一侧）
+            tree, nodes = LayoutTree.from_nodes(start, get_node_size)
+            x, y = layout_core.card_fishbone(tree, h_spacing, v_spacing, (start.x, start.y),
+                                             _node_depth(start), -1 if start.x < 0 else 1)
+        else:
+            tree, nodes = LayoutTree.from_nodes(root, get_node_size)
+            x, y = layout_core.card_fishbone(tree, h_spacing, v_spacing, (root.x, root.y))
+        layout_core.write_positions(nodes, x, y)
+
+    @staticmethod
+    def network(root, h_spacing=200, v_spacing=100, visual_nodes=None, sizes=None, links=None,
+                iterations=200, time_budget=0.3):
+        """
+        网络布局：力导向（Barnes–Hut），同时考虑父子连线和关联线
+        从节点当前位置热启动，根节点位置不变；所有节点都在同一位置时先用思维导图布局作为初始位置
+        Args:
+            links: 关联边 [(起点节点id, 终点节点id)]，None 表示读取各节点的 associative_line_targets
+            iterations: 最大迭代次数
+            time_budget: 最长计算时间（秒）
+        """
+        get_node_size = _size_getter(visual_nodes, sizes)
+        tree, nodes = LayoutTree.from_nodes(root, get_node_size)
+        count = len(nodes)
+
+        x = np.array([node.x for node in nodes], dtype=float)
+        y = np.array([node.y for node in nodes], dtype=float)
+        warm = count > 1 and (np.ptp(x) > 1 or np.ptp(y) > 1)
+        if not warm:
+            x, y = layout_core.card_mind_map(tree, h_spacing, v_spacing, root.y)
+            x += root.x
+
+        # 层级边权重 1，关联边权重 0.5（只拉近，不主导整体结构）
+        edges = [(int(p), i) for i, p in enumerate(tree.parent[1:].tolist(), 1)]
+        weights = [1.0] * len(edges)
+        index_by_id = {node.id: i for i, node in enumerate(nodes)}
+        if links is None:
+            links = [(node.id, target_id) for node in nodes
+                     for target_id in getattr(node, 'associative_line_targets', ())]
+        for from_id, to_id in links:
+            i, j = index_by_id.get(from_id), index_by_id.get(to_id)
+            if i is not None and j is not None and i != j:
+                edges.append((i, j))
+                weights.append(0.5)
+
+        ideal_length = h_spacing + float(np.mean(tree.width))
+        x, y, _ = force_directed_layout(
+            x, y, tree.width, tree.height, edges, weights, ideal_length,
+            iterations=iterations, time_budget=time_budget,
+            temperature=ideal_length * 0.3 if warm else None, pinned=(0,))
+        layout_core.write_positions(nodes, x, y)
+
+    @staticmethod
+    def resolve_overlaps(root, h_spacing=200, v_spacing=120, visual_nodes=None, sizes=None):
+        """
+        重叠消除阶段（扫描线，O(n log n)，保证终止），任何布局之后都可以调用
+        节点之间至少保留 h_spacing / 2、v_spacing / 2 的间距，重叠的节点向下移动
+        """
+        get_node_size = _size_getter(visual_nodes, sizes)
+        resolve_tree_overlaps(root, get_node_size, h_spacing * 0.5, v_spacing * 0.5)
 
     @staticmethod
-    def auto_arrange(root, h_spacing=200, v_spacing=120, visual_nodes=None):
+    def auto_arrange(root, h_spacing=200, v_spacing=120, visual_nodes=None, sizes=None):
         """自动排列避免重叠（参考 madmap），支持动态节点大小"""
-        def get_node_size(node):
-            """获取节点实际大小"""
-            if visual_nodes:
-                for vn in visual_nodes:
-                    if vn.tree_node == node:
-                        width, height = vn.get_actual_size()
-                        return width, height
-            from .madmap_based_nodes import CardVisualNode
-            return CardVisualNode.WIDTH, CardVisualNode.HEIGHT
-        
-        def get_all_nodes(node):
-            """获取所有节点"""
-            nodes = [node]
-            for child in node.children:
-                nodes.extend(get_all_nodes(child))
-            return nodes
-
-        def check_overlap(node1, node2):
-            """检查两个节点是否重叠（使用实际大小）"""
-            w1, h1 = get_node_size(node1)
-            w2, h2 = get_node_size(node2)
-            return (abs(node1.x - node2.x) < (w1 + w2) / 2 + h_spacing * 0.5 and
-                    abs(node1.y - node2.y) < (h1 + h2) / 2 + v_spacing * 0.5)
-
-        def adjust_position(node, all_nodes):
-            """调整节点位置避免重叠"""
-            w, h = get_node_size(node)
-            for other_node in all_nodes:
-                if node != other_node and check_overlap(node, other_node):
-                    # 如果重叠，向右下方移动
-                    node.x += h_spacing * 0.7
-                    node.y += v_spacing * 0.7
-                    # 递归检查是否还会与其他节点重叠
-                    adjust_position(node, all_nodes)
-                    break
+        get_node_size = _size_getter(visual_nodes, sizes)
 
         # 先应用基本布局（使用动态大小）
-        CardLayoutEngine.mind_map(root, h_spacing, v_spacing, visual_nodes)
-
-        # 获取所有节点并检查重叠
-        all_nodes = get_all_nodes(root)
-        for node in all_nodes:
-            adjust_position(node, all_nodes)
+        CardLayoutEngine.mind_map(root, h_spacing, v_spacing, sizes=get_node_size.table)
 
+        # 再消除重叠
+        CardLayoutEngine.resolve_overlaps(root, h_spacing, v_spacing, sizes=get_node_size.table)
@@ -40,6 +40,8 @@ class CardTreeNode:
         # 节点标签
         self.tags = []  # 标签列表
         self.tag_colors = []  # 标签颜色索引列表
+        # 折叠状态（折叠的子树只保留模型数据，不创建图形项）
+        self.collapsed = False
 
     def add_child(self, node):
         node.parent = self
@@ -75,6 +77,7 @@ class CardTreeNode:
             "icon_name": getattr(self, 'icon_name', ""),
             "tags": getattr(self, 'tags', []),
             "tag_colors": getattr(self, 'tag_colors', []),
+            "collapsed": getattr(self, 'collapsed', False),
             "children": [c.to_dict() for c in self.children]
         }
 
@@ -104,6 +107,7 @@ class CardTreeNode:
         node.icon_name = data.get("icon_name", "")
         node.tags = data.get("tags", [])
         node.tag_colors = data.get("tag_colors", [])
+        node.collapsed = data.get("collapsed", False)
         
         for child_data in data.get("children", []):
             child_node = CardTreeNode.from_dict(child_data)
@@ -121,6 +125,24 @@ class CardTreeNode:
                 return found
         return None
 
+    def is_hidden(self):
+        """是否位于某个折叠节点之下（自身折叠不算隐藏）"""
+        ancestor = self.parent
+        while ancestor is not None:
+            if getattr(ancestor, 'collapsed', False):
+                return True
+            ancestor = ancestor.parent
+        return False
+
+    def iter_visible(self):
+        """前序遍历当前节点及其未被折叠隐藏的后代（非递归）"""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            if not getattr(node, 'collapsed', False):
+                stack.extend(reversed(node.children))
+
     def get_siblings(self):
         """获取同级节点"""
         if self.parent is None:
@@ -166,6 +188,7 @@ class CardTreeNode:
         new_node.icon_name = self.icon_name if hasattr(self, 'icon_name') else ""
         new_node.tags = self.tags.copy() if hasattr(self, 'tags') else []
         new_node.tag_colors = self.tag_colors.copy() if hasattr(self, 'tag_colors') else []
+        new_node.collapsed = getattr(self, 'collapsed', False)
 
         for child in self.children:
             new_child = child.duplicate()
@@ -16,6 +16,9 @@ from PyQt6.QtWidgets import QGraphicsPixmapItem
 from .node_shapes import NodeShapeFactory
 from .node_icons import IconManager
 from .node_tags import TagManager
+from .level_of_detail import DETAIL_FULL, apply_detail_level, paint_reduced, sync_children
+from .chrome_cache import apply_cache_mode, paint_chrome
+from .static_text import StaticTextBlock, paint_text_blocks, shared_font
 
 
 class CardEditDialog(QDialog):
@@ -192,6 +195,7 @@ class CardVisualNode(QObject, QGraphicsRectItem):
     WIDTH = 280
     HEIGHT = 180
     HEADER_HEIGHT = 35
+    COLLAPSE_INDICATOR_RADIUS = 8  # 折叠标记（右侧中部的圆形按钮）半径
 
     # 定义信号
     jump_to_source_requested = pyqtSignal(object)  # 请求跳转到源文本
@@ -203,11 +207,13 @@ class CardVisualNode(QObject, QGraphicsRectItem):
         QObject.__init__(self)
         QGraphicsRectItem.__init__(self, 0, 0, self.WIDTH, self.HEIGHT)
         self.tree_node = tree_node
+        self.detail_level = DETAIL_FULL  # 细节层次（视图缩小时由场景切换）
         self.setPos(tree_node.x, tree_node.y)
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsMovable)
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges)
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsSelectable)
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsFocusable)
+        apply_cache_mode(self)
 
         # 根据层级设置不同样式
         self.setup_style()
@@ -249,6 +255,8 @@ class CardVisualNode(QObject, QGraphicsRectItem):
 
         self.setBrush(QBrush(gradient))
         self.setPen(QPen(border_color, border_width))
+        # 渐变填充的缓存键（渐变画刷本身不能直接比较）
+        self._fill_key = fill_color.rgba()
         
         # 获取节点形状（如果已设置）
         shape_type = getattr(self.tree_node, 'shape', 'rectangle')
@@ -269,39 +277,31 @@ class CardVisualNode(QObject, QGraphicsRectItem):
         return level_colors[min(self.tree_node.level, len(level_colors) - 1)]
 
     def create_text_items(self):
-        """创建文本显示项（标题、问题、答案）"""
+        """创建文本显示项（标题、问题、答案在 paint 中绘制为静态文本，笔记图标为子项）"""
         text_color = self.get_text_color()
         
         # 标题文本
-        self.title_item = QGraphicsTextItem(self)
-        self.title_item.setPlainText(self._truncate_text(self.tree_node.title, 30))
-        self.title_item.setFont(QFont("Microsoft YaHei", 12, QFont.Weight.Bold))
-        self.title_item.setDefaultTextColor(text_color)
-        self.title_item.setTextWidth(self.WIDTH - 20)
-        self.title_item.setPos(10, 5)
+        self.title_item = StaticTextBlock(
+            self, self._truncate_text(self.tree_node.title, 30),
+            shared_font("Microsoft YaHei", 12, QFont.Weight.Bold), text_color, 10, 5, self.WIDTH - 20)
         
         # 问题文本（如果有）
         if self.tree_node.question:
-            self.question_item = QGraphicsTextItem(self)
-            self.question_item.setPlainText(self._truncate_text(self.tree_node.question, 50))
-            self.question_item.setFont(QFont("Microsoft YaHei", 9))
-            self.question_item.setDefaultTextColor(text_color)
-            self.question_item.setTextWidth(self.WIDTH - 20)
-            self.question_item.setPos(10, self.HEADER_HEIGHT)
+            self.question_item = StaticTextBlock(
+                self, self._truncate_text(self.tree_node.question, 50),
+                shared_font("Microsoft YaHei", 9), text_color, 10, self.HEADER_HEIGHT, self.WIDTH - 20)
         else:
             self.question_item = None
         
         # 答案文本（如果有）
         if self.tree_node.answer:
             answer_y = self.HEADER_HEIGHT + (30 if self.question_item else 0)
-            self.answer_item = QGraphicsTextItem(self)
-            self.answer_item.setPlainText(self._truncate_text(self.tree_node.answer, 80))
-            self.answer_item.setFont(QFont("Microsoft YaHei", 9))
-            self.answer_item.setDefaultTextColor(text_color)
-            self.answer_item.setTextWidth(self.WIDTH - 20)
-            self.answer_item.setPos(10, answer_y)
+            self.answer_item = StaticTextBlock(
+                self, self._truncate_text(self.tree_node.answer, 80),
+                shared_font("Microsoft YaHei", 9), text_color, 10, answer_y, self.WIDTH - 20)
         else:
             self.answer_item = None
+        self.update()
         
         # 笔记图标（如果有笔记）
         if self.tree_node.note_text:
@@ -320,6 +320,7 @@ class CardVisualNode(QObject, QGraphicsRectItem):
                 if self.scene():
                     self.scene().removeItem(self.note_indicator)
                 self.note_indicator = None
+        sync_children(self)
 
     def _truncate_text(self, text, max_length):
         """截断文本"""
@@ -333,6 +334,9 @@ class CardVisualNode(QObject, QGraphicsRectItem):
             self.tree_node.x = self.pos().x()
             self.tree_node.y = self.pos().y()
             if self.scene():
+                # 与本节点相连的连线需要重新计算路径
+                if hasattr(self.scene(), 'mark_connections_dirty'):
+                    self.scene().mark_connections_dirty(self)
                 self.scene().update()
         # 多重继承时，明确调用 QGraphicsRectItem 的 itemChange
         return QGraphicsRectItem.itemChange(self, change, value)
@@ -380,6 +384,12 @@ class CardVisualNode(QObject, QGraphicsRectItem):
         
         return (width, height)
     
+    def invalidate_size(self):
+        """通知场景节点大小可能改变（布局时重新计算 get_actual_size）"""
+        scene = self.scene()
+        if scene and hasattr(scene, 'invalidate_node_size'):
+            scene.invalidate_node_size(self)
+
     def get_bounding_rect(self):
         """获取节点的边界矩形（考虑所有内容）"""
         width, height = self.get_actual_size()
@@ -419,6 +429,13 @@ class CardVisualNode(QObject, QGraphicsRectItem):
                     return
         
         if event.button() == Qt.MouseButton.LeftButton:
+            # 点击折叠标记：折叠 / 展开子树
+            indicator = self.collapse_indicator_rect()
+            if indicator is not None and self.detail_level == DETAIL_FULL and \
+                    indicator.contains(event.pos()):
+                self.toggle_collapse()
+                event.accept()
+                return
             # 左键点击：优先跳转到笔记，如果没有笔记则跳转到源文本
             if self.tree_node.note_text:
                 # 如果有笔记，跳转到笔记
@@ -502,7 +519,13 @@ class CardVisualNode(QObject, QGraphicsRectItem):
             # 更新标签
             self.add_tags(self.tree_node.tags, self.tree_node.tag_colors)
             
+            # 内容/形状/图片/标签可能改变节点大小
+            self.invalidate_size()
+
             if self.scene():
+                # 形状/图片/标签可能改变节点大小，连线需要重新计算
+                if hasattr(self.scene(), 'mark_connections_dirty'):
+                    self.scene().mark_connections_dirty(self)
                 self.scene().update()
     
     def add_image(self, image_path, placement='top'):
@@ -547,6 +570,8 @@ class CardVisualNode(QObject, QGraphicsRectItem):
         
         # 更新文本位置以适应图片
         self._adjust_text_for_image(placement)
+        sync_children(self)
+        self.invalidate_size()
     
     def _adjust_text_for_image(self, placement):
         """调整文本位置以适应图片"""
@@ -576,12 +601,62 @@ class CardVisualNode(QObject, QGraphicsRectItem):
                 answer_y = self.HEADER_HEIGHT + (30 if self.question_item else 0)
                 self.answer_item.setPos(offset_x, answer_y)
     
+    def set_detail_level(self, level):
+        """切换细节层次（视图缩小时只画单色矩形 + 标题或一个点，文本、图标、图片、标签隐藏）"""
+        apply_detail_level(self, level)
+
     def paint(self, painter, option, widget):
         """重写 paint 方法以支持不同形状"""
+        if self.detail_level != DETAIL_FULL:
+            paint_reduced(painter, self, self.rect(), self.pen().color(), self.tree_node.title)
+            return
+
+        # 外观（形状、填充、边框、选中框）按样式共享缓存位图
+        rect = self.rect()
+        shape_type = getattr(self, 'shape_type', 'rectangle')
+        pen = self.pen()
+        key = ('card_visual_node', shape_type, rect.width(), rect.height(), self.isSelected(),
+               pen.color().rgba(), pen.widthF(), getattr(self, '_fill_key', None))
+        paint_chrome(painter, key, self.boundingRect(),
+                     lambda chrome_painter: self._paint_chrome(chrome_painter, option, widget, shape_type))
+
+        # 文本（排版结果缓存在文本块中，文本或宽度改变时才重新排版）
+        paint_text_blocks(painter, (self.title_item, self.question_item, self.answer_item))
+
+        # 折叠标记：折叠时显示隐藏的子节点数，展开时显示"−"
+        indicator = self.collapse_indicator_rect()
+        if indicator is not None:
+            collapsed = getattr(self.tree_node, 'collapsed', False)
+            color = self.pen().color()
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setPen(QPen(color, 1.5))
+            painter.setBrush(QBrush(color if collapsed else QColor(255, 255, 255)))
+            painter.drawEllipse(indicator)
+            count = len(self.tree_node.children)
+            painter.setPen(QColor(255, 255, 255) if collapsed else color)
+            painter.setFont(shared_font("Microsoft YaHei", 7, QFont.Weight.Bold))
+            painter.drawText(indicator, Qt.AlignmentFlag.AlignCenter,
+                             ("99+" if count > 99 else str(count)) if collapsed else "−")
+
+    def collapse_indicator_rect(self):
+        """折叠标记的位置（没有子节点时返回 None）"""
+        if not self.tree_node.children:
+            return None
+        rect = self.rect()
+        radius = self.COLLAPSE_INDICATOR_RADIUS
+        return QRectF(rect.right() - 2 * radius - 4, rect.center().y() - radius, 2 * radius, 2 * radius)
+
+    def toggle_collapse(self):
+        """折叠 / 展开子树"""
+        scene = self.scene()
+        if scene and hasattr(scene, 'toggle_collapse'):
+            scene.toggle_collapse(self.tree_node)
+
+    def _paint_chrome(self, painter, option, widget, shape_type):
+        """按形状绘制节点外观（不含文本），结果由 chrome_cache 缓存"""
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
         rect = self.rect()
-        shape_type = getattr(self, 'shape_type', 'rectangle')
         
         if shape_type == 'rectangle':
             # 默认矩形，使用父类绘制
@@ -651,6 +726,7 @@ class CardVisualNode(QObject, QGraphicsRectItem):
         # 调整标题位置（为图标留出空间）
         if self.title_item:
             self.title_item.setPos(40, 5)
+        sync_children(self)
     
     def add_tags(self, tags, tag_colors=None):
         """添加标签到节点"""
@@ -659,6 +735,7 @@ class CardVisualNode(QObject, QGraphicsRectItem):
             if self.scene():
                 self.scene().removeItem(tag_item)
         self.tag_items.clear()
+        self.invalidate_size()
         
         if not tags:
             return
@@ -683,6 +760,7 @@ class CardVisualNode(QObject, QGraphicsRectItem):
             if tag_x + tag_item.boundingRect().width() > self.WIDTH - 10:
                 tag_x = 10
                 tag_y += 25
+        sync_children(self)
 
     def keyPressEvent(self, event):
         """键盘事件处理（参考 madmap）"""
@@ -698,11 +776,20 @@ class CardVisualNode(QObject, QGraphicsRectItem):
             # Delete键 - 删除节点
             self.delete_node()
             event.accept()
+        elif event.key() == Qt.Key.Key_Space:
+            # 空格键 - 折叠 / 展开子树
+            self.toggle_collapse()
+            event.accept()
         else:
             QGraphicsRectItem.keyPressEvent(self, event)
 
     def add_child_node(self):
         """添加子节点（参考 madmap）"""
+        # 折叠的节点先展开，新子节点才可见
+        if getattr(self.tree_node, 'collapsed', False) and self.scene() and \
+                hasattr(self.scene(), 'expand_node'):
+            self.scene().expand_node(self.tree_node, relayout=False)
+
         child_node = CardTreeNode("新子节点", "问题内容", "答案内容")
         self.tree_node.add_child(child_node)
 
@@ -730,11 +817,10 @@ class CardVisualNode(QObject, QGraphicsRectItem):
             prev_child = self.tree_node.children[-2]  # 倒数第二个（新添加的是最后一个）
             # 尝试从场景中获取前一个子节点的 visual_node
             prev_child_w, prev_child_h = CardVisualNode.WIDTH, CardVisualNode.HEIGHT
-            if self.scene() and hasattr(self.scene(), 'visual_nodes'):
-                for vn in self.scene().visual_nodes:
-                    if vn.tree_node == prev_child:
-                        prev_child_w, prev_child_h = vn.get_actual_size()
-                        break
+            if self.scene() and hasattr(self.scene(), 'find_node_by_tree_node'):
+                vn = self.scene().find_node_by_tree_node(prev_child)
+                if vn:
+                    prev_child_w, prev_child_h = vn.get_actual_size()
             new_y = prev_child.y + prev_child_h + v_spacing
 
         child_node.x = new_x
@@ -744,8 +830,10 @@ class CardVisualNode(QObject, QGraphicsRectItem):
         if self.scene():
             visual_child = CardVisualNode(child_node)
             self.scene().add_visual_node(visual_child)
-            # 应用布局（重新计算所有节点位置，确保正确）
-            if hasattr(self.scene(), 'apply_layout'):
+            # 只重新布局当前节点的子树
+            if hasattr(self.scene(), 'relayout_subtree'):
+                self.scene().relayout_subtree(self.tree_node)
+            elif hasattr(self.scene(), 'apply_layout'):
                 self.scene().apply_layout()
             self.scene().update()
 
@@ -772,8 +860,10 @@ class CardVisualNode(QObject, QGraphicsRectItem):
             if self.scene():
                 visual_sibling = CardVisualNode(sibling_node)
                 self.scene().add_visual_node(visual_sibling)
-                # 应用布局
-                if hasattr(self.scene(), 'apply_layout'):
+                # 只重新布局父节点的子树
+                if hasattr(self.scene(), 'relayout_subtree'):
+                    self.scene().relayout_subtree(self.tree_node.parent)
+                elif hasattr(self.scene(), 'apply_layout'):
                     self.scene().apply_layout()
                 self.scene().update()
 
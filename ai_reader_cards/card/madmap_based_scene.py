@@ -3,15 +3,24 @@
 参考 test/madmap/scene.py
 """
 
+import functools
+
 from PyQt6.QtWidgets import QGraphicsScene
-from PyQt6.QtCore import QRectF, Qt, QPointF, pyqtSignal
+from PyQt6.QtCore import QRectF, Qt, QPointF, pyqtSignal, QTimer
 from PyQt6.QtGui import QPainter, QPen, QColor
 
 from .madmap_based_connections import CardConnectionManager
 from .madmap_based_nodes import CardVisualNode
 from .madmap_based_models import CardTreeNode
 from .madmap_based_layout import CardLayoutEngine
+from .node_size_cache import NodeSizeCache
 from .associative_line_manager import AssociativeLineManager
+from .connection_cache import ConnectionPathCache
+from .overlap_resolver import iter_tree
+from .layout_service import LayoutService, TreeSnapshot, compute_card_layout
+from .layout_cache import LayoutResultCache
+from .level_of_detail import DETAIL_FULL, detail_level_for_scale
+from .scene_bounds import SceneBounds
 
 
 class CardMindMapScene(QGraphicsScene):
@@ -25,15 +34,39 @@ class CardMindMapScene(QGraphicsScene):
     jump_to_source_requested = pyqtSignal(object)  # 请求跳转到源文本
     jump_to_note_requested = pyqtSignal(object)  # 请求跳转到笔记
     jump_to_card_requested = pyqtSignal(str)  # 请求跳转到卡片（通过卡片ID）
+
+    MAX_VISIBLE_ON_LOAD = 2000  # 加载大纲时最多展开的节点数（见 collapse_to_fit）
     
     def __init__(self):
-        super().__init__(-2000, -2000, 4000, 4000)
+        super().__init__()
+        # 场景矩形随节点范围伸缩（批量更新），BSP 深度按图形项数量设置
+        self.scene_bounds = SceneBounds(self, lambda: len(self.visual_nodes))
         self.visual_nodes = []
+        self._visual_by_tree_node = {}  # tree_node -> 可视化节点
+        self._visual_by_id = {}  # 节点id -> 可视化节点
         self.connection_manager = CardConnectionManager()
         self.connection_style = "bezier"  # 默认连线样式
         self.layout_engine = CardLayoutEngine()
         self.current_layout_type = "mind_map"  # 当前布局类型
+        self.resolve_overlaps_after_layout = False  # 布局后是否追加重叠消除阶段（auto_arrange 自带）
         self.associative_line_manager = AssociativeLineManager(self)  # 关联线管理器
+        self.connection_cache = ConnectionPathCache()  # 连线路径缓存
+        self.node_sizes = NodeSizeCache()  # 节点实际大小缓存（布局时查表）
+
+        # 延迟的增量布局请求（连续生成多张卡片时合并为一次布局）
+        self._pending_relayout = {}  # id(tree_node) -> tree_node；None 表示整体布局
+        self._relayout_timer = QTimer()
+        self._relayout_timer.setSingleShot(True)
+        self._relayout_timer.timeout.connect(self.flush_pending_relayout)
+
+        # 后台布局（大图在工作线程中计算，完成后一次性应用）
+        self.layout_service = LayoutService(self)
+        self.layout_cache = LayoutResultCache()  # 布局结果缓存（树没有改变时切换布局直接取结果）
+        layout_service = self.layout_service
+        self.destroyed.connect(lambda: layout_service.shutdown())  # 场景销毁时关闭工作线程
+
+        # 细节层次（视图缩小时节点简化绘制，见 set_view_scale）
+        self.detail_level = DETAIL_FULL
 
         # 复制粘贴相关
         self.copied_nodes = []
@@ -42,30 +75,215 @@ class CardMindMapScene(QGraphicsScene):
         self.is_creating_associative_line = False
         self.associative_line_start_node = None
 
-    def add_visual_node(self, visual_node: CardVisualNode):
-        """添加可视化节点"""
+    def add_visual_node(self, visual_node: CardVisualNode, render_lines=True):
+        """
+        添加可视化节点
+        Args:
+            render_lines: 是否立即重建关联线（批量添加时由调用方最后统一重建一次）
+        """
         self.addItem(visual_node)
         self.visual_nodes.append(visual_node)
+        self._index_visual_node(visual_node)
+        self.connection_cache.mark_topology_dirty()
+        self.scene_bounds.schedule()
+        if self.detail_level != DETAIL_FULL:
+            visual_node.set_detail_level(self.detail_level)
         
         # 连接信号
         visual_node.jump_to_source_requested.connect(self._on_jump_to_source_requested)
         visual_node.jump_to_note_requested.connect(self._on_jump_to_note_requested)
         
         # 渲染关联线（如果节点有关联线数据）
-        self.associative_line_manager.render_all_lines()
+        if render_lines:
+            self.associative_line_manager.render_all_lines()
+
+    # ========== 折叠 / 展开（折叠的子树只保留模型数据，展开时才创建图形项） ==========
+
+    def materialize_tree(self, tree_node):
+        """
+        为 tree_node 及其未折叠的后代创建可视化节点（已有的跳过），关联线最后统一重建一次
+        折叠节点下的子树不创建任何图形项、连线或关联线
+        Returns:
+            新创建的可视化节点列表
+        """
+        created = []
+        for node in tree_node.iter_visible():
+            if node not in self._visual_by_tree_node:
+                visual_node = CardVisualNode(node)
+                self.add_visual_node(visual_node, render_lines=False)
+                created.append(visual_node)
+        if created:
+            self.associative_line_manager.render_all_lines()
+        return created
+
+    def _dematerialize(self, tree_nodes):
+        """移除这些树节点的可视化节点（及其连线、关联线），模型数据保留"""
+        removed = [vn for vn in map(self._visual_by_tree_node.get, tree_nodes) if vn]
+        if not removed:
+            return
+        self.associative_line_manager.detach_lines_for_nodes(removed)
+        removed_set = set(removed)
+        self.visual_nodes[:] = [vn for vn in self.visual_nodes if vn not in removed_set]
+        for vn in removed:
+            self._unindex_visual_node(vn)
+            self.connection_cache.discard_node(vn.tree_node.id)
+            self.node_sizes.discard(vn.tree_node)
+            self.removeItem(vn)
+        self.connection_cache.mark_topology_dirty()
+        self.scene_bounds.schedule()
+
+    def collapse_node(self, tree_node, relayout=True):
+        """折叠节点：删除后代的图形项，子树数据保留在模型中"""
+        if getattr(tree_node, 'collapsed', False) or not tree_node.children:
+            return
+        hidden = [node for child in tree_node.children for node in child.iter_visible()]
+        tree_node.collapsed = True
+        self._dematerialize(hidden)
+        self._after_collapse_change(tree_node, relayout)
+
+    def expand_node(self, tree_node, relayout=True):
+        """展开节点：为（未被其它折叠节点隐藏的）后代创建图形项"""
+        if not getattr(tree_node, 'collapsed', False):
+            return
+        tree_node.collapsed = False
+        if tree_node in self._visual_by_tree_node:
+            self.materialize_tree(tree_node)
+        self._after_collapse_change(tree_node, relayout)
+
+    def toggle_collapse(self, tree_node):
+        """切换折叠状态"""
+        if getattr(tree_node, 'collapsed', False):
+            self.expand_node(tree_node)
+        else:
+            self.collapse_node(tree_node)
+
+    def expand_all(self):
+        """展开全部节点（大树会创建全部图形项）"""
+        root_node = self.get_root_node()
+        if not root_node:
+            return
+        stack = [root_node]
+        while stack:
+            node = stack.pop()
+            node.collapsed = False
+            stack.extend(node.children)
+        self.materialize_tree(root_node)
+        self.apply_layout()
+
+    def reveal_node(self, node_id):
+        """展开目标节点的所有折叠祖先，使其可见；返回其可视化节点（找不到时返回 None）"""
+        visual_node = self._visual_by_id.get(node_id)
+        if visual_node:
+            return visual_node
+        root_node = self.get_root_node()
+        target = root_node.find_node_by_id(node_id) if root_node else None
+        if target is None:
+            return None
+        ancestors = []
+        ancestor = target.parent
+        while ancestor is not None:
+            ancestors.append(ancestor)
+            ancestor = ancestor.parent
+        for ancestor in reversed(ancestors):
+            ancestor.collapsed = False
+        self.materialize_tree(root_node)
+        self.apply_layout()
+        return self._visual_by_id.get(node_id)
+
+    @staticmethod
+    def collapse_to_fit(root_node, max_visible):
+        """
+        大纲节点过多时，从某一层开始折叠，使可见节点不超过 max_visible（根节点的子节点总是可见）
+        只修改模型的 collapsed 标记，调用方随后 materialize_tree
+        Returns:
+            被折叠的节点数
+        """
+        level_nodes = [root_node]
+        visible = 1
+        depth = 0
+        while level_nodes:
+            next_level = [child for node in level_nodes if not node.collapsed for child in node.children]
+            if depth > 0 and visible + len(next_level) > max_visible:
+                collapsed = 0
+                for node in level_nodes:
+                    if node.children and not node.collapsed:
+                        node.collapsed = True
+                        collapsed += 1
+                return collapsed
+            visible += len(next_level)
+            level_nodes = next_level
+            depth += 1
+        return 0
+
+    def _after_collapse_change(self, tree_node, relayout):
+        """折叠状态改变后：重绘折叠标记，子树大小改变，整体重新布局"""
+        visual_node = self._visual_by_tree_node.get(tree_node)
+        if visual_node:
+            visual_node.update()
+        if relayout:
+            self.apply_layout()
+        self.update()
+
+    def _index_visual_node(self, visual_node):
+        """登记节点到查找索引"""
+        self._visual_by_tree_node[visual_node.tree_node] = visual_node
+        self._visual_by_id[visual_node.tree_node.id] = visual_node
+
+    def _unindex_visual_node(self, visual_node):
+        """从查找索引中移除节点"""
+        tree_node = visual_node.tree_node
+        if self._visual_by_tree_node.get(tree_node) is visual_node:
+            del self._visual_by_tree_node[tree_node]
+        if self._visual_by_id.get(tree_node.id) is visual_node:
+            del self._visual_by_id[tree_node.id]
+
+    def clear_visual_nodes(self):
+        """清空可视化节点列表和索引（调用方负责 scene.clear()）"""
+        self.visual_nodes.clear()
+        self._visual_by_tree_node.clear()
+        self._visual_by_id.clear()
+        self.connection_cache.clear()
+        self.node_sizes.clear()
+        # 关联线图形项已随 scene.clear() 删除，只清空登记
+        self.associative_line_manager.reset()
+
+    def set_view_scale(self, scale, interactive=False):
+        """
+        视图缩放改变时调用：缩放跨过阈值时切换所有节点的细节层次
+        （缩小后节点只画单色矩形 + 标题或一个点，文本、图标、图片、标签隐藏）
+        Args:
+            interactive: 视图正在平移 / 缩放（按更低的缩放取细节层次，结束后视图再以 False 调用）
+        """
+        level = detail_level_for_scale(scale, interactive)
+        if level == self.detail_level:
+            return
+        self.detail_level = level
+        for vn in self.visual_nodes:
+            vn.set_detail_level(level)
+
+    def find_node_by_tree_node(self, tree_node):
+        """根据 tree_node 查找可视化节点"""
+        return self._visual_by_tree_node.get(tree_node)
 
     def set_connection_style(self, style):
         """设置连线样式"""
         self.connection_style = style
+        self.connection_cache.clear()
         self.update()
 
     def set_layout_type(self, layout_type):
         """设置布局类型"""
         self.current_layout_type = layout_type
+        self.connection_cache.mark_topology_dirty()
         # 不自动应用布局，需要手动调用 apply_layout()
 
     def apply_layout(self):
         """应用布局算法（参考 madmap 的 apply_layout），支持动态节点大小"""
+        # 整体布局覆盖所有尚未执行的增量布局请求和后台布局
+        self._pending_relayout.clear()
+        self._relayout_timer.stop()
+        self.layout_service.cancel()
+
         root_node = self.get_root_node()
         if not root_node:
             return
@@ -73,14 +291,103 @@ class CardMindMapScene(QGraphicsScene):
         # 应用布局，传入 visual_nodes 以支持动态大小
         layout_func = getattr(self.layout_engine, self.current_layout_type, None)
         if layout_func:
-            # 传递 visual_nodes 参数以支持动态节点大小计算
-            if self.current_layout_type in ['mind_map', 'logical', 'timeline', 'fishbone', 'auto_arrange']:
-                layout_func(root_node, visual_nodes=self.visual_nodes)
+            # 传递节点大小表以支持动态节点大小计算（大小跨布局缓存，内容改变时失效）
+            sizes = self.node_sizes.table(self.visual_nodes)
+            if self.current_layout_type in ['mind_map', 'logical', 'timeline', 'fishbone', 'auto_arrange', 'network']:
+                layout_func(root_node, sizes=sizes)
             else:
                 layout_func(root_node)
+            if self.resolve_overlaps_after_layout and self.current_layout_type != 'auto_arrange':
+                self.layout_engine.resolve_overlaps(root_node, sizes=sizes)
             self.refresh_positions()
             self.update()
 
+    def _layout_snapshot(self, root_node):
+        """当前树的不可变快照（结构 + 节点大小）"""
+        return TreeSnapshot.from_tree_nodes(
+            root_node, self.node_sizes.table(self.visual_nodes),
+            (CardVisualNode.WIDTH, CardVisualNode.HEIGHT))
+
+    def apply_layout_async(self, on_applied=None, on_failed=None):
+        """
+        在工作线程中计算布局，完成后在 GUI 线程一次性应用
+        计算期间树被修改（增删节点、大小改变）时丢弃结果并重新计算
+        Args:
+            on_applied: 布局结果应用到节点后调用（被更新的请求取代时不调用）
+            on_failed: on_failed(异常)，后台计算失败时调用（节点保持原位置）
+        """
+        root_node = self.get_root_node()
+        layout_name = self.current_layout_type
+        if not root_node or not hasattr(self.layout_engine, layout_name):
+            return
+        if layout_name not in ['mind_map', 'logical', 'timeline', 'fishbone', 'auto_arrange']:
+            # 不需要节点大小的布局、从当前位置热启动的 network 布局（有时间预算）直接同步执行
+            self.apply_layout()
+            if on_applied:
+                on_applied()
+            return
+
+        # 整体布局覆盖所有尚未执行的增量布局请求
+        self._pending_relayout.clear()
+        self._relayout_timer.stop()
+
+        snapshot = self._layout_snapshot(root_node)
+        params = (layout_name, self.resolve_overlaps_after_layout)
+
+        # 树没有改变时直接使用缓存的布局结果
+        positions = self.layout_cache.lookup(snapshot, params)
+        if positions is not None:
+            self.layout_service.cancel()
+            self._apply_layout_positions(positions)
+            if on_applied:
+                on_applied()
+            return
+
+        # 未改变的分支复用缓存的相对偏移
+        branch_offsets = None
+        if self._caches_branches(params):
+            branch_offsets = self.layout_cache.branch_offsets(snapshot, params)
+
+        compute = functools.partial(compute_card_layout, layout_name=layout_name,
+                                    resolve_overlaps=self.resolve_overlaps_after_layout,
+                                    branch_offsets=branch_offsets)
+        self.layout_service.submit(
+            snapshot, compute,
+            lambda snap, positions: self._on_async_layout_ready(snap, positions, params, on_applied, on_failed),
+            on_failed)
+
+    @staticmethod
+    def _caches_branches(params):
+        """子树布局与位置无关（且没有全局的重叠消除阶段）时才按分支缓存偏移"""
+        layout_name, resolve_overlaps = params
+        return layout_name in CardLayoutEngine.SUBTREE_INVARIANT_LAYOUTS and not resolve_overlaps
+
+    def _on_async_layout_ready(self, snapshot, positions, params, on_applied=None, on_failed=None):
+        """应用后台布局结果（GUI 线程）；结果过期时返回 False"""
+        root_node = self.get_root_node()
+        if not root_node or params != (self.current_layout_type, self.resolve_overlaps_after_layout):
+            return False
+        if self._layout_snapshot(root_node) != snapshot:
+            # 计算期间树已改变，结果作废，按当前树重新计算
+            self.apply_layout_async(on_applied, on_failed)
+            return False
+
+        self.layout_cache.store(snapshot, params, positions, self._caches_branches(params))
+        self._apply_layout_positions(positions)
+        if on_applied:
+            on_applied()
+        return True
+
+    def _apply_layout_positions(self, positions):
+        """把 {节点id: (x, y)} 应用到节点（只移动坐标改变的节点）"""
+        for node_id, (x, y) in positions.items():
+            vn = self._visual_by_id.get(node_id)
+            if vn:
+                vn.tree_node.x = x
+                vn.tree_node.y = y
+        self.refresh_positions()
+        self.update()
+
     def get_root_node(self):
         """获取根节点"""
         for vn in self.visual_nodes:
@@ -90,12 +397,76 @@ class CardMindMapScene(QGraphicsScene):
             return self.visual_nodes[0].tree_node
         return None
 
+    def relayout_subtree(self, tree_node):
+        """
+        增量布局：只重新布局 tree_node 的子树（插入或删除子节点后，传入其父节点）
+        其它节点位置不受影响；不支持增量的布局退回 apply_layout()
+        """
+        root_node = self.get_root_node()
+        if (tree_node is None or root_node is None or
+                self.resolve_overlaps_after_layout or
+                self.current_layout_type not in CardLayoutEngine.INCREMENTAL_LAYOUTS):
+            self.apply_layout()
+            return
+
+        subtree = list(iter_tree(tree_node))
+        subtree_nodes = [vn for vn in map(self._visual_by_tree_node.get, subtree) if vn]
+
+        layout_func = getattr(self.layout_engine, self.current_layout_type)
+        layout_func(root_node, sizes=self.node_sizes.table(subtree_nodes), start=tree_node)
+        self._apply_positions(subtree_nodes)
+        self.update()
+
+    def schedule_relayout(self, tree_node):
+        """
+        记录增量布局请求，在事件循环空闲时统一执行
+        同一轮事件中连续插入的多张卡片只布局一次；tree_node 为 None 表示整体布局
+        """
+        key = None if tree_node is None else id(tree_node)
+        self._pending_relayout[key] = tree_node
+        if not self._relayout_timer.isActive():
+            self._relayout_timer.start(0)
+
+    def flush_pending_relayout(self):
+        """立即执行记录的布局请求（需要马上拿到新位置时调用）"""
+        self._relayout_timer.stop()
+        pending = self._pending_relayout
+        self._pending_relayout = {}
+        if not pending:
+            return
+
+        if None in pending:
+            self.apply_layout()
+            return
+
+        # 祖先节点也在等待布局时，该节点的子树会随祖先一起重新布局
+        for tree_node in pending.values():
+            ancestor = tree_node.parent
+            while ancestor is not None and id(ancestor) not in pending:
+                ancestor = ancestor.parent
+            if ancestor is None:
+                self.relayout_subtree(tree_node)
+
     def refresh_positions(self):
         """刷新节点位置"""
-        for vn in self.visual_nodes:
-            vn.setPos(vn.tree_node.x, vn.tree_node.y)
-        # 更新关联线位置
-        self.associative_line_manager.update_all_lines()
+        self._apply_positions(self.visual_nodes)
+
+    def _apply_positions(self, visual_nodes):
+        """
+        把 tree_node 的坐标同步到可视化节点，只移动坐标实际改变的节点
+        （移动的节点在 itemChange 中更新自己的连线和关联线）
+        """
+        moves = []
+        for vn in visual_nodes:
+            x, y = vn.tree_node.x, vn.tree_node.y
+            pos = vn.pos()
+            if pos.x() != x or pos.y() != y:
+                moves.append((vn, x, y))
+        # 移动的节点多时期间不维护 BSP 索引，结束后重建并统一更新场景矩形
+        with self.scene_bounds.bulk_moves(len(moves)):
+            for vn, x, y in moves:
+                vn.setPos(x, y)
+        return len(moves)
 
     def keyPressEvent(self, event):
         """处理键盘事件（参考 madmap）"""
@@ -118,6 +489,14 @@ class CardMindMapScene(QGraphicsScene):
             self.delete_selected_nodes()
             event.accept()
             return
+        elif event.key() == Qt.Key.Key_Space:
+            # 空格 折叠 / 展开选中节点
+            selected_nodes = [item for item in self.selectedItems() if isinstance(item, CardVisualNode)]
+            if selected_nodes:
+                for node in selected_nodes:
+                    self.toggle_collapse(node.tree_node)
+                event.accept()
+                return
         elif event.modifiers() & Qt.KeyboardModifier.ControlModifier:
             if event.key() == Qt.Key.Key_A:
                 # Ctrl+A 全选
@@ -167,18 +546,8 @@ class CardMindMapScene(QGraphicsScene):
             copied_node.x += paste_offset
             copied_node.y += paste_offset
 
-            # 添加到场景
-            visual_node = CardVisualNode(copied_node)
-            self.add_visual_node(visual_node)
-
-            # 递归添加子节点
-            def add_children(parent_node, parent_visual):
-                for child in parent_node.children:
-                    child_visual = CardVisualNode(child)
-                    self.add_visual_node(child_visual)
-                    add_children(child, child_visual)
-
-            add_children(copied_node, visual_node)
+            # 添加到场景（复制的子树中折叠的分支不创建图形项）
+            self.materialize_tree(copied_node)
 
         self.update()
         print(f"已粘贴 {len(self.copied_nodes)} 个节点")
@@ -195,10 +564,13 @@ class CardMindMapScene(QGraphicsScene):
             # 递归删除所有子节点
             def remove_children(tree_node):
                 for child in tree_node.children[:]:  # 使用副本遍历
-                    child_vn = next((v for v in self.visual_nodes if v.tree_node == child), None)
+                    child_vn = self._visual_by_tree_node.get(child)
                     if child_vn:
                         remove_children(child)
                         self.visual_nodes.remove(child_vn)
+                        self._unindex_visual_node(child_vn)
+                        self.connection_cache.discard_node(child.id)
+                        self.node_sizes.discard(child)
                         self.removeItem(child_vn)
 
             # 从父节点中移除
@@ -208,7 +580,11 @@ class CardMindMapScene(QGraphicsScene):
             # 删除节点及其子树
             remove_children(node.tree_node)
             self.visual_nodes.remove(node)
+            self._unindex_visual_node(node)
+            self.connection_cache.discard_node(node.tree_node.id)
+            self.node_sizes.discard(node.tree_node)
             self.removeItem(node)
+            self.scene_bounds.schedule()
 
             self.update()
             print(f"已删除节点: {node.tree_node.title}")
@@ -217,25 +593,48 @@ class CardMindMapScene(QGraphicsScene):
         """绘制专业连线（参考 madmap）"""
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
 
-        # 绘制永久连线
-        connections = []
+        # 父子关系改变后重新同步连线（连线对象被缓存，只有端点节点移动后才重新计算路径）
+        if self.connection_cache.topology_dirty:
+            self.connection_cache.sync(
+                self._iter_connection_edges(),
+                self.connection_style, self.current_layout_type,
+                self._create_connection
+            )
+
+        # 只绘制包围盒与暴露区域相交的永久连线
+        for connection in self.connection_cache.visible(rect):
+            connection.draw(painter)
+
+        # 关联线由 AssociativeLineItem 自己绘制，路径在节点移动时更新（见 mark_connections_dirty）
+
+    def _iter_connection_edges(self):
+        """遍历所有父子连线 (父节点, 子节点, 父id, 子id)"""
         for vn in self.visual_nodes:
             node = vn.tree_node
             for child in node.children:
-                child_vn = next((v for v in self.visual_nodes if v.tree_node == child), None)
+                child_vn = self._visual_by_tree_node.get(child)
                 if child_vn:
-                    connection = self.connection_manager.create_connection(
-                        vn, child_vn, self.connection_style
-                    )
-                    connection.update_path()
-                    connections.append(connection)
-
-        # 绘制所有永久连线
-        for connection in connections:
-            connection.draw(painter)
-        
-        # 更新关联线（关联线由 AssociativeLineItem 自己绘制）
-        self.associative_line_manager.update_all_lines()
+                    yield vn, child_vn, node.id, child.id
+
+    def _create_connection(self, parent_vn, child_vn):
+        """创建连线对象（供连线缓存使用）"""
+        return self.connection_manager.create_connection(
+            parent_vn, child_vn, self.connection_style
+        )
+
+    def mark_connections_dirty(self, visual_node):
+        """节点移动或大小改变后，标记与其相连的连线需要重新计算路径"""
+        self.connection_cache.mark_dirty(visual_node.tree_node.id)
+        self.associative_line_manager.update_lines_for_node(visual_node)
+        self.scene_bounds.schedule()
+
+    def invalidate_node_size(self, visual_node):
+        """节点内容/标签/图片/形状改变，下次布局重新计算其大小"""
+        self.node_sizes.invalidate(visual_node)
+
+    def mark_connection_topology_dirty(self):
+        """父子关系改变后，下次绘制前重新同步连线"""
+        self.connection_cache.mark_topology_dirty()
 
     def mouseDoubleClickEvent(self, event):
         """空白处双击创建新节点（参考 madmap）"""
@@ -275,14 +674,12 @@ class CardMindMapScene(QGraphicsScene):
     
     def find_node_by_id(self, node_id):
         """根据节点ID查找可视化节点"""
-        for vn in self.visual_nodes:
-            if vn.tree_node.id == node_id:
-                return vn
-        return None
+        return self._visual_by_id.get(node_id)
     
     def jump_to_card(self, node_id):
         """跳转到指定卡片并高亮显示"""
-        visual_node = self.find_node_by_id(node_id)
+        # 目标在折叠的子树中时先展开其祖先
+        visual_node = self.reveal_node(node_id)
         if visual_node:
             # 清除之前的选择
             self.clearSelection()
@@ -323,17 +720,20 @@ class CardMindMapScene(QGraphicsScene):
             # 添加到根节点下
             root_node = self.get_root_node()
             if root_node:
+                # 折叠的根节点先展开，新子节点才可见（折叠的子树中不能有图形项）
+                self.expand_node(root_node, relayout=False)
                 root_node.add_child(new_node)
                 # 计算位置（临时，布局会调整）
                 new_node.x = root_node.x + 300
                 new_node.y = root_node.y + len(root_node.children) * 200
         
-        # 添加到场景
+        # 添加到场景（只创建新节点自己的关联线，不重建全部关联线）
         visual_node = CardVisualNode(new_node)
-        self.add_visual_node(visual_node)
+        self.add_visual_node(visual_node, render_lines=False)
+        self.associative_line_manager.render_lines_for_node(visual_node)
         
-        # 应用布局
-        self.apply_layout()
+        # 只重新布局新节点所在的子节点带（连续生成的卡片合并为一次布局）
+        self.schedule_relayout(new_node.parent)
         
         # 设置新节点为选中状态
         self.clearSelection()
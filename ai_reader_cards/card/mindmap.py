@@ -1,5 +1,8 @@
 """思维导图模块 - 管理卡片画布与连线"""
 
+import functools
+import time
+from contextlib import contextmanager, nullcontext
 from typing import List, Dict
 
 # 可选导入xmind（仅用于导出/导入XMind文件）
@@ -15,12 +18,18 @@ except ImportError:
     MarkerId = None
 
 from PyQt6.QtWidgets import QGraphicsScene, QGraphicsView
-from PyQt6.QtCore import Qt, QPointF, QRectF, pyqtSignal
+from PyQt6.QtCore import Qt, QPointF, QRectF, QTimer, pyqtSignal
 from PyQt6.QtGui import (QPen, QColor, QPainter, QPainterPath,
                          QPolygonF, QTransform, QLinearGradient)
 
 # 修复：添加正确的导入
 from .card import KnowledgeCard
+from .card_registry import CardRegistry
+from .spatial_grid import SpatialGrid
+from .frame_stats import FrameStats
+from .grid_background import paint_grid
+from .scene_bounds import SceneBounds
+from .level_of_detail import DETAIL_FULL, detail_level_for_scale
 
 
 class ConnectionLine:
@@ -38,6 +47,148 @@ class ConnectionLine:
         to_point = self.to_card.get_connection_point(self.to_direction)
         return from_point, to_point
 
+
+class SmartCardConnection:
+    """智能连接线 - 自动选择最近的连接点（路径计算结果可被缓存复用）"""
+
+    def __init__(self, parent_node, child_node):
+        self.parent_node = parent_node
+        self.child_node = child_node
+        self.path = QPainterPath()
+        self.gradient = None
+        self.arrow_control = None
+        self.end_point = None
+        self.end_direction = None
+
+    def update_path(self):
+        """计算贝塞尔曲线路径（只在端点卡片移动后调用）"""
+
+        # 获取最近的连接点对
+        parent_direction, parent_point = self.parent_node.get_nearest_connection_point(
+            self.child_node.get_center_pos()
+        )
+        child_direction, child_point = self.child_node.get_nearest_connection_point(
+            self.parent_node.get_center_pos()
+        )
+
+        # 创建贝塞尔曲线路径
+        path = QPainterPath()
+        path.moveTo(parent_point)
+
+        # 根据连接方向计算控制点
+        control1, control2 = self._calculate_control_points(
+            parent_point, parent_direction,
+            child_point, child_direction
+        )
+
+        # 绘制三次贝塞尔曲线
+        path.cubicTo(control1, control2, child_point)
+
+        # 创建渐变
+        gradient = QLinearGradient(parent_point, child_point)
+        gradient.setColorAt(0, QColor(70, 130, 180, 200))
+        gradient.setColorAt(1, QColor(100, 180, 255, 200))
+
+        self.path = path
+        self.gradient = gradient
+        self.arrow_control = control2
+        self.end_point = child_point
+        self.end_direction = child_direction
+
+    def draw(self, painter):
+        """绘制缓存的路径和箭头"""
+        if self.gradient is None:
+            self.update_path()
+
+        # 设置画笔
+        pen = QPen(self.gradient, 2.5)
+        pen.setStyle(Qt.PenStyle.SolidLine)
+        pen.setCapStyle(Qt.PenCapStyle.RoundCap)
+        pen.setJoinStyle(Qt.PenJoinStyle.RoundJoin)
+        painter.setPen(pen)
+
+        # 绘制路径
+        painter.drawPath(self.path)
+
+        # 绘制优雅的箭头
+        self._draw_elegant_arrow(painter, self.arrow_control, self.end_point, self.end_direction)
+
+    def _calculate_control_points(self, start_point, start_direction, end_point, end_direction):
+        """根据连接方向计算贝塞尔曲线控制点"""
+
+        # 计算基础偏移量
+        dx = abs(end_point.x() - start_point.x())
+        dy = abs(end_point.y() - start_point.y())
+        base_offset = min(max(dx, dy) * 0.3, 150)
+
+        # 根据起始方向计算第一个控制点
+        if start_direction == 'top':
+            control1 = QPointF(start_point.x(), start_point.y() - base_offset)
+        elif start_direction == 'right':
+            control1 = QPointF(start_point.x() + base_offset, start_point.y())
+        elif start_direction == 'bottom':
+            control1 = QPointF(start_point.x(), start_point.y() + base_offset)
+        elif start_direction == 'left':
+            control1 = QPointF(start_point.x() - base_offset, start_point.y())
+        else:
+            control1 = QPointF(start_point.x(), start_point.y() + base_offset)
+
+        # 根据结束方向计算第二个控制点
+        if end_direction == 'top':
+            control2 = QPointF(end_point.x(), end_point.y() - base_offset)
+        elif end_direction == 'right':
+            control2 = QPointF(end_point.x() + base_offset, end_point.y())
+        elif end_direction == 'bottom':
+            control2 = QPointF(end_point.x(), end_point.y() + base_offset)
+        elif end_direction == 'left':
+            control2 = QPointF(end_point.x() - base_offset, end_point.y())
+        else:
+            control2 = QPointF(end_point.x(), end_point.y() - base_offset)
+
+        return control1, control2
+
+    def _draw_elegant_arrow(self, painter, control_point, end_point, direction):
+        """绘制优雅的箭头（考虑连接方向）"""
+
+        # 计算箭头方向向量
+        if direction == 'top':
+            arrow_dir = QPointF(0, -1)
+        elif direction == 'right':
+            arrow_dir = QPointF(1, 0)
+        elif direction == 'bottom':
+            arrow_dir = QPointF(0, 1)
+        elif direction == 'left':
+            arrow_dir = QPointF(-1, 0)
+        else:
+            # 默认向下
+            arrow_dir = QPointF(0, 1)
+
+        # 箭头大小
+        arrow_size = 12
+
+        # 计算箭头的三个点
+        perpendicular = QPointF(-arrow_dir.y(), arrow_dir.x())  # 垂直向量
+
+        arrow_point1 = QPointF(
+            end_point.x() - arrow_size * arrow_dir.x() + arrow_size * 0.4 * perpendicular.x(),
+            end_point.y() - arrow_size * arrow_dir.y() + arrow_size * 0.4 * perpendicular.y()
+        )
+        arrow_point2 = QPointF(
+            end_point.x() - arrow_size * arrow_dir.x() - arrow_size * 0.4 * perpendicular.x(),
+            end_point.y() - arrow_size * arrow_dir.y() - arrow_size * 0.4 * perpendicular.y()
+        )
+
+        # 绘制箭头
+        arrow = QPolygonF([end_point, arrow_point1, arrow_point2])
+        gradient = QLinearGradient(end_point, arrow_point1)
+        gradient.setColorAt(0, QColor(100, 180, 255))
+        gradient.setColorAt(1, QColor(70, 130, 180))
+
+        painter.setBrush(gradient)
+        painter.setPen(QPen(QColor(70, 130, 180), 1))
+        painter.drawPolygon(arrow)
+
+
 class CardSearchTool:
     """卡片搜索工具类"""
 
@@ -160,10 +311,33 @@ class CardSearchTool:
 
             return card, match_data, self.current_result_index + 1, len(self.search_results)
         return None
+
+
+def scene_batch_update(cards):
+    """返回卡片所在场景的 batch_update() 上下文（卡片不在支持批量修改的场景中时为空上下文）"""
+    if not cards:
+        return nullcontext()
+    first = cards if isinstance(cards, KnowledgeCard) else next(iter(cards))
+    scene = first.scene() if hasattr(first, 'scene') else None
+    if scene is not None and hasattr(scene, 'batch_update'):
+        return scene.batch_update()
+    return nullcontext()
+
+
+def batched_card_update(func):
+    """装饰器：在第一个参数（卡片或卡片列表）所在场景的 batch_update() 中执行"""
+    @functools.wraps(func)
+    def wrapper(cards, *args, **kwargs):
+        with scene_batch_update(cards):
+            return func(cards, *args, **kwargs)
+    return wrapper
+
+
 class CardAlignmentTool:
     """卡片对齐工具类"""
 
     @staticmethod
+    @batched_card_update
     def align_left(cards):
         """左对齐"""
         if not cards or len(cards) < 2:
@@ -173,6 +347,7 @@ class CardAlignmentTool:
             card.setPos(min_x, card.scenePos().y())
 
     @staticmethod
+    @batched_card_update
     def align_right(cards):
         """右对齐"""
         if not cards or len(cards) < 2:
@@ -182,6 +357,7 @@ class CardAlignmentTool:
             card.setPos(max_x - card.CARD_WIDTH, card.scenePos().y())
 
     @staticmethod
+    @batched_card_update
     def align_top(cards):
         """顶对齐"""
         if not cards or len(cards) < 2:
@@ -191,6 +367,7 @@ class CardAlignmentTool:
             card.setPos(card.scenePos().x(), min_y)
 
     @staticmethod
+    @batched_card_update
     def align_bottom(cards):
         """底对齐"""
         if not cards or len(cards) < 2:
@@ -200,6 +377,7 @@ class CardAlignmentTool:
             card.setPos(card.scenePos().x(), max_y - card.CARD_HEIGHT)
 
     @staticmethod
+    @batched_card_update
     def align_center_horizontal(cards):
         """水平居中对齐"""
         if not cards or len(cards) < 2:
@@ -209,6 +387,7 @@ class CardAlignmentTool:
             card.setPos(card.scenePos().x(), center_y - card.CARD_HEIGHT / 2)
 
     @staticmethod
+    @batched_card_update
     def align_center_vertical(cards):
         """垂直居中对齐"""
         if not cards or len(cards) < 2:
@@ -218,6 +397,7 @@ class CardAlignmentTool:
             card.setPos(center_x - card.CARD_WIDTH / 2, card.scenePos().y())
 
     @staticmethod
+    @batched_card_update
     def distribute_horizontal(cards):
         """水平均匀分布"""
         if not cards or len(cards) < 3:
@@ -235,6 +415,7 @@ class CardAlignmentTool:
             card.setPos(new_x, card.scenePos().y())
 
     @staticmethod
+    @batched_card_update
     def distribute_vertical(cards):
         """垂直均匀分布"""
         if not cards or len(cards) < 3:
@@ -252,6 +433,7 @@ class CardAlignmentTool:
             card.setPos(card.scenePos().x(), new_y)
 
     @staticmethod
+    @batched_card_update
     def arrange_hierarchy(root_card, horizontal_spacing=200, vertical_spacing=150):
         """按层次结构排列卡片"""
         if not root_card:
@@ -283,10 +465,14 @@ class MindMapScene(QGraphicsScene):
     # 添加连接相关信号
     connection_started = pyqtSignal(object, str, QPointF)  # 卡片，方向，位置
 
+    AUTO_CONNECT_DISTANCE = 300  # 自动连接的垂直距离阈值
+
     def __init__(self):
         super().__init__()
-        self.setSceneRect(-2000, -2000, 4000, 4000)
-        self.cards = []
+        # 场景矩形随卡片范围伸缩（批量更新），BSP 深度按图形项数量设置
+        self.scene_bounds = SceneBounds(self, lambda: len(self.cards))
+        self.cards = CardRegistry()  # 按 card_id 索引的有序卡片注册表
+        self.card_index = SpatialGrid(self.AUTO_CONNECT_DISTANCE)  # 卡片矩形的空间索引（自动连接检测用）
         self.root_card = None  # 根节点卡片
 
         # 连线相关属性
@@ -318,10 +504,42 @@ class MindMapScene(QGraphicsScene):
         self.fixed_connection_manager = None
         self.current_layout_type = "mind_map"  # 当前布局类型
         
-        # 撤销/重做管理器
+        # 连线渲染器/布局引擎只在构造时解析一次，连线样式改变时才重新解析
+        from .backend_registry import BackendRegistry
+        self.backend_registry = BackendRegistry(self.connection_style)
+        
+        # 批量修改（见 batch_update）
+        self._batch_depth = 0
+        self._batch_committing = False
+        self._batch_moved_cards = {}  # id(card) -> 批量修改期间移动过的卡片
+        self._batch_layout_roots = {}  # id(card) -> 批量修改期间请求布局的根卡片
+        self._layout_moving = 0  # 正在应用布局 / 撤销恢复的位置（这些移动不做自动连接检测）
+        
+        # 连线路径缓存（重绘时复用，卡片移动时才重新计算）
+        from .connection_cache import ConnectionPathCache
+        self.connection_cache = ConnectionPathCache()
+
+        # 后台布局（大图在工作线程中计算，完成后一次性应用）
+        from .layout_service import LayoutService
+        from .layout_cache import LayoutResultCache
+        self.layout_service = LayoutService(self)
+        self.layout_cache = LayoutResultCache()  # 布局结果缓存（树没有改变时切换布局直接取结果）
+        layout_service = self.layout_service
+        self.destroyed.connect(lambda: layout_service.shutdown())  # 场景销毁时关闭工作线程
+
+        # 细节层次（视图缩小时卡片简化绘制，见 set_view_scale）
+        self.detail_level = DETAIL_FULL
+        
+        # 撤销/重做管理器：每次操作只记录变化量（见 undo_transaction）
         from .undo_manager import UndoManager
         self.undo_manager = UndoManager()
-        # 不立即保存初始状态，等有卡片时再保存
+        self.undo_manager.capture_state = self._capture_cards_data
+        self._undo_recorders = []  # 正在进行的事务（嵌套时只有最外层提交）
+        self._mouse_transaction = False  # 鼠标按下时开启的事务（释放时提交）
+        self._implicit_recorder = None  # 事务之外的修改，在本轮事件结束时提交
+        self._implicit_commit_timer = QTimer()
+        self._implicit_commit_timer.setSingleShot(True)
+        self._implicit_commit_timer.timeout.connect(self._commit_implicit_transaction)
 
     # 修复：添加缺失的方法
     def start_connection(self, from_card, from_direction, start_point):
@@ -398,6 +616,16 @@ class MindMapScene(QGraphicsScene):
         self.temp_connection_line = None
         self.temp_end_point = None
 
+    def mousePressEvent(self, event):
+        """鼠标按下：从按下到释放的修改（拖动卡片、连线建立父子关系）记录为一条历史"""
+        if event.button() == Qt.MouseButton.LeftButton:
+            if self._mouse_transaction:
+                # 没有收到上一次的释放事件
+                self.end_undo_transaction()
+            self.begin_undo_transaction()
+            self._mouse_transaction = True
+        super().mousePressEvent(event)
+
     def mouseMoveEvent(self, event):
         """鼠标移动事件"""
         if self.connecting:
@@ -415,6 +643,14 @@ class MindMapScene(QGraphicsScene):
 
     def mouseReleaseEvent(self, event):
         """鼠标释放事件"""
+        try:
+            self._handle_mouse_release(event)
+        finally:
+            if event.button() == Qt.MouseButton.LeftButton and self._mouse_transaction:
+                self._mouse_transaction = False
+                self.end_undo_transaction()
+
+    def _handle_mouse_release(self, event):
         if self.connecting and event.button() == Qt.MouseButton.LeftButton:
             # 检查是否释放到卡片上
             items = self.items(event.scenePos())
@@ -461,9 +697,8 @@ class MindMapScene(QGraphicsScene):
                     scene_pos.y()
                 )
                 
-                # 保存状态用于撤销
-                self._save_state_for_undo("创建新卡片")
-                self.add_card(new_card)
+                with self.undo_transaction("创建新卡片"):
+                    self.add_card(new_card)
                 self.update()
                 
                 # 设置新卡片为选中状态
@@ -483,23 +718,23 @@ class MindMapScene(QGraphicsScene):
         
         if event.key() == Qt.Key.Key_Delete:
             # Delete键 - 删除选中卡片
-            self._save_state_for_undo("删除卡片")
-            self.delete_selected_cards()
+            with self.undo_transaction("删除卡片"):
+                self.delete_selected_cards()
             event.accept()
         elif event.key() == Qt.Key.Key_Return or event.key() == Qt.Key.Key_Enter:
             # Enter键 - 添加子节点（参考madmap）
             selected_cards = self.get_selected_cards()
             if selected_cards:
-                self._save_state_for_undo("添加子节点")
-                selected_cards[0].add_child_card()
+                with self.undo_transaction("添加子节点"):
+                    selected_cards[0].add_child_card()
                 event.accept()
                 return
         elif event.key() == Qt.Key.Key_Tab:
             # Tab键 - 添加同级节点（参考madmap）
             selected_cards = self.get_selected_cards()
             if selected_cards:
-                self._save_state_for_undo("添加同级节点")
-                selected_cards[0].add_sibling_card()
+                with self.undo_transaction("添加同级节点"):
+                    selected_cards[0].add_sibling_card()
                 event.accept()
                 return
         elif event.modifiers() & Qt.KeyboardModifier.ControlModifier:
@@ -513,13 +748,13 @@ class MindMapScene(QGraphicsScene):
                 event.accept()
             elif event.key() == Qt.Key.Key_X:
                 # Ctrl+X 剪切
-                self._save_state_for_undo("剪切卡片")
-                self.cut_selected_cards()
+                with self.undo_transaction("剪切卡片"):
+                    self.cut_selected_cards()
                 event.accept()
             elif event.key() == Qt.Key.Key_V:
                 # Ctrl+V 粘贴
-                self._save_state_for_undo("粘贴卡片")
-                self.paste_cards()
+                with self.undo_transaction("粘贴卡片"):
+                    self.paste_cards()
                 event.accept()
             elif event.key() == Qt.Key.Key_Z:
                 # Ctrl+Z 撤销
@@ -573,17 +808,18 @@ class MindMapScene(QGraphicsScene):
         # 计算粘贴位置（稍微偏移）
         paste_offset = 30
         
-        for card_data in self.copied_cards:
-            # 创建新卡片
-            new_card = KnowledgeCard(
-                str(uuid.uuid4()),
-                card_data['title'],
-                card_data['question'],
-                card_data['answer'],
-                card_data['x'] + paste_offset,
-                card_data['y'] + paste_offset
-            )
-            self.add_card(new_card)
+        with self.batch_update():
+            for card_data in self.copied_cards:
+                # 创建新卡片
+                new_card = KnowledgeCard(
+                    str(uuid.uuid4()),
+                    card_data['title'],
+                    card_data['question'],
+                    card_data['answer'],
+                    card_data['x'] + paste_offset,
+                    card_data['y'] + paste_offset
+                )
+                self.add_card(new_card)
         
         self.update()
         print(f"已粘贴 {len(self.copied_cards)} 个卡片")
@@ -610,74 +846,154 @@ class MindMapScene(QGraphicsScene):
         self.update()
         print(f"已剪切 {len(selected_cards)} 个卡片")
     
+    def _capture_cards_data(self):
+        """全部卡片的完整快照（to_dict + 源文本、在父卡片中的下标）"""
+        from .undo_commands import snapshot_state
+        return [snapshot_state(card) for card in self.cards]
+
     def _save_state_for_undo(self, action_name: str = ""):
-        """保存当前状态用于撤销"""
-        cards_data = []
-        for card in self.cards:
-            cards_data.append(card.to_dict())
-        self.undo_manager.save_state(cards_data, action_name)
-    
+        """
+        保存完整快照用于撤销（在操作之前调用）
+        只用于布局等没有经过 undo_transaction 记录的批量修改；普通操作只记录变化量
+        """
+        from .undo_commands import DeltaRecorder
+        self._commit_implicit_transaction()
+        self.undo_manager.save_state(self._capture_cards_data(), action_name)
+        # 本轮事件中接下来的修改都包含在快照中，不再单独记录；事件结束时取操作后的状态
+        if not self._undo_recorders:
+            self._implicit_recorder = DeltaRecorder()
+            self._implicit_recorder.covered_by_snapshot = True
+            self._implicit_commit_timer.start(0)
+
+    # ========== 变化量撤销（命令） ==========
+
+    @contextmanager
+    def undo_transaction(self, action_name=""):
+        """
+        把期间对卡片的修改（添加、删除、移动、编辑、父子关系）记录为一条历史
+        嵌套时合并到最外层；撤销 / 重做只处理记录中的卡片
+        """
+        self.begin_undo_transaction(action_name)
+        try:
+            yield
+        finally:
+            self.end_undo_transaction()
+
+    def begin_undo_transaction(self, action_name=""):
+        """开始事务（与 end_undo_transaction 成对调用，如拖动卡片的按下 / 释放）"""
+        from .undo_commands import DeltaRecorder
+        if not self._undo_recorders:
+            # 事务之外尚未提交的修改先单独成为一条
+            self._commit_implicit_transaction()
+        self._undo_recorders.append(DeltaRecorder(action_name or None))
+
+    def end_undo_transaction(self):
+        """结束事务，最外层结束时提交"""
+        if not self._undo_recorders:
+            return
+        recorder = self._undo_recorders.pop()
+        if self._undo_recorders:
+            # 嵌套事务合并到外层（外层已有的原始值优先）
+            outer = self._undo_recorders[-1]
+            for card in recorder.added.values():
+                outer.record_add(card)
+            for card_id, state in recorder.removed.items():
+                if outer.added.pop(card_id, None) is None:
+                    outer.removed.setdefault(card_id, state)
+            for name in ('moves', 'edits', 'reparents'):
+                target = getattr(outer, name)
+                for card_id, value in getattr(recorder, name).items():
+                    if card_id not in outer.added:
+                        target.setdefault(card_id, value)
+            return
+        self._push_delta(recorder)
+
+    def _push_delta(self, recorder):
+        command = recorder.build(self)
+        if not command.is_empty():
+            self.undo_manager.push(command)
+
+    def _undo_recorder(self):
+        """当前记录修改的事务（撤销 / 重做期间为 None）；不在事务中时开启一个本轮事件结束时提交的事务"""
+        if self.undo_manager.is_undoing:
+            return None
+        if self._undo_recorders:
+            return self._undo_recorders[-1]
+        if self._implicit_recorder is None:
+            from .undo_commands import DeltaRecorder
+            self._implicit_recorder = DeltaRecorder()
+            self._implicit_commit_timer.start(0)
+        return self._implicit_recorder
+
+    def _commit_implicit_transaction(self):
+        """提交事务之外的修改"""
+        self._implicit_commit_timer.stop()
+        recorder = self._implicit_recorder
+        self._implicit_recorder = None
+        if recorder is None:
+            return
+        if recorder.covered_by_snapshot:
+            self.undo_manager.finish_snapshot()
+        else:
+            self._push_delta(recorder)
+
+    def record_card_edit(self, card):
+        """卡片内容修改前调用"""
+        recorder = self._undo_recorder()
+        if recorder is not None and card in self.cards:
+            recorder.record_edit(card)
+
+    def record_card_reparent(self, card):
+        """卡片父子关系改变前调用"""
+        recorder = self._undo_recorder()
+        if recorder is not None and card in self.cards:
+            recorder.record_reparent(card)
+
     def undo(self):
         """撤销操作"""
-        cards_data = self.undo_manager.undo()
-        if cards_data is not None:
-            self._restore_state(cards_data)
-            print("已撤销")
-    
+        self._run_undo_command(self.undo_manager.undo, "undo", "已撤销")
+
     def redo(self):
         """重做操作"""
-        cards_data = self.undo_manager.redo()
-        if cards_data is not None:
-            self._restore_state(cards_data)
-            print("已重做")
-    
-    def _restore_state(self, cards_data: List[Dict]):
-        """恢复状态"""
-        from ai_reader_cards.card import KnowledgeCard
-        
-        # 清空当前场景
-        for card in self.cards[:]:
-            self.remove_card(card)
-        
-        # 恢复卡片（不触发撤销保存）
-        card_dict = {}
-        for card_data in cards_data:
-            card = KnowledgeCard(
-                card_data['id'],
-                card_data['title'],
-                card_data['question'],
-                card_data['answer'],
-                card_data['x'],
-                card_data['y']
-            )
-            card.level = card_data.get('level', 0)
-            card_dict[card_data['id']] = card
-            # 直接添加，不触发保存
-            self.addItem(card)
-            self.cards.append(card)
-            
-            # 连接信号
-            if hasattr(card, 'connection_started'):
-                card.connection_started.connect(self.start_connection)
-            if hasattr(card, 'content_changed'):
-                card.content_changed.connect(lambda: self.update())
-        
-        # 恢复父子关系
-        for card_data in cards_data:
-            if card_data.get('parent_id'):
-                parent = card_dict.get(card_data['parent_id'])
-                child = card_dict.get(card_data['id'])
-                if parent and child:
-                    child.set_parent_card(parent)
-        
-        self.undo_manager.is_undoing = False
+        self._run_undo_command(self.undo_manager.redo, "redo", "已重做")
+
+    def _run_undo_command(self, take, method, message):
+        """执行撤销 / 重做（期间的修改不记录，卡片移动不做自动连接检测）"""
+        self._commit_implicit_transaction()
+        command = take()
+        if command is None:
+            return
+        self.undo_manager.is_undoing = True
+        try:
+            with self.batch_update(), self.layout_moves():
+                getattr(command, method)(self)
+        finally:
+            self.undo_manager.is_undoing = False
         self.update()
+        print(message)
+
+    def _restore_state(self, cards_data: List[Dict]):
+        """
+        恢复到完整快照：按 card_id 与当前场景比较，只修改有差异的卡片
+        （不再删除全部卡片后重新创建，未改变的卡片不重绘，选中状态保留）
+        """
+        from .undo_commands import apply_snapshot
+
+        # 批量恢复：卡片移动和子树布局在提交时统一处理一次
+        with self.batch_update():
+            changed = apply_snapshot(self, cards_data)
+        if changed:
+            self.update()
 
     # 修复：添加缺失的卡片管理方法
     def add_card(self, card):
         """添加卡片到场景"""
         self.addItem(card)
         self.cards.append(card)
+        self.update_card_index(card)
+        self.connection_cache.mark_topology_dirty()
+        if self.detail_level != DETAIL_FULL and hasattr(card, 'set_detail_level'):
+            card.set_detail_level(self.detail_level)
         
         # 如果是第一个卡片，设置层级为0
         if len(self.cards) == 1:
@@ -692,21 +1008,30 @@ class MindMapScene(QGraphicsScene):
         if hasattr(card, 'content_changed'):
             card.content_changed.connect(lambda: self.update())
         
-        # 如果不是撤销操作，保存状态（只在有卡片时保存）
-        if not self.undo_manager.is_undoing and len(self.cards) > 0:
-            # 延迟保存，避免频繁保存
-            from PyQt6.QtCore import QTimer
-            QTimer.singleShot(100, lambda: self._save_state_for_undo("添加卡片"))
+        # 记录添加用于撤销（撤销 / 重做期间不记录）
+        recorder = self._undo_recorder()
+        if recorder is not None:
+            recorder.record_add(card)
 
     def remove_card(self, card):
-        """从场景移除卡片"""
+        """从场景移除卡片（同时从父卡片的子卡片中移除）"""
         if card in self.cards:
+            recorder = self._undo_recorder()
+            if recorder is not None:
+                recorder.record_remove(card)
             self.cards.remove(card)
+        parent = card.parent_card
+        if parent is not None and card in parent.child_cards:
+            parent.child_cards.remove(card)
+            self.connection_cache.mark_topology_dirty()
+        self.card_index.remove(card)
+        self.connection_cache.discard_node(card.card_id)
         self.removeItem(card)
+        self.scene_bounds.schedule()
 
     def get_all_cards(self):
         """获取所有卡片"""
-        return self.cards
+        return list(self.cards)
 
     def get_selected_cards(self):
         """获取选中的卡片"""
@@ -717,6 +1042,8 @@ class MindMapScene(QGraphicsScene):
         for card in self.cards[:]:
             self.remove_card(card)
         self.cards.clear()
+        self.card_index.clear()
+        self.connection_cache.clear()
 
     def export_to_xmind(self, filename):
         """导出到XMind文件"""
@@ -754,15 +1081,14 @@ class MindMapScene(QGraphicsScene):
             )
         
         from .card import KnowledgeCard as Card  # 导入Card类（使用KnowledgeCard）
+        import uuid
 
         self.workbook = xmind.load(filename)
         self.sheet = self.workbook.getPrimarySheet()
         root_topic = self.sheet.getRootTopic()
 
         # 清除现有卡片
-        for card in self.cards:
-            self.removeItem(card)
-        self.cards.clear()
+        self.clear_canvas()
 
         # 创建根节点卡片
         title = root_topic.getTitle()
@@ -773,13 +1099,13 @@ class MindMapScene(QGraphicsScene):
             question = title
             answer = ""
 
-        self.root_card = Card(question, answer)
+        self.root_card = Card(str(uuid.uuid4()), question, question, answer)
         self.root_card.setPos(0, 0)  # 根节点放在中心
-        self.addItem(self.root_card)
-        self.cards.append(self.root_card)
+        self.add_card(self.root_card)
 
         # 递归导入子节点
         self._import_topics_from_xmind(root_topic, self.root_card)
+        self.connection_cache.mark_topology_dirty()
 
     def _add_card_to_xmind(self, card, parent_topic):
         """递归将卡片添加到XMind主题中"""
@@ -798,6 +1124,7 @@ class MindMapScene(QGraphicsScene):
     def _import_topics_from_xmind(self, topic, parent_card):
         """递归从XMind主题导入卡片"""
         from .card import KnowledgeCard as Card  # 导入Card类（使用KnowledgeCard）
+        import uuid
 
         # 获取子主题
         for sub_topic in topic.getSubTopics():
@@ -810,7 +1137,7 @@ class MindMapScene(QGraphicsScene):
                 answer = ""
 
             # 创建新卡片
-            child_card = Card(question, answer)
+            child_card = Card(str(uuid.uuid4()), question, question, answer)
 
             # 设置卡片位置（相对于父卡片）
             offset_x = len(parent_card.child_cards) * 200  # 水平偏移
@@ -818,13 +1145,11 @@ class MindMapScene(QGraphicsScene):
             child_card.setPos(parent_card.pos().x() + offset_x,
                             parent_card.pos().y() + offset_y)
 
-            # 添加到场景
-            self.addItem(child_card)
-            self.cards.append(child_card)
+            # 建立父子关系（卡片还未加入场景，不会逐个触发布局）
+            child_card.set_parent_card(parent_card)
 
-            # 建立父子关系
-            parent_card.add_child(child_card)
-            child_card.set_parent(parent_card)
+            # 添加到场景
+            self.add_card(child_card)
 
             # 递归处理子主题
             self._import_topics_from_xmind(sub_topic, child_card)
@@ -833,43 +1158,61 @@ class MindMapScene(QGraphicsScene):
         """添加卡片到场景"""
         self.addItem(card)
         self.cards.append(card)
+        self.update_card_index(card)
+        self.connection_cache.mark_topology_dirty()
+        if self.detail_level != DETAIL_FULL and hasattr(card, 'set_detail_level'):
+            card.set_detail_level(self.detail_level)
+        recorder = self._undo_recorder()
+        if recorder is not None:
+            recorder.record_add(card)
 
     def remove_card(self, card):
-        """从场景移除卡片"""
+        """从场景移除卡片（同时从父卡片的子卡片中移除）"""
         if card in self.cards:
+            recorder = self._undo_recorder()
+            if recorder is not None:
+                recorder.record_remove(card)
             self.cards.remove(card)
+        parent = card.parent_card
+        if parent is not None and card in parent.child_cards:
+            parent.child_cards.remove(card)
+            self.connection_cache.mark_topology_dirty()
+        self.card_index.remove(card)
+        self.connection_cache.discard_node(card.card_id)
         self.removeItem(card)
+        self.scene_bounds.schedule()
 
     def get_all_cards(self):
         """获取所有卡片"""
-        return self.cards
+        return list(self.cards)
+
+    def set_view_scale(self, scale, interactive=False):
+        """
+        视图缩放改变时调用：缩放跨过阈值时切换所有卡片的细节层次
+        （缩小后卡片只画单色矩形 + 标题或一个点，文本子项隐藏）
+        Args:
+            interactive: 视图正在平移 / 缩放（按更低的缩放取细节层次，结束后视图再以 False 调用）
+        """
+        level = detail_level_for_scale(scale, interactive)
+        if level == self.detail_level:
+            return
+        self.detail_level = level
+        for card in self.cards:
+            if hasattr(card, 'set_detail_level'):
+                card.set_detail_level(level)
 
     def drawBackground(self, painter, rect):
         """绘制网格背景"""
         super().drawBackground(painter, rect)
 
-        # 绘制淡灰色网格
-        painter.setPen(QPen(QColor(240, 240, 240), 0.5))
-
-        grid_size = 50
-        left = int(rect.left()) - (int(rect.left()) % grid_size)
-        top = int(rect.top()) - (int(rect.top()) % grid_size)
-
-        # 绘制垂直线
-        x = left
-        while x < rect.right():
-            painter.drawLine(int(x), int(rect.top()), int(x), int(rect.bottom()))
-            x += grid_size
-
-        # 绘制水平线
-        y = top
-        while y < rect.bottom():
-            painter.drawLine(int(rect.left()), int(y), int(rect.right()), int(y))
-            y += grid_size
+        # 绘制淡灰色网格（平铺位图一次填充，不逐条画线）
+        paint_grid(painter, rect)
 
     def set_connection_style(self, style):
         """设置连线样式"""
         self.connection_style = style
+        self.backend_registry.set_connection_style(style)
+        self.connection_cache.clear()
         if style in ["bezier", "smart", "gradient"]:
             from .professional_connections import ConnectionManager
             if self.connection_manager is None:
@@ -886,6 +1229,7 @@ class MindMapScene(QGraphicsScene):
         self.current_layout_type = layout_type
         if self.fixed_connection_manager:
             self.fixed_connection_manager.set_layout_type(layout_type)
+        self.connection_cache.mark_topology_dirty()
         self.update()
 
     def drawForeground(self, painter, rect):
@@ -895,213 +1239,159 @@ class MindMapScene(QGraphicsScene):
         # 绘制所有父子连线
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
 
-        # 优先使用 simple-mind-map 风格的连线渲染器
-        try:
-            from .simple_mind_map_connections import SimpleMindMapConnectionRenderer
-            if not hasattr(self, '_simple_renderer'):
-                self._simple_renderer = SimpleMindMapConnectionRenderer()
-            
-            # 映射连线风格（参考 simple-mind-map 的 lineStyle）
-            style_map = {
-                "fixed": SimpleMindMapConnectionRenderer.LINE_STYLE_STRAIGHT,
-                "straight": SimpleMindMapConnectionRenderer.LINE_STYLE_STRAIGHT,
-                "direct": SimpleMindMapConnectionRenderer.LINE_STYLE_DIRECT,
-                "curve": SimpleMindMapConnectionRenderer.LINE_STYLE_CURVE,
-                "bezier": SimpleMindMapConnectionRenderer.LINE_STYLE_CURVE,
-                "smart": SimpleMindMapConnectionRenderer.LINE_STYLE_CURVE,
-                "gradient": SimpleMindMapConnectionRenderer.LINE_STYLE_CURVE,
-                "default": SimpleMindMapConnectionRenderer.LINE_STYLE_STRAIGHT,
-            }
-            
-            line_style = style_map.get(self.connection_style, 
-                                       SimpleMindMapConnectionRenderer.LINE_STYLE_STRAIGHT)
-            
-            # 使用 simple-mind-map 渲染器绘制连线
+        # 使用构造时解析好的连线渲染器（不可用时使用原有逻辑）
+        renderer = self.backend_registry.connection_renderer
+        if renderer is not None:
+            line_style = self.backend_registry.line_style
             for card in self.cards:
                 if card.parent_card:
-                    self._simple_renderer.render_line(
-                        painter, card.parent_card, card, 
+                    # 两端卡片都不在暴露区域附近时跳过
+                    bounds = card.parent_card.sceneBoundingRect().united(card.sceneBoundingRect())
+                    if not bounds.intersects(rect):
+                        continue
+                    renderer.render_line(
+                        painter, card.parent_card, card,
                         line_style, self.current_layout_type
                     )
             return
-        except ImportError:
-            # 如果 simple-mind-map 渲染器不可用，尝试使用增强渲染器
-            try:
-                from .enhanced_connections import EnhancedConnectionRenderer
-                if not hasattr(self, '_enhanced_renderer'):
-                    self._enhanced_renderer = EnhancedConnectionRenderer()
-                
-                style_map = {
-                    "fixed": EnhancedConnectionRenderer.LINE_STYLE_STRAIGHT,
-                    "bezier": EnhancedConnectionRenderer.LINE_STYLE_BEZIER,
-                    "smart": EnhancedConnectionRenderer.LINE_STYLE_CURVE,
-                    "gradient": EnhancedConnectionRenderer.LINE_STYLE_BEZIER,
-                    "default": EnhancedConnectionRenderer.LINE_STYLE_STRAIGHT,
-                }
-                
-                enhanced_style = style_map.get(self.connection_style, 
-                                              EnhancedConnectionRenderer.LINE_STYLE_STRAIGHT)
-                
-                for card in self.cards:
-                    if card.parent_card:
-                        self._enhanced_renderer.render_line(
-                            painter, card.parent_card, card, 
-                            enhanced_style, self.current_layout_type
-                        )
-                return
-            except ImportError:
-                # 如果都不可用，使用原有逻辑
-                pass
 
-        # 根据连线样式选择绘制方式（原有逻辑作为后备）
-        if self.connection_style == "fixed" and self.fixed_connection_manager:
-            # 使用固定长度连线
-            for card in self.cards:
-                if card.parent_card:
-                    connection = self.fixed_connection_manager.create_connection(
-                        card.parent_card, card
-                    )
-                    connection.update_path()
-                    connection.draw(painter)
-        elif self.connection_style in ["bezier", "smart", "gradient"] and self.connection_manager:
-            # 使用专业连线样式
-            for card in self.cards:
-                if card.parent_card:
-                    connection = self.connection_manager.create_connection(
-                        card.parent_card, card, self.connection_style
-                    )
-                    connection.update_path()
-                    connection.draw(painter)
-        else:
-            # 使用原有的智能连线
-            for card in self.cards:
-                if card.parent_card:
-                    self._draw_smart_connection(painter, card.parent_card, card)
-
-    def _draw_smart_connection(self, painter, parent_card, child_card):
-        """绘制智能连接线 - 自动选择最近的连接点"""
-
-        # 获取最近的连接点对
-        parent_direction, parent_point = parent_card.get_nearest_connection_point(
-            child_card.get_center_pos()
-        )
-        child_direction, child_point = child_card.get_nearest_connection_point(
-            parent_card.get_center_pos()
-        )
-
-        # 创建贝塞尔曲线路径
-        path = QPainterPath()
-        path.moveTo(parent_point)
-
-        # 根据连接方向计算控制点
-        control1, control2 = self._calculate_control_points(
-            parent_point, parent_direction,
-            child_point, child_direction
-        )
-
-        # 绘制三次贝塞尔曲线
-        path.cubicTo(control1, control2, child_point)
-
-        # 创建渐变画笔
-        gradient = QLinearGradient(parent_point, child_point)
-        gradient.setColorAt(0, QColor(70, 130, 180, 200))
-        gradient.setColorAt(1, QColor(100, 180, 255, 200))
-
-        # 设置画笔
-        pen = QPen(gradient, 2.5)
-        pen.setStyle(Qt.PenStyle.SolidLine)
-        pen.setCapStyle(Qt.PenCapStyle.RoundCap)
-        pen.setJoinStyle(Qt.PenJoinStyle.RoundJoin)
-        painter.setPen(pen)
-
-        # 绘制路径
-        painter.drawPath(path)
-
-        # 绘制优雅的箭头
-        self._draw_elegant_arrow(painter, control2, child_point, child_direction)
-
-    def _calculate_control_points(self, start_point, start_direction, end_point, end_direction):
-        """根据连接方向计算贝塞尔曲线控制点"""
-
-        # 计算基础偏移量
-        dx = abs(end_point.x() - start_point.x())
-        dy = abs(end_point.y() - start_point.y())
-        base_offset = min(max(dx, dy) * 0.3, 150)
+        # 根据连线样式选择连线类型（原有逻辑作为后备）
+        # 连线对象按 (父id, 子id, 样式, 布局) 缓存，只有端点卡片移动后才重新计算路径
+        if self.connection_cache.topology_dirty:
+            self.connection_cache.sync(
+                self._iter_connection_edges(),
+                self.connection_style, self.current_layout_type,
+                self._connection_factory()
+            )
 
-        # 根据起始方向计算第一个控制点
-        if start_direction == 'top':
-            control1 = QPointF(start_point.x(), start_point.y() - base_offset)
-        elif start_direction == 'right':
-            control1 = QPointF(start_point.x() + base_offset, start_point.y())
-        elif start_direction == 'bottom':
-            control1 = QPointF(start_point.x(), start_point.y() + base_offset)
-        elif start_direction == 'left':
-            control1 = QPointF(start_point.x() - base_offset, start_point.y())
-        else:
-            control1 = QPointF(start_point.x(), start_point.y() + base_offset)
+        # 只绘制包围盒与暴露区域相交的连线
+        for connection in self.connection_cache.visible(rect):
+            connection.draw(painter)
 
-        # 根据结束方向计算第二个控制点
-        if end_direction == 'top':
-            control2 = QPointF(end_point.x(), end_point.y() - base_offset)
-        elif end_direction == 'right':
-            control2 = QPointF(end_point.x() + base_offset, end_point.y())
-        elif end_direction == 'bottom':
-            control2 = QPointF(end_point.x(), end_point.y() + base_offset)
-        elif end_direction == 'left':
-            control2 = QPointF(end_point.x() - base_offset, end_point.y())
-        else:
-            control2 = QPointF(end_point.x(), end_point.y() - base_offset)
-
-        return control1, control2
+    def _iter_connection_edges(self):
+        """遍历所有父子连线 (父卡片, 子卡片, 父id, 子id)"""
+        for card in self.cards:
+            if card.parent_card:
+                yield card.parent_card, card, card.parent_card.card_id, card.card_id
 
-    def _draw_elegant_arrow(self, painter, control_point, end_point, direction):
-        """绘制优雅的箭头（考虑连接方向）"""
+    def _connection_factory(self):
+        """根据连线样式返回创建连线对象的函数"""
+        if self.connection_style == "fixed" and self.fixed_connection_manager:
+            # 使用固定长度连线
+            return self.fixed_connection_manager.create_connection
+        if self.connection_style in ["bezier", "smart", "gradient"] and self.connection_manager:
+            # 使用专业连线样式
+            return lambda parent, child: self.connection_manager.create_connection(
+                parent, child, self.connection_style
+            )
+        # 使用原有的智能连线
+        return SmartCardConnection
+
+    def update_card_index(self, card):
+        """卡片位置改变后更新空间索引（索引中的旧位置同时用于记录移动）"""
+        x, y = card.pos().x(), card.pos().y()
+        old = self.card_index.bounds(card)
+        if old is not None and (old[0] != x or old[1] != y):
+            recorder = self._undo_recorder()
+            if recorder is not None:
+                recorder.record_move(card, old[0], old[1])
+        self.card_index.update(card, x, y, x + card.CARD_WIDTH, y + card.CARD_HEIGHT)
+        self.scene_bounds.schedule()  # 场景矩形稍后统一更新
+
+    def mark_connections_dirty(self, card):
+        """卡片移动后标记与其相连的连线需要重新计算路径"""
+        self.connection_cache.mark_dirty(card.card_id)
+
+    def mark_connection_topology_dirty(self):
+        """父子关系改变后，下次绘制前重新同步连线"""
+        self.connection_cache.mark_topology_dirty()
 
-        # 计算箭头方向向量
-        if direction == 'top':
-            arrow_dir = QPointF(0, -1)
-        elif direction == 'right':
-            arrow_dir = QPointF(1, 0)
-        elif direction == 'bottom':
-            arrow_dir = QPointF(0, 1)
-        elif direction == 'left':
-            arrow_dir = QPointF(-1, 0)
-        else:
-            # 默认向下
-            arrow_dir = QPointF(0, 1)
+    def itemChange(self, change, value):
+        """检测卡片位置变化 - 场景级别的检测"""
+        return super().itemChange(change, value)
+    
+    @contextmanager
+    def batch_update(self):
+        """
+        批量修改卡片（布局、对齐、撤销恢复、粘贴）
+        期间卡片移动不再逐个触发自动连接检测和重绘，子树布局请求也先记录下来，
+        最外层退出时统一执行一次：先布局，再对移动过的卡片做自动连接检测，最后重绘
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._commit_batch_update()
+
+    def is_batch_updating(self):
+        """是否处于批量修改中"""
+        return self._batch_depth > 0
+
+    @contextmanager
+    def layout_moves(self):
+        """
+        由程序应用位置（布局结果、撤销 / 重做恢复）
+        期间移动的卡片不做自动连接检测：只有用户拖动的卡片才会自动建立父子关系
+        """
+        self._layout_moving += 1
+        try:
+            yield self
+        finally:
+            self._layout_moving -= 1
 
-        # 箭头大小
-        arrow_size = 12
+    def defer_card_moved(self, card):
+        """批量修改期间记录用户移动过的卡片，提交时统一检测（布局移动的卡片不记录）"""
+        if self._layout_moving:
+            return
+        self._batch_moved_cards[id(card)] = card
 
-        # 计算箭头的三个点
-        perpendicular = QPointF(-arrow_dir.y(), arrow_dir.x())  # 垂直向量
+    def _commit_batch_update(self):
+        """提交批量修改"""
+        layout_roots = list(self._batch_layout_roots.values())
+        moved_cards = list(self._batch_moved_cards.values())
+        self._batch_layout_roots.clear()
+        self._batch_moved_cards.clear()
 
-        arrow_point1 = QPointF(
-            end_point.x() - arrow_size * arrow_dir.x() + arrow_size * 0.4 * perpendicular.x(),
-            end_point.y() - arrow_size * arrow_dir.y() + arrow_size * 0.4 * perpendicular.y()
-        )
-        arrow_point2 = QPointF(
-            end_point.x() - arrow_size * arrow_dir.x() - arrow_size * 0.4 * perpendicular.x(),
-            end_point.y() - arrow_size * arrow_dir.y() - arrow_size * 0.4 * perpendicular.y()
-        )
+        # 提交阶段只处理一遍：其中引发的移动不再逐个检测，避免布局重入
+        self._batch_depth += 1
+        try:
+            self._run_batch_layouts(layout_roots)
+
+            # 自动连接检测引发的布局请求先收集起来，检测完后每棵树只布局一次
+            for card in moved_cards:
+                if card in self.cards:
+                    self.check_auto_connect(card)
+            self._run_batch_layouts(list(self._batch_layout_roots.values()))
+        finally:
+            self._batch_depth -= 1
+            self._batch_moved_cards.clear()
+            self._batch_layout_roots.clear()
 
-        # 绘制箭头
-        arrow = QPolygonF([end_point, arrow_point1, arrow_point2])
-        gradient = QLinearGradient(end_point, arrow_point1)
-        gradient.setColorAt(0, QColor(100, 180, 255))
-        gradient.setColorAt(1, QColor(70, 130, 180))
+        self.update()
 
-        painter.setBrush(gradient)
-        painter.setPen(QPen(QColor(70, 130, 180), 1))
-        painter.drawPolygon(arrow)
+    def _run_batch_layouts(self, layout_roots):
+        """对记录的每棵树执行一次布局"""
+        self._batch_layout_roots.clear()
+        self._batch_committing = True
+        try:
+            done_roots = set()
+            for root_card in layout_roots:
+                # 请求布局后父子关系可能又变了，重新找到当前的根卡片
+                while root_card.parent_card:
+                    root_card = root_card.parent_card
+                if id(root_card) in done_roots or root_card not in self.cards:
+                    continue
+                done_roots.add(id(root_card))
+                self._apply_layout_to_subtree(root_card)
+        finally:
+            self._batch_committing = False
 
-    def itemChange(self, change, value):
-        """检测卡片位置变化 - 场景级别的检测"""
-        return super().itemChange(change, value)
-    
     def check_auto_connect(self, moved_card):
-        """检测并自动建立父子关系"""
-        if not isinstance(moved_card, KnowledgeCard):
+        """检测并自动建立父子关系（布局和撤销 / 重做恢复的位置不触发）"""
+        if not isinstance(moved_card, KnowledgeCard) or self.undo_manager.is_undoing or \
+                self._layout_moving:
             return
         
         # 获取移动卡片的中心位置
@@ -1112,7 +1402,14 @@ class MindMapScene(QGraphicsScene):
         best_parent = None
         min_distance = float('inf')
         
-        for card in self.cards:
+        # 只检查阈值窗口内的网格单元：卡片需要水平覆盖移动卡片的中心，
+        # 且底边在移动卡片底边上方 AUTO_CONNECT_DISTANCE 以内
+        candidates = self.card_index.query(
+            moved_center.x(), moved_bottom - self.AUTO_CONNECT_DISTANCE,
+            moved_center.x(), moved_bottom
+        )
+        
+        for card in candidates:
             if card == moved_card or not isinstance(card, KnowledgeCard):
                 continue
             
@@ -1131,7 +1428,7 @@ class MindMapScene(QGraphicsScene):
                 distance = moved_bottom - card_bottom
                 
                 # 选择最近的卡片作为父节点
-                if distance < min_distance and distance < 300:  # 距离阈值
+                if distance < min_distance and distance < self.AUTO_CONNECT_DISTANCE:  # 距离阈值
                     min_distance = distance
                     best_parent = card
         
@@ -1155,154 +1452,139 @@ class MindMapScene(QGraphicsScene):
     
     def _apply_layout_to_subtree(self, root_card):
         """对子树应用布局算法，固定卡片位置（使用增强的布局引擎）"""
-        if not self.layout_type:
+        if not self.current_layout_type:
             return
         
-        # 优先使用 simple-mind-map 风格的布局引擎
-        try:
-            from .simple_mind_map_layout import SimpleMindMapLayoutEngine
-            
-            if not hasattr(self, '_simple_layout_engine'):
-                self._simple_layout_engine = SimpleMindMapLayoutEngine()
-            
+        # 批量修改期间只记录布局请求，提交时对每棵树布局一次
+        if self._batch_depth > 0 and not self._batch_committing:
+            self._batch_layout_roots[id(root_card)] = root_card
+            return
+        
+        # 使用构造时解析好的布局引擎（参考 simple-mind-map 的 doLayout）
+        layout_engine = self.backend_registry.layout_engine
+        if layout_engine is not None and self.backend_registry.supports_layout_type(self.current_layout_type):
             # 设置根节点中心（使用当前根节点位置，参考 simple-mind-map 的 setNodeCenter）
-            root_center = root_card.get_center_pos()
-            self._simple_layout_engine.set_root_center(root_center)
-            
-            # 映射布局类型（参考 simple-mind-map 的 LAYOUT 常量）
-            layout_type_map = {
-                "mind_map": SimpleMindMapLayoutEngine.LAYOUT_MIND_MAP,
-                "logical": SimpleMindMapLayoutEngine.LAYOUT_LOGICAL_RIGHT,
-                "logical_left": SimpleMindMapLayoutEngine.LAYOUT_LOGICAL_LEFT,
-                "logical_right": SimpleMindMapLayoutEngine.LAYOUT_LOGICAL_RIGHT,
-                "timeline": SimpleMindMapLayoutEngine.LAYOUT_TIMELINE,
-                "timeline_vertical": SimpleMindMapLayoutEngine.LAYOUT_TIMELINE_VERTICAL,
-                "fishbone": SimpleMindMapLayoutEngine.LAYOUT_FISHBONE,
-                "organization": SimpleMindMapLayoutEngine.LAYOUT_ORGANIZATION,
-                "catalog": SimpleMindMapLayoutEngine.LAYOUT_CATALOG,
-            }
-            
-            layout_type = layout_type_map.get(
-                self.layout_type, 
-                SimpleMindMapLayoutEngine.LAYOUT_MIND_MAP
-            )
+            layout_engine.set_root_center(root_card.get_center_pos())
+            layout_type = self.backend_registry.map_layout_type(self.current_layout_type)
+            positions = layout_engine.layout_nodes(root_card, self.cards, layout_type)
             
-            # 应用布局（参考 simple-mind-map 的 doLayout）
-            positions = self._simple_layout_engine.layout_nodes(
-                root_card, self.cards, layout_type
-            )
-            
-            # 应用位置到卡片
-            for card_id, pos in positions.items():
-                card = next((c for c in self.cards if c.card_id == card_id), None)
-                if card:
-                    card.setPos(pos)
-            
-            self.update()
-            return
-        except (ImportError, AttributeError) as e:
-            # 如果 simple-mind-map 布局引擎不可用，尝试使用增强布局引擎
-            try:
-                from .enhanced_layout import EnhancedLayoutEngine
-                
-                if not hasattr(self, '_enhanced_layout_engine'):
-                    self._enhanced_layout_engine = EnhancedLayoutEngine()
-                
-                root_center = root_card.get_center_pos()
-                self._enhanced_layout_engine.set_root_center(root_center)
-                
-                layout_type_map = {
-                    "mind_map": EnhancedLayoutEngine.LAYOUT_MIND_MAP,
-                    "logical": EnhancedLayoutEngine.LAYOUT_LOGICAL,
-                    "timeline": EnhancedLayoutEngine.LAYOUT_TIMELINE,
-                    "fishbone": EnhancedLayoutEngine.LAYOUT_FISHBONE,
-                    "organization": EnhancedLayoutEngine.LAYOUT_ORGANIZATION,
-                }
-                
-                enhanced_layout_type = layout_type_map.get(
-                    self.layout_type, 
-                    EnhancedLayoutEngine.LAYOUT_MIND_MAP
-                )
-                
-                positions = self._enhanced_layout_engine.layout_nodes(
-                    root_card, self.cards, enhanced_layout_type
-                )
-                
+            # 应用位置到卡片（卡片多时移动期间不维护 BSP 索引，结束后重建）
+            with self.batch_update(), self.layout_moves(), self.scene_bounds.bulk_moves(len(positions)):
                 for card_id, pos in positions.items():
-                    card = next((c for c in self.cards if c.card_id == card_id), None)
+                    card = self.cards.get(card_id)
                     if card:
                         card.setPos(pos)
-                
-                self.update()
-                return
-            except (ImportError, AttributeError) as e2:
-                # 如果都不可用，使用原有逻辑
-                print(f"使用原有布局引擎: {e2}")
-        
-        # 原有布局逻辑（作为后备）
-        # 将卡片结构转换为TreeNode
-        from .tree_models import TreeNode
-        
-        def card_to_tree_node(card, parent_node=None):
-            """将卡片转换为TreeNode"""
-            node = TreeNode(
-                card.card_id,
-                card.title_text,
-                parent_node
-            )
-            node.x = card.pos().x()
-            node.y = card.pos().y()
-            node.level = card.level
-            
-            # 递归处理子卡片
-            for child_card in card.child_cards:
-                child_node = card_to_tree_node(child_card, node)
-                node.add_child(child_node)
             
-            return node
-        
-        # 从根卡片开始构建树
-        root_node = card_to_tree_node(root_card)
+            self.update()
+            return
         
-        # 应用布局算法
+        # 布局引擎没有的布局（网络、自动排列）或没有可用引擎时用 LayoutEngine，根卡片保持原位置
         from .layout_engine import LayoutEngine
-        
-        if self.layout_type == "mind_map":
-            LayoutEngine.mind_map(root_node)
-        elif self.layout_type == "logical":
-            LayoutEngine.logical(root_node)
-        elif self.layout_type == "timeline":
-            LayoutEngine.timeline(root_node)
-        elif self.layout_type == "fishbone":
-            LayoutEngine.fishbone(root_node)
-        elif self.layout_type == "auto_arrange":
-            LayoutEngine.auto_arrange(root_node)
-        
-        # 将布局后的位置应用到卡片
-        def apply_positions(node, parent_card=None):
-            """将TreeNode的位置应用到卡片"""
-            # 找到对应的卡片
-            card = None
-            for c in self.cards:
-                if c.card_id == node.id:
-                    card = c
-                    break
-            
-            if card:
-                # 更新卡片位置
-                card.setPos(node.x, node.y)
-                card.level = node.level
-                
-                # 递归处理子节点
-                for i, child_node in enumerate(node.children):
-                    apply_positions(child_node, card)
-        
-        apply_positions(root_node)
+        from .layout_service import TreeSnapshot, compute_tree_layout
+
+        if not hasattr(LayoutEngine, self.current_layout_type):
+            return
+        positions = compute_tree_layout(TreeSnapshot.from_cards(root_card), self.current_layout_type,
+                                        (root_card.pos().x(), root_card.pos().y()))
+        with self.batch_update(), self.layout_moves(), self.scene_bounds.bulk_moves(len(positions)):
+            for card_id, (x, y) in positions.items():
+                card = self.cards.get(card_id)
+                if card:
+                    card.setPos(x, y)
+        self.update()
+
+    def apply_layout_async(self, root_card, on_applied=None, on_failed=None):
+        """
+        在工作线程中对 root_card 所在的树计算布局，完成后在 GUI 线程一次性应用
+        计算期间树被修改（增删卡片、重新挂接、移动根卡片）时丢弃结果并重新计算
+        Args:
+            on_applied: 布局结果应用到卡片后调用（被更新的请求取代时不调用）
+            on_failed: on_failed(异常)，后台计算失败时调用（卡片保持原位置）
+        """
+        if not self.current_layout_type or root_card not in self.cards:
+            return
+        from .layout_service import TreeSnapshot, compute_engine_layout, compute_tree_layout
+
+        while root_card.parent_card:
+            root_card = root_card.parent_card
+        snapshot = TreeSnapshot.from_cards(root_card)
+
+        layout_engine = self.backend_registry.layout_engine
+        if layout_engine is not None and self.backend_registry.supports_layout_type(self.current_layout_type):
+            # 工作线程使用独立的引擎实例，参数与构造时解析好的引擎相同
+            engine_layout_type = self.backend_registry.map_layout_type(self.current_layout_type)
+            compute = functools.partial(
+                compute_engine_layout,
+                engine_cls=type(layout_engine),
+                layout_type=engine_layout_type,
+                margin_x=layout_engine.margin_x,
+                margin_y=layout_engine.margin_y)
+            # 布局结果以根节点中心为基准
+            params = (type(layout_engine).__name__, engine_layout_type,
+                      layout_engine.margin_x, layout_engine.margin_y, snapshot.root_center)
+        else:
+            # 布局引擎没有的布局（网络、自动排列）或没有可用引擎时用 LayoutEngine，根卡片保持原位置
+            from .layout_engine import LayoutEngine
+            if not hasattr(LayoutEngine, self.current_layout_type):
+                return
+            origin = (root_card.pos().x(), root_card.pos().y())
+            compute = functools.partial(compute_tree_layout, layout_name=self.current_layout_type,
+                                        origin=origin)
+            params = ('LayoutEngine', self.current_layout_type, origin)
+
+        # 树没有改变时直接使用缓存的布局结果
+        positions = self.layout_cache.lookup(snapshot, params)
+        if positions is not None:
+            self.layout_service.cancel()
+            self._apply_layout_positions(positions)
+            if on_applied:
+                on_applied()
+            return
+
+        layout_type = self.current_layout_type
+        self.layout_service.submit(
+            snapshot, compute,
+            lambda snap, positions: self._on_async_layout_ready(
+                root_card, snap, positions, layout_type, params, on_applied, on_failed),
+            on_failed)
+
+    def _on_async_layout_ready(self, root_card, snapshot, positions, layout_type, params,
+                               on_applied=None, on_failed=None):
+        """应用后台布局结果（GUI 线程）；结果过期时返回 False"""
+        from .layout_service import TreeSnapshot
+
+        if root_card not in self.cards or layout_type != self.current_layout_type:
+            return False
+        if root_card.parent_card or TreeSnapshot.from_cards(root_card) != snapshot:
+            # 计算期间树已改变，结果作废，按当前树重新计算
+            self.apply_layout_async(root_card, on_applied, on_failed)
+            return False
+
+        self.layout_cache.store(snapshot, params, positions)
+        self._apply_layout_positions(positions)
+        if on_applied:
+            on_applied()
+        return True
+
+    def _apply_layout_positions(self, positions):
+        """把 {卡片id: (x, y)} 一次性应用到卡片"""
+        with self.undo_transaction("应用布局"), self.batch_update(), self.layout_moves(), \
+                self.scene_bounds.bulk_moves(len(positions)):
+            for card_id, (x, y) in positions.items():
+                card = self.cards.get(card_id)
+                if card:
+                    card.setPos(x, y)
         self.update()
 
 
 class MindMapView(QGraphicsView):
-    """思维导图视图 - 支持缩放、平移"""
+    """
+    思维导图视图 - 支持缩放、平移
+    交互质量模式：中键平移、滚轮滚动 / 缩放过程中关闭抗锯齿并按更低的缩放取卡片细节层次，
+    停止操作 INTERACTION_IDLE_MS 毫秒后以完整质量重绘一次；frame_stats 记录每次重绘耗时
+    """
+
+    INTERACTION_IDLE_MS = 150  # 停止操作多久后恢复完整质量
 
     def __init__(self, scene):
         super().__init__(scene)
@@ -1318,6 +1600,17 @@ class MindMapView(QGraphicsView):
         self.is_panning = False
         self.last_pan_point = QPointF()
 
+        # 交互质量模式
+        self.interactive_quality = True  # 关闭后平移 / 缩放时也完整质量绘制
+        self.is_interacting = False
+        self._idle_timer = QTimer(self)
+        self._idle_timer.setSingleShot(True)
+        self._idle_timer.setInterval(self.INTERACTION_IDLE_MS)
+        self._idle_timer.timeout.connect(self._end_interaction)
+
+        # 帧时间统计（get_frame_stats 读取）
+        self.frame_stats = FrameStats()
+
     def wheelEvent(self, event):
         """鼠标滚轮缩放"""
         # Ctrl+滚轮进行缩放
@@ -1334,12 +1627,73 @@ class MindMapView(QGraphicsView):
             # 限制缩放范围
             new_scale = self.scale_factor * factor
             if 0.1 <= new_scale <= 5.0:
+                self._begin_interaction()
                 self.scale(factor, factor)
-                self.scale_factor = new_scale
         else:
             # 普通滚轮滚动
+            self._begin_interaction()
             super().wheelEvent(event)
 
+    def scale(self, sx, sy):
+        """缩放视图（同步 scale_factor 和场景的细节层次）"""
+        super().scale(sx, sy)
+        self._sync_scale_factor()
+
+    def resetTransform(self):
+        """重置缩放"""
+        super().resetTransform()
+        self._sync_scale_factor()
+
+    def _sync_scale_factor(self):
+        """按当前变换更新 scale_factor，并通知场景切换卡片细节层次"""
+        self.scale_factor = self.transform().m11()
+        if self.scene() and hasattr(self.scene(), 'set_view_scale'):
+            self.scene().set_view_scale(self.scale_factor, self.is_interacting)
+
+    # ========== 交互质量模式 ==========
+
+    def set_interactive_quality(self, enabled):
+        """开关交互质量模式"""
+        self.interactive_quality = enabled
+        if not enabled and self.is_interacting:
+            self._end_interaction()
+
+    def _begin_interaction(self):
+        """平移 / 缩放开始或继续：切换到交互质量，重新开始空闲计时"""
+        if not self.interactive_quality:
+            return
+        if not self.is_interacting:
+            self.is_interacting = True
+            self.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+            self.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, False)
+            self._sync_scale_factor()
+        self._idle_timer.start()
+
+    def _end_interaction(self):
+        """停止操作后恢复完整质量并重绘一次"""
+        if not self.is_interacting:
+            return
+        self._idle_timer.stop()
+        self.is_interacting = False
+        self.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        self._sync_scale_factor()
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        """重绘（记录耗时）"""
+        start = time.perf_counter()
+        super().paintEvent(event)
+        self.frame_stats.record((time.perf_counter() - start) * 1000, self.is_interacting)
+
+    def get_frame_stats(self, interactive=None):
+        """
+        最近重绘的耗时统计（见 FrameStats.summary）
+        Args:
+            interactive: True 只看平移 / 缩放中的帧，False 只看完整质量帧，None 全部
+        """
+        return self.frame_stats.summary(interactive)
+
     def mousePressEvent(self, event):
         """鼠标按下事件"""
         # 中键拖动平移
@@ -1355,6 +1709,7 @@ class MindMapView(QGraphicsView):
         """鼠标移动事件"""
         if self.is_panning:
             # 平移视图
+            self._begin_interaction()
             delta = event.pos() - self.last_pan_point
             self.last_pan_point = event.pos()
 
@@ -0,0 +1,46 @@
+"""
+节点大小表 - 缓存 CardVisualNode.get_actual_size() 的结果
+每次布局只按 tree_node 建一次 {tree_node: (宽, 高)} 表，布局算法直接查表，
+不再为每个节点线性扫描 visual_nodes；
+节点内容、标签、图片、形状改变时由节点调用 invalidate() 使缓存失效
+"""
+
+
+class NodeSizeCache:
+    """节点实际大小缓存（跨多次布局复用）"""
+
+    def __init__(self):
+        self._sizes = {}  # tree_node -> (可视化节点, (宽, 高))
+        self.measure_count = 0  # get_actual_size 调用次数（用于确认缓存命中）
+
+    def get(self, visual_node):
+        """获取可视化节点的实际大小（未缓存时计算）"""
+        tree_node = visual_node.tree_node
+        entry = self._sizes.get(tree_node)
+        # 节点被重新创建（刷新场景、撤销恢复）时不能复用旧节点的大小
+        if entry is not None and entry[0] is visual_node:
+            return entry[1]
+
+        self.measure_count += 1
+        size = tuple(visual_node.get_actual_size())
+        self._sizes[tree_node] = (visual_node, size)
+        return size
+
+    def table(self, visual_nodes):
+        """构建本次布局使用的大小表 {tree_node: (宽, 高)}"""
+        return {vn.tree_node: self.get(vn) for vn in visual_nodes}
+
+    def invalidate(self, visual_node):
+        """节点内容/标签/图片/形状改变，下次布局重新计算大小"""
+        self._sizes.pop(visual_node.tree_node, None)
+
+    def discard(self, tree_node):
+        """节点被删除时移除缓存"""
+        self._sizes.pop(tree_node, None)
+
+    def clear(self):
+        """清空缓存（场景清空时调用）"""
+        self._sizes.clear()
+
+    def __len__(self):
+        return len(self._sizes)
@@ -0,0 +1,166 @@
+"""
+重叠消除 - 扫描线算法
+按左边缘从左到右扫描节点，活动集合中只保留与扫描线相交的已放置节点；
+这些节点在 x 方向两两相交且互不重叠，因此按 y 排序后区间互不相交，
+当前节点只需沿 y 向下跳过与它相撞的区间即可找到空位。
+
+每个节点只放置一次、只向下移动，保证终止且没有递归；
+排序和活动集合维护为 O(n log n)，再加上实际发生碰撞的次数
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right
+
+
+class _Block:
+    """活动集合中首尾相接的一串节点（被推开的节点紧贴在上一个节点下方）"""
+
+    __slots__ = ('top', 'bottom', 'members')
+
+    def __init__(self, members):
+        self.members = members  # [(上边缘, 序号, 下边缘)]，按上边缘有序且首尾相接
+        self.top = members[0][0]
+        self.bottom = members[-1][2]
+
+
+def resolve_overlap_rects(rects, h_gap=0, v_gap=0):
+    """
+    消除矩形之间的重叠
+    Args:
+        rects: [(x, y, 宽, 高)]，(x, y) 为左上角
+        h_gap: 水平方向最小间距
+        v_gap: 垂直方向最小间距
+    Returns:
+        调整后的左上角坐标列表 [(x, y)]，与 rects 一一对应（x 不变）
+    """
+    positions = [(x, y) for x, y, _, _ in rects]
+    order = sorted(range(len(rects)), key=lambda i: (rects[i][0], rects[i][1]))
+
+    # 活动集合：首尾相接的节点合并成块，向下推移时一次跳过整块
+    blocks = []  # 按上边缘有序、互不相交的块
+    tops = []  # 与 blocks 对应的上边缘（用于二分查找）
+    block_of = {}  # 序号 -> (所在块, 条目)
+    expiry = []  # 活动节点按右边缘排列的小根堆 (右边缘, 序号)
+
+    def set_block(block, k=None):
+        """把块放到 blocks[k]（k 为 None 时插入到有序位置）"""
+        if k is None:
+            k = bisect_left(tops, block.top)
+            blocks.insert(k, block)
+            tops.insert(k, block.top)
+        else:
+            blocks[k] = block
+            tops[k] = block.top
+
+    def repoint(block, members):
+        for member in members:
+            block_of[member[1]] = (block, member)
+
+    def remove(i):
+        """从活动集合移除节点，所在块在该节点处断开"""
+        block, member = block_of.pop(i)
+        k = bisect_left(tops, block.top)
+        idx = bisect_left(block.members, member)
+        upper, lower = block.members[:idx], block.members[idx + 1:]
+
+        # 较长的一段沿用原块，只为较短的一段重新登记（均摊 O(n log n)）
+        if len(upper) >= len(lower):
+            keep, other = upper, lower
+        else:
+            keep, other = lower, upper
+
+        del blocks[k]
+        del tops[k]
+        if keep:
+            block.members = keep
+            block.top, block.bottom = keep[0][0], keep[-1][2]
+            set_block(block)
+        if other:
+            other_block = _Block(other)
+            repoint(other_block, other)
+            set_block(other_block)
+
+    for i in order:
+        x, y, w, h = rects[i]
+        w += h_gap
+        h += v_gap
+
+        # 右边缘不超过当前左边缘的节点不会再与后续节点相交
+        while expiry and expiry[0][0] <= x:
+            remove(heapq.heappop(expiry)[1])
+
+        # 没有面积的节点不会与任何节点重叠
+        if w <= 0 or h <= 0:
+            continue
+
+        # 从覆盖 y 的块（或 y 之下的第一个块）开始，向下跳过所有相撞的块
+        k = bisect_right(tops, y)
+        if k > 0 and blocks[k - 1].bottom > y:
+            k -= 1
+        while k < len(blocks) and blocks[k].top < y + h:
+            y = max(y, blocks[k].bottom)
+            k += 1
+
+        positions[i] = (x, y)
+        member = (y, i, y + h)
+        heapq.heappush(expiry, (x + w, i))
+
+        # 与上下紧贴的块合并
+        prev = blocks[k - 1] if k > 0 and blocks[k - 1].bottom == y else None
+        nxt = blocks[k] if k < len(blocks) and blocks[k].top == y + h else None
+        if prev is None and nxt is None:
+            block = _Block([member])
+            block_of[i] = (block, member)
+            blocks.insert(k, block)
+            tops.insert(k, y)
+        elif nxt is None:
+            prev.members.append(member)
+            prev.bottom = y + h
+            block_of[i] = (prev, member)
+        elif prev is None:
+            nxt.members.insert(0, member)
+            nxt.top = y
+            tops[k] = y
+            block_of[i] = (nxt, member)
+        else:
+            # 三段合并：沿用较长的块，只为较短的块重新登记
+            del blocks[k]
+            del tops[k]
+            members = prev.members + [member] + nxt.members
+            block, other = (prev, nxt) if len(prev.members) >= len(nxt.members) else (nxt, prev)
+            block.members = members
+            block.top, block.bottom = members[0][0], members[-1][2]
+            repoint(block, other.members)
+            block_of[i] = (block, member)
+            set_block(block, k - 1)
+
+    return positions
+
+
+def iter_tree(root):
+    """前序遍历树节点（非递归，深层树不会超出递归深度；不进入折叠的子树）"""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        if not getattr(node, 'collapsed', False):
+            stack.extend(reversed(node.children))
+
+
+def resolve_tree_overlaps(root, get_node_size=None, h_gap=0, v_gap=0):
+    """
+    消除树中节点的重叠（直接修改 node.x / node.y）
+    Args:
+        root: 根节点（具有 x, y, children 属性）
+        get_node_size: 返回节点 (宽, 高) 的函数；为 None 时节点视为点
+        h_gap: 水平方向最小间距
+        v_gap: 垂直方向最小间距
+    """
+    nodes = list(iter_tree(root))
+    rects = []
+    for node in nodes:
+        w, h = get_node_size(node) if get_node_size else (0, 0)
+        rects.append((node.x, node.y, w, h))
+
+    for node, (x, y) in zip(nodes, resolve_overlap_rects(rects, h_gap, v_gap)):
+        node.y = y
@@ -0,0 +1,124 @@
+"""
+场景范围与索引调优 - 大导图的场景矩形随内容伸缩，BSP 索引深度按图形项数量设置
+
+场景矩形不再固定为 (-2000, -2000, 4000, 4000)：导入的 XMind 树和 AI 生成的大图经常超出这个范围。
+图形项增删、移动时只记录"需要更新"，SCENE_RECT_UPDATE_MS 毫秒后按图形项包围盒（外扩 margin）统一计算一次；
+内容缩小时场景矩形也随之缩小（至少保留最小范围），但只在差距超过 margin 的一半时才调整，避免滚动条来回跳动
+
+Qt 默认按场景矩形大小决定 BSP 树深度，与图形项数量无关；这里按平均每个叶子约 ITEMS_PER_LEAF 个卡片设置深度
+（卡片数由场景提供，不在每次更新时用 scene.items() 生成全部图形项的列表）。
+批量移动（布局、对齐、撤销恢复）时可以临时切换到 NoIndex，结束后重新建立 BSP 索引：
+逐个 setPos 时 BSP 索引每次都要删除再插入，项数多时不如移动完重建一次
+"""
+
+import math
+from contextlib import contextmanager
+
+from PyQt6.QtCore import QRectF, QTimer
+from PyQt6.QtWidgets import QGraphicsScene
+
+DEFAULT_SCENE_RECT = QRectF(-2000, -2000, 4000, 4000)  # 场景矩形的最小范围（原来的固定范围）
+SCENE_RECT_MARGIN = 1000  # 包围盒四周留出的空白
+SCENE_RECT_UPDATE_MS = 100  # 合并场景矩形更新的间隔
+
+ITEMS_PER_LEAF = 8  # BSP 每个叶子的目标卡片数
+MIN_BSP_DEPTH = 5  # 与 Qt 自动深度的下限一致
+MAX_BSP_DEPTH = 18
+BULK_NO_INDEX_MIN_ITEMS = 500  # 批量移动的卡片少于此数时不切换索引（重建索引反而更慢）
+
+
+def bsp_depth_for_count(count):
+    """按卡片数量计算 BSP 树深度（平均每个叶子 ITEMS_PER_LEAF 个卡片）"""
+    if count <= ITEMS_PER_LEAF:
+        return MIN_BSP_DEPTH
+    return max(MIN_BSP_DEPTH, min(MAX_BSP_DEPTH, math.ceil(math.log2(count / ITEMS_PER_LEAF))))
+
+
+class SceneBounds:
+    """
+    管理一个场景的场景矩形和索引（每个场景一个）
+    场景在图形项增删、移动后调用 schedule()；批量移动放在 bulk_moves() 中
+    Args:
+        item_count: 返回场景中卡片（节点）数量的函数，用于设置 BSP 深度
+    """
+
+    def __init__(self, scene, item_count, minimum_rect=DEFAULT_SCENE_RECT, margin=SCENE_RECT_MARGIN):
+        self.scene = scene
+        self.item_count = item_count
+        self.minimum_rect = QRectF(minimum_rect)
+        self.margin = margin
+        self.no_index_for_bulk_moves = True  # 批量移动时是否临时切换到 NoIndex（设置中可关闭）
+        self.update_count = 0  # 实际修改场景矩形的次数
+        self._bulk_depth = 0
+        self._bsp_depth = 0
+        self._timer = QTimer(scene)  # 随场景销毁，不会在场景删除后触发
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.update_now)
+        scene.setSceneRect(self.minimum_rect)
+
+    def schedule(self):
+        """图形项增删或移动后调用：稍后统一更新场景矩形（批量移动期间推迟到结束时）"""
+        if self._bulk_depth == 0 and not self._timer.isActive():
+            self._timer.start(SCENE_RECT_UPDATE_MS)
+
+    def update_now(self):
+        """立即按图形项包围盒更新场景矩形和 BSP 深度"""
+        self._timer.stop()
+        scene = self.scene
+        self.tune_index()
+
+        bounds = scene.itemsBoundingRect()
+        target = self.minimum_rect if bounds.isNull() else self.minimum_rect.united(
+            bounds.adjusted(-self.margin, -self.margin, self.margin, self.margin))
+        current = scene.sceneRect()
+        if current.contains(bounds) and not self._differs(current, target, self.margin / 2):
+            return
+        scene.setSceneRect(target)
+        self.update_count += 1
+
+    @staticmethod
+    def _differs(a, b, tolerance):
+        """两个矩形任意一边相差超过 tolerance"""
+        return (abs(a.left() - b.left()) > tolerance or abs(a.top() - b.top()) > tolerance or
+                abs(a.right() - b.right()) > tolerance or abs(a.bottom() - b.bottom()) > tolerance)
+
+    def tune_index(self):
+        """按当前卡片数量设置 BSP 树深度（深度改变时 Qt 重建索引）"""
+        scene = self.scene
+        if scene.itemIndexMethod() != QGraphicsScene.ItemIndexMethod.BspTreeIndex:
+            return
+        depth = bsp_depth_for_count(self.item_count())
+        if depth != self._bsp_depth:
+            self._bsp_depth = depth
+            scene.setBspTreeDepth(depth)
+
+    @contextmanager
+    def bulk_moves(self, count=None):
+        """
+        批量移动图形项
+        期间不更新场景矩形；移动的图形项足够多时临时切换到 NoIndex，最外层结束时重建 BSP 索引
+        Args:
+            count: 将要移动的卡片数（None 表示按场景中的卡片数判断）
+        """
+        scene = self.scene
+        switch = False
+        if self._bulk_depth == 0 and self.no_index_for_bulk_moves and \
+                scene.itemIndexMethod() == QGraphicsScene.ItemIndexMethod.BspTreeIndex:
+            if count is None:
+                count = self.item_count()
+            switch = count >= BULK_NO_INDEX_MIN_ITEMS
+        if switch:
+            scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
+        self._bulk_depth += 1
+        try:
+            yield
+        finally:
+            self._bulk_depth -= 1
+            if switch:
+                scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.BspTreeIndex)
+                self._bsp_depth = 0  # 新索引使用默认深度，下面重新设置
+            if self._bulk_depth == 0:
+                self.update_now()
+
+    def is_bulk_moving(self):
+        return self._bulk_depth > 0
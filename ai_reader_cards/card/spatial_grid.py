@@ -0,0 +1,94 @@
+"""
+均匀网格空间索引 - 按矩形包围盒登记对象，支持增量更新和区域查询
+用于连线视口裁剪（connection_cache）和自动连接的父节点检测（MindMapScene）
+"""
+
+import math
+
+
+class SpatialGrid:
+    """均匀网格空间索引"""
+
+    def __init__(self, cell_size=512):
+        self.cell_size = cell_size
+        self._bounds = {}  # key -> 包围盒 (x1, y1, x2, y2)
+        self._cells_by_key = {}  # key -> 所在网格单元列表
+        self._grid = {}  # 网格单元 (col, row) -> key 集合
+
+    def _cell_bounds(self, x1, y1, x2, y2):
+        """包围盒覆盖的网格单元范围 (首列, 末列, 首行, 末行)"""
+        size = self.cell_size
+        return (math.floor(x1 / size), math.floor(x2 / size),
+                math.floor(y1 / size), math.floor(y2 / size))
+
+    def _cell_range(self, x1, y1, x2, y2):
+        """包围盒覆盖的网格单元"""
+        c1, c2, r1, r2 = self._cell_bounds(x1, y1, x2, y2)
+        return [(c, r) for c in range(c1, c2 + 1) for r in range(r1, r2 + 1)]
+
+    def update(self, key, x1, y1, x2, y2):
+        """登记或更新对象的包围盒"""
+        cells = self._cell_range(x1, y1, x2, y2)
+        old_cells = self._cells_by_key.get(key)
+        self._bounds[key] = (x1, y1, x2, y2)
+        if old_cells == cells:
+            return
+        if old_cells:
+            self._remove_from_cells(key, old_cells)
+        self._cells_by_key[key] = cells
+        for cell in cells:
+            self._grid.setdefault(cell, set()).add(key)
+
+    def remove(self, key):
+        """移除对象（不存在时忽略）"""
+        self._bounds.pop(key, None)
+        cells = self._cells_by_key.pop(key, None)
+        if cells:
+            self._remove_from_cells(key, cells)
+
+    def _remove_from_cells(self, key, cells):
+        for cell in cells:
+            keys = self._grid.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._grid[cell]
+
+    def query(self, x1, y1, x2, y2):
+        """返回包围盒与查询区域相交的对象"""
+        c1, c2, r1, r2 = self._cell_bounds(x1, y1, x2, y2)
+
+        # 查询区域覆盖的网格单元比已占用的单元还多时（如缩小到整张图），直接遍历全部对象
+        # （先按行列数计算单元数，不为很大的查询区域生成单元列表）
+        if (c2 - c1 + 1) * (r2 - r1 + 1) > len(self._grid):
+            candidates = self._bounds.keys()
+        else:
+            candidates = set()
+            for c in range(c1, c2 + 1):
+                for r in range(r1, r2 + 1):
+                    keys = self._grid.get((c, r))
+                    if keys:
+                        candidates.update(keys)
+
+        result = []
+        for key in candidates:
+            bx1, by1, bx2, by2 = self._bounds[key]
+            if bx1 <= x2 and bx2 >= x1 and by1 <= y2 and by2 >= y1:
+                result.append(key)
+        return result
+
+    def bounds(self, key):
+        """对象的包围盒（未登记时返回 None）"""
+        return self._bounds.get(key)
+
+    def clear(self):
+        """清空索引"""
+        self._bounds.clear()
+        self._cells_by_key.clear()
+        self._grid.clear()
+
+    def __contains__(self, key):
+        return key in self._bounds
+
+    def __len__(self):
+        return len(self._bounds)
@@ -0,0 +1,110 @@
+"""
+静态文本 - 卡片在 paint() 中直接绘制的缓存文本块
+代替每张卡片的 QGraphicsTextItem 子项：QGraphicsTextItem 各自持有一个 QTextDocument，
+并作为独立图形项进入场景索引，卡片多时内存和索引开销都很大
+
+StaticTextBlock 只保存文本、位置和排版好的 QStaticText（字形位置），
+文本或宽度改变时才重新排版；保留 setPos / setPlainText / pos / toPlainText 接口，
+原来操作文本子项的代码不需要修改
+"""
+
+from PyQt6.QtCore import QPointF, QRectF, Qt
+from PyQt6.QtGui import QFont, QStaticText
+
+# 与 QGraphicsTextItem 的默认文档边距一致，替换前后文字位置不变
+DOCUMENT_MARGIN = 4
+
+_fonts = {}
+
+
+def shared_font(family, point_size, weight=None):
+    """同一字体在所有卡片之间共享一个 QFont（首次使用时创建）"""
+    key = (family, point_size, weight)
+    font = _fonts.get(key)
+    if font is None:
+        font = QFont(family, point_size) if weight is None else QFont(family, point_size, weight)
+        _fonts[key] = font
+    return font
+
+
+class StaticTextBlock:
+    """卡片内的一段静态文本（由卡片的 paint 绘制，不是图形项）"""
+
+    __slots__ = ('owner', 'font', 'color', '_pos', '_text', '_width', '_static')
+
+    def __init__(self, owner, text, font, color, x=0, y=0, width=None):
+        """
+        Args:
+            owner: 所属卡片（位置或文本改变时重绘）
+            text: 纯文本
+            font: 字体（建议用 shared_font）
+            color: 文字颜色
+            x, y: 相对卡片的位置（与 QGraphicsTextItem.setPos 含义相同）
+            width: 文本宽度（含边距，超出自动换行），None 表示不换行
+        """
+        self.owner = owner
+        self.font = font
+        self.color = color
+        self._pos = QPointF(x, y)
+        self._text = text
+        self._width = width
+        self._static = None
+
+    def toPlainText(self):
+        return self._text
+
+    def setPlainText(self, text):
+        """修改文本（文本不变时保留已有排版）"""
+        if text != self._text:
+            self._text = text
+            self._static = None
+            self.owner.update()
+
+    def setTextWidth(self, width):
+        """修改文本宽度（宽度不变时保留已有排版）"""
+        if width != self._width:
+            self._width = width
+            self._static = None
+            self.owner.update()
+
+    def pos(self):
+        return QPointF(self._pos)
+
+    def setPos(self, x, y=None):
+        """修改位置（不需要重新排版）"""
+        pos = QPointF(x) if y is None else QPointF(x, y)
+        if pos != self._pos:
+            self._pos = pos
+            self.owner.update()
+
+    def _prepared(self):
+        """排版好的 QStaticText（文本或宽度改变后第一次绘制时重新排版）"""
+        if self._static is None:
+            static_text = QStaticText(self._text)
+            static_text.setTextFormat(Qt.TextFormat.PlainText)
+            static_text.setPerformanceHint(QStaticText.PerformanceHint.AggressiveCaching)
+            if self._width is not None:
+                static_text.setTextWidth(max(0, self._width - 2 * DOCUMENT_MARGIN))
+            static_text.prepare(font=self.font)
+            self._static = static_text
+        return self._static
+
+    def boundingRect(self):
+        """相对卡片的文本区域（含边距）"""
+        size = self._prepared().size()
+        width = self._width if self._width is not None else size.width() + 2 * DOCUMENT_MARGIN
+        return QRectF(self._pos.x(), self._pos.y(), width, size.height() + 2 * DOCUMENT_MARGIN)
+
+    def paint(self, painter):
+        if not self._text:
+            return
+        painter.setFont(self.font)
+        painter.setPen(self.color)
+        painter.drawStaticText(self._pos + QPointF(DOCUMENT_MARGIN, DOCUMENT_MARGIN), self._prepared())
+
+
+def paint_text_blocks(painter, blocks):
+    """按顺序绘制文本块（跳过 None）"""
+    for block in blocks:
+        if block is not None:
+            block.paint(painter)
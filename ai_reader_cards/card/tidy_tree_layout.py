@@ -0,0 +1,413 @@
+"""
+线性时间整齐树布局 - Buchheim / Walker 算法
+按节点实际大小（get_actual_size）计算兄弟子树之间的间距，
+思维导图、逻辑结构图（左/右）、组织结构图、目录组织图都是 O(n)，
+时间轴、鱼骨图等其他布局沿用 EnhancedLayoutEngine
+
+基准测试（10k 节点）：python -m ai_reader_cards.card.tidy_tree_layout
+"""
+
+from typing import List, Dict
+from PyQt6.QtCore import QPointF
+
+from .enhanced_layout import EnhancedLayoutEngine
+
+
+class TidyTreeLayoutEngine(EnhancedLayoutEngine):
+    """整齐树布局引擎（接口与 EnhancedLayoutEngine 相同）"""
+
+    def layout_nodes(self, root_card, cards: List, layout_type: str = EnhancedLayoutEngine.LAYOUT_MIND_MAP) -> Dict:
+        """
+        布局节点
+        Args:
+            root_card: 根节点卡片
+            cards: 所有卡片列表
+            layout_type: 布局类型
+        Returns:
+            {card_id: QPointF(left, top)}
+        """
+        if layout_type == self.LAYOUT_MIND_MAP:
+            return self._tidy_mind_map(root_card, cards)
+        elif layout_type in [self.LAYOUT_LOGICAL_LEFT, self.LAYOUT_LOGICAL_RIGHT]:
+            return self._tidy_logical(root_card, cards, layout_type == self.LAYOUT_LOGICAL_LEFT)
+        elif layout_type == self.LAYOUT_ORGANIZATION:
+            return self._tidy_organization(root_card, cards)
+        elif layout_type == self.LAYOUT_CATALOG:
+            return self._tidy_catalog(root_card, cards)
+        return super().layout_nodes(root_card, cards, layout_type)
+
+    # ========== 树结构 ==========
+
+    @staticmethod
+    def _node_size(card):
+        """节点实际大小 (宽, 高)"""
+        if hasattr(card, 'get_actual_size'):
+            return card.get_actual_size()
+        width = getattr(card, 'CARD_WIDTH', getattr(card, 'WIDTH', 0))
+        height = getattr(card, 'CARD_HEIGHT', getattr(card, 'HEIGHT', 0))
+        return width, height
+
+    def _build_tree(self, root_card, cards: List):
+        """
+        构建以整数下标表示的树（收起的节点不展开子树）
+        Returns:
+            (节点卡片列表, 子节点下标列表, 宽度列表, 高度列表, 层级列表)，根节点下标为 0
+        """
+        children_by_parent = {}
+        for card in cards:
+            parent = card.parent_card
+            if parent is not None:
+                children_by_parent.setdefault(id(parent), []).append(card)
+
+        nodes = [root_card]
+        children = [[]]
+        depth = [0]
+        stack = [0]
+        while stack:
+            v = stack.pop()
+            card = nodes[v]
+            if not getattr(card, 'is_expanded', True):
+                continue
+            for child_card in children_by_parent.get(id(card), ()):
+                w = len(nodes)
+                nodes.append(child_card)
+                children.append([])
+                depth.append(depth[v] + 1)
+                children[v].append(w)
+                stack.append(w)
+
+        widths = []
+        heights = []
+        for card in nodes:
+            width, height = self._node_size(card)
+            widths.append(width)
+            heights.append(height)
+        return nodes, children, widths, heights, depth
+
+    # ========== Buchheim / Walker 算法 ==========
+
+    def _tidy(self, root, children, sizes, gap):
+        """
+        计算子树在横向（垂直于生长方向）上的中心坐标
+        Args:
+            root: 根节点下标
+            children: 子节点下标列表（只使用从 root 可达的部分）
+            sizes: 节点在横向上的尺寸
+            gap: 相邻节点之间的最小间距
+        Returns:
+            {节点下标: 中心坐标}（根节点为 0）
+        """
+        # 后序遍历顺序（迭代实现，避免深树递归溢出）
+        order = []
+        stack = [root]
+        while stack:
+            v = stack.pop()
+            order.append(v)
+            stack.extend(children[v])
+        order.reverse()
+
+        parent = {root: None}
+        number = {root: 0}
+        for v in order:
+            for i, w in enumerate(children[v]):
+                parent[w] = v
+                number[w] = i
+
+        prelim = dict.fromkeys(order, 0.0)
+        mod = dict.fromkeys(order, 0.0)
+        shift = dict.fromkeys(order, 0.0)
+        change = dict.fromkeys(order, 0.0)
+        thread = dict.fromkeys(order)
+        ancestor = {v: v for v in order}
+
+        def next_left(v):
+            kids = children[v]
+            return kids[0] if kids else thread[v]
+
+        def next_right(v):
+            kids = children[v]
+            return kids[-1] if kids else thread[v]
+
+        def separation(a, b):
+            return (sizes[a] + sizes[b]) / 2 + gap
+
+        def move_subtree(wm, wp, amount):
+            subtrees = number[wp] - number[wm]
+            change[wp] -= amount / subtrees
+            shift[wp] += amount
+            change[wm] += amount / subtrees
+            prelim[wp] += amount
+            mod[wp] += amount
+
+        def apportion(v, default_ancestor):
+            siblings = children[parent[v]]
+            if number[v] == 0:
+                return default_ancestor
+            vip = vop = v
+            vim = siblings[number[v] - 1]
+            vom = siblings[0]
+            sip = mod[vip]
+            sop = mod[vop]
+            sim = mod[vim]
+            som = mod[vom]
+            while True:
+                nr = next_right(vim)
+                nl = next_left(vip)
+                if nr is None or nl is None:
+                    break
+                vim = nr
+                vip = nl
+                vom = next_left(vom)
+                vop = next_right(vop)
+                ancestor[vop] = v
+                amount = (prelim[vim] + sim) - (prelim[vip] + sip) + separation(vim, vip)
+                if amount > 0:
+                    a = ancestor[vim]
+                    if parent.get(a) != parent[v]:
+                        a = default_ancestor
+                    move_subtree(a, v, amount)
+                    sip += amount
+                    sop += amount
+                sim += mod[vim]
+                sip += mod[vip]
+                som += mod[vom]
+                sop += mod[vop]
+            if next_right(vim) is not None and next_right(vop) is None:
+                thread[vop] = next_right(vim)
+                mod[vop] += sim - sop
+            if next_left(vip) is not None and next_left(vom) is None:
+                thread[vom] = next_left(vip)
+                mod[vom] += sip - som
+                default_ancestor = v
+            return default_ancestor
+
+        def set_prelim(v):
+            # Walker 的 firstWalk 中依赖左兄弟的那一部分（左兄弟已完成 apportion）
+            kids = children[v]
+            left = children[parent[v]][number[v] - 1] if parent[v] is not None and number[v] > 0 else None
+            if not kids:
+                prelim[v] = prelim[left] + separation(left, v) if left is not None else 0.0
+                return
+            midpoint = (prelim[kids[0]] + prelim[kids[-1]]) / 2
+            if left is not None:
+                prelim[v] = prelim[left] + separation(left, v)
+                mod[v] = prelim[v] - midpoint
+            else:
+                prelim[v] = midpoint
+
+        def execute_shifts(v):
+            total_shift = 0.0
+            total_change = 0.0
+            for w in reversed(children[v]):
+                prelim[w] += total_shift
+                mod[w] += total_shift
+                total_change += change[w]
+                total_shift += shift[w] + total_change
+
+        # 第一遍（后序）：子树内部定位并与左侧兄弟子树分开
+        for v in order:
+            kids = children[v]
+            if not kids:
+                continue
+            default_ancestor = kids[0]
+            for w in kids:
+                set_prelim(w)
+                default_ancestor = apportion(w, default_ancestor)
+            execute_shifts(v)
+        set_prelim(root)
+
+        # 第二遍（前序）：累加 mod 得到最终坐标
+        result = {}
+        stack = [(root, -prelim[root])]
+        while stack:
+            v, mod_sum = stack.pop()
+            result[v] = prelim[v] + mod_sum
+            child_mod = mod_sum + mod[v]
+            for w in children[v]:
+                stack.append((w, child_mod))
+        return result
+
+    def _root_center(self):
+        return self.root_node_center or QPointF(400, 300)
+
+    def _layer_offsets(self, nodes, depth, sizes):
+        """
+        按层分配生长方向上的位置：每层占该层最大节点尺寸，层间距按层级取 margin_x
+        （整齐树按层比较轮廓，各层对齐后不同层的节点不会重叠）
+        Args:
+            nodes: 参与布局的节点下标
+            sizes: 节点在生长方向上的尺寸
+        Returns:
+            每层起始位置相对根节点起始边的偏移列表
+        """
+        layer_sizes = []
+        for v in nodes:
+            d = depth[v]
+            while len(layer_sizes) <= d:
+                layer_sizes.append(0)
+            layer_sizes[d] = max(layer_sizes[d], sizes[v])
+
+        offsets = [0.0]
+        for d in range(1, len(layer_sizes)):
+            margin = max(self._get_margin_x(d), 10)
+            offsets.append(offsets[d - 1] + layer_sizes[d - 1] + margin)
+        return offsets
+
+    def _grow_horizontal(self, nodes, widths, depth, lefts, grow_left):
+        """沿水平方向生长：每层的节点靠近父节点一侧对齐"""
+        offsets = self._layer_offsets(nodes, depth, widths)
+        root_left = lefts[0]
+        root_right = root_left + widths[0]
+        for v in nodes:
+            d = depth[v]
+            if d == 0:
+                continue
+            if grow_left:
+                # 第 d 层的右边界 = 根节点左边 - (第 d 层偏移 - 根节点宽度)
+                lefts[v] = root_left - (offsets[d] - widths[0]) - widths[v]
+            else:
+                lefts[v] = root_right + (offsets[d] - widths[0])
+
+    # ========== 各布局类型 ==========
+
+    def _tidy_mind_map(self, root_card, cards: List) -> Dict:
+        """思维导图布局：根节点子节点按索引交替分到右侧（偶数）和左侧（奇数）"""
+        nodes, children, widths, heights, depth = self._build_tree(root_card, cards)
+        center = self._root_center()
+        gap = max(self._get_margin_y(1), 10)
+
+        lefts = [0.0] * len(nodes)
+        tops = [0.0] * len(nodes)
+        lefts[0] = center.x() - widths[0] / 2
+        tops[0] = center.y() - heights[0] / 2
+
+        root_children = children[0]
+        for side_children, grow_left in ((root_children[0::2], False), (root_children[1::2], True)):
+            if not side_children:
+                continue
+            children[0] = side_children
+            cross = self._tidy(0, children, heights, gap)
+            for v, y in cross.items():
+                if v != 0:
+                    tops[v] = center.y() + y - heights[v] / 2
+            self._grow_horizontal(list(cross), widths, depth, lefts, grow_left)
+        children[0] = root_children
+
+        return self._positions(nodes, lefts, tops)
+
+    def _tidy_logical(self, root_card, cards: List, use_left: bool = False) -> Dict:
+        """逻辑结构图布局：所有子节点向同一侧生长"""
+        nodes, children, widths, heights, depth = self._build_tree(root_card, cards)
+        center = self._root_center()
+        gap = max(self._get_margin_y(1), 10)
+
+        lefts = [0.0] * len(nodes)
+        tops = [0.0] * len(nodes)
+        lefts[0] = center.x() - widths[0] / 2
+
+        cross = self._tidy(0, children, heights, gap)
+        for v, y in cross.items():
+            tops[v] = center.y() + y - heights[v] / 2
+        self._grow_horizontal(list(cross), widths, depth, lefts, use_left)
+
+        return self._positions(nodes, lefts, tops)
+
+    def _tidy_organization(self, root_card, cards: List) -> Dict:
+        """组织结构图布局：自上而下生长，兄弟子树水平排开"""
+        nodes, children, widths, heights, depth = self._build_tree(root_card, cards)
+        center = self._root_center()
+        gap = max(self._get_margin_y(1), 10)
+
+        lefts = [0.0] * len(nodes)
+        tops = [0.0] * len(nodes)
+        tops[0] = center.y() - heights[0] / 2
+
+        cross = self._tidy(0, children, widths, gap)
+        for v, x in cross.items():
+            lefts[v] = center.x() + x - widths[v] / 2
+
+        offsets = self._layer_offsets(list(cross), depth, heights)
+        for v in cross:
+            tops[v] = tops[0] + offsets[depth[v]]
+
+        return self._positions(nodes, lefts, tops)
+
+    def _tidy_catalog(self, root_card, cards: List) -> Dict:
+        """
+        目录组织图布局：根节点的子节点在下方水平排成一行，
+        更深的节点按目录顺序在所属列中逐行向下排列（每层缩进父节点宽度的一半）
+        """
+        nodes, children, widths, heights, depth = self._build_tree(root_card, cards)
+        center = self._root_center()
+        margin_x = self.margin_x
+        margin_y = self.margin_y
+
+        lefts = [0.0] * len(nodes)
+        tops = [0.0] * len(nodes)
+        lefts[0] = center.x() - widths[0] / 2
+        tops[0] = center.y() - heights[0] / 2
+
+        # 每一列：相对列左边的缩进和列宽（包含缩进后的所有后代）
+        columns = []
+        for column_root in children[0]:
+            indents = {column_root: 0.0}
+            column_width = widths[column_root]
+            top = tops[0] + heights[0] + margin_x
+            stack = [column_root]
+            while stack:
+                v = stack.pop()
+                tops[v] = top
+                top += heights[v] + margin_y
+                column_width = max(column_width, indents[v] + widths[v])
+                for w in reversed(children[v]):
+                    indents[w] = indents[v] + widths[v] * 0.5
+                    stack.append(w)
+            columns.append((indents, column_width))
+
+        total_width = sum(width for _, width in columns) + max(len(columns) - 1, 0) * margin_x
+        column_left = center.x() - total_width / 2
+        for indents, column_width in columns:
+            for v, indent in indents.items():
+                lefts[v] = column_left + indent
+            column_left += column_width + margin_x
+
+        return self._positions(nodes, lefts, tops)
+
+    @staticmethod
+    def _positions(nodes, lefts, tops) -> Dict:
+        return {card.card_id: QPointF(lefts[v], tops[v]) for v, card in enumerate(nodes)}
+
+
+if __name__ == "__main__":
+    # 基准测试：python -m ai_reader_cards.card.tidy_tree_layout [节点数]
+    import random
+    import sys
+    import time
+
+    class _BenchCard:
+        CARD_WIDTH = 280
+        CARD_HEIGHT = 180
+
+        def __init__(self, card_id, parent_card, width, height):
+            self.card_id = card_id
+            self.parent_card = parent_card
+            self._size = (width, height)
+
+        def get_actual_size(self):
+            return self._size
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = random.Random(0)
+    bench_cards = []
+    for i in range(count):
+        # 前 1/10 的节点作为内部节点，形成分支数不均匀的“茂密”树
+        parent = bench_cards[rng.randrange(max(1, i // 10 + 1))] if i else None
+        bench_cards.append(_BenchCard(i, parent, rng.randint(120, 320), rng.randint(60, 220)))
+
+    engine = TidyTreeLayoutEngine()
+    for name in (engine.LAYOUT_MIND_MAP, engine.LAYOUT_LOGICAL_RIGHT, engine.LAYOUT_LOGICAL_LEFT,
+                 engine.LAYOUT_ORGANIZATION, engine.LAYOUT_CATALOG):
+        start = time.perf_counter()
+        result = engine.layout_nodes(bench_cards[0], bench_cards, name)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<16} {len(result):>6} 个节点  {elapsed * 1000:8.1f} ms")
@@ -0,0 +1,404 @@
+"""
+撤销命令 - 历史记录只保存一次操作的变化量，不再保存整张导图
+变化量包括：移动、内容编辑、父子关系改变、添加 / 删除卡片（含子树中的每张卡片）
+
+场景在一次操作（事务）期间用 DeltaRecorder 记录被修改卡片的原始值（每张卡片只记第一次），
+提交时与卡片的当前值比较生成 CardDelta；撤销 / 重做只处理记录中的卡片，代价与变化量成正比
+命令中的数据都是普通 Python 对象，按 card_id 引用卡片（卡片被删除后重新创建也能找到）
+"""
+
+import pickle
+import time
+from datetime import datetime
+
+# 可编辑的内容字段：to_dict 中的键 -> KnowledgeCard 属性
+CONTENT_FIELDS = {
+    'title': 'title_text',
+    'question': 'question_text',
+    'answer': 'answer_text',
+    'source_text': 'source_text',
+    'source_text_start': 'source_text_start',
+    'source_text_end': 'source_text_end',
+}
+
+
+def card_content(card):
+    """卡片的内容字段 {键: 值}"""
+    return {key: getattr(card, attr, None) for key, attr in CONTENT_FIELDS.items()}
+
+
+def parent_ref(card):
+    """卡片在树中的位置 (父卡片id, 在父卡片 child_cards 中的下标)"""
+    parent = card.parent_card
+    if parent is None:
+        return None, -1
+    index = parent.child_cards.index(card) if card in parent.child_cards else -1
+    return parent.card_id, index
+
+
+def card_state(card):
+    """重新创建卡片所需的全部数据（to_dict 的内容 + 源文本、在父卡片中的下标、子卡片id）"""
+    state = card.to_dict()
+    state.update(card_content(card))
+    state['index'] = parent_ref(card)[1]
+    state['child_ids'] = [child.card_id for child in card.child_cards]
+    return state
+
+
+def snapshot_state(card):
+    """完整快照中一张卡片的数据（to_dict 的内容 + 源文本、在父卡片中的下标）"""
+    state = card.to_dict()
+    state.update(card_content(card))
+    state['index'] = parent_ref(card)[1]
+    return state
+
+
+class UndoCommand:
+    """历史记录条目（子类实现 undo / redo）"""
+
+    def __init__(self, action=""):
+        self.action = action
+        self.timestamp = datetime.now().strftime("%H:%M:%S")
+        self.started = self.updated = time.monotonic()  # 操作开始 / 最后一次合并的时间
+        self.size = 0  # 估算的内存占用（由 UndoManager 记录时计算）
+
+    def undo(self, scene):
+        raise NotImplementedError
+
+    def redo(self, scene):
+        raise NotImplementedError
+
+    def estimate_size(self):
+        """估算命令占用的字节数（按序列化后的长度，命令中都是普通 Python 数据）"""
+        return len(pickle.dumps(self.__dict__, pickle.HIGHEST_PROTOCOL))
+
+    def merge(self, other):
+        """把紧接着的同类命令合并进来，不能合并时返回 False"""
+        return False
+
+
+class CardDelta(UndoCommand):
+    """
+    一次操作的变化量
+    Attributes:
+        added: 操作中添加的卡片（操作后的 card_state 列表）
+        removed: 操作中删除的卡片（删除时的 card_state 列表）
+        moves: {card_id: ((原 x, 原 y), (新 x, 新 y))}
+        edits: {card_id: (原内容, 新内容)}
+        reparents: {card_id: ((原父卡片id, 原下标), (新父卡片id, 新下标))}
+    """
+
+    def __init__(self, action, added=(), removed=(), moves=None, edits=None, reparents=None):
+        super().__init__(action)
+        self.added = list(added)
+        self.removed = list(removed)
+        self.moves = moves or {}
+        self.edits = edits or {}
+        self.reparents = reparents or {}
+
+    def is_empty(self):
+        return not (self.added or self.removed or self.moves or self.edits or self.reparents)
+
+    def coalesce_key(self):
+        """同类操作的标识：名称相同、只有移动 / 编辑 / 修改父子关系且涉及的卡片相同（有增删时不合并）"""
+        if self.added or self.removed:
+            return None
+        return self.action, frozenset(self.moves), frozenset(self.edits), frozenset(self.reparents)
+
+    def merge(self, other):
+        """
+        合并紧接着的同类操作（连续拖动同一批卡片、反复编辑同一张卡片）：
+        保留本命令的原始值，取 other 的新值；合并后回到原值的记录被丢弃
+        """
+        key = self.coalesce_key()
+        if not isinstance(other, CardDelta) or key is None or key != other.coalesce_key():
+            return False
+        for changes, newer in ((self.moves, other.moves), (self.edits, other.edits),
+                               (self.reparents, other.reparents)):
+            for card_id, (_, new) in newer.items():
+                old = changes[card_id][0]
+                if old == new:
+                    del changes[card_id]
+                else:
+                    changes[card_id] = (old, new)
+        self.updated = other.updated
+        return True
+
+    def undo(self, scene):
+        # 按删除顺序的逆序恢复：每张卡片记录的是删除它那一刻的下标
+        restore_cards(scene, list(reversed(self.removed)), in_removal_order=True)
+        for card_id, (old, _) in reversed(list(self.reparents.items())):
+            link_card(scene, scene.cards.get(card_id), *old)
+        for card_id, (old, _) in self.edits.items():
+            apply_content(scene.cards.get(card_id), old)
+        for card_id, (old, _) in self.moves.items():
+            move_card(scene.cards.get(card_id), old)
+        for state in reversed(self.added):
+            detach_card(scene, scene.cards.get(state['id']))
+
+    def redo(self, scene):
+        restore_cards(scene, self.added)
+        for card_id, (_, new) in self.reparents.items():
+            link_card(scene, scene.cards.get(card_id), *new)
+        for card_id, (_, new) in self.edits.items():
+            apply_content(scene.cards.get(card_id), new)
+        for card_id, (_, new) in self.moves.items():
+            move_card(scene.cards.get(card_id), new)
+        for state in self.removed:
+            detach_card(scene, scene.cards.get(state['id']))
+
+
+class SnapshotCommand(UndoCommand):
+    """
+    完整快照（布局等直接修改大量卡片、没有经过事务记录的操作）
+    before 为操作前全部卡片的 snapshot_state，after 在操作结束时（最迟在下一次记录 / 撤销 / 重做前）补上
+    恢复时由 apply_snapshot 按 card_id 与当前场景比较，只修改有差异的卡片
+    """
+
+    def __init__(self, action, before):
+        super().__init__(action)
+        self.before = before
+        self.after = None
+
+    def undo(self, scene):
+        scene._restore_state(self.before)
+
+    def redo(self, scene):
+        if self.after is not None:
+            scene._restore_state(self.after)
+
+
+class DeltaRecorder:
+    """一次操作（事务）期间被修改卡片的原始值，每张卡片只记录第一次修改前的值"""
+
+    def __init__(self, action=None):
+        self.action = action
+        self.started = time.monotonic()
+        self.covered_by_snapshot = False  # 修改已包含在完整快照中（只等待事件结束，不生成命令）
+        self.added = {}  # card_id -> 卡片（提交时取操作后的状态）
+        self.removed = {}  # card_id -> 删除时的 card_state
+        self.moves = {}  # card_id -> 原位置
+        self.edits = {}  # card_id -> 原内容
+        self.reparents = {}  # card_id -> 原 (父卡片id, 下标)
+
+    def record_move(self, card, x, y):
+        if card.card_id not in self.added:
+            self.moves.setdefault(card.card_id, (x, y))
+
+    def record_edit(self, card):
+        if card.card_id not in self.added:
+            self.edits.setdefault(card.card_id, card_content(card))
+
+    def record_reparent(self, card):
+        if card.card_id not in self.added:
+            self.reparents.setdefault(card.card_id, parent_ref(card))
+
+    def record_add(self, card):
+        self.added[card.card_id] = card
+
+    def record_remove(self, card):
+        # 同一次操作中添加又删除的卡片不留下记录
+        if self.added.pop(card.card_id, None) is None:
+            self.removed.setdefault(card.card_id, card_state(card))
+
+    def build(self, scene):
+        """与卡片当前值比较，生成 CardDelta（没有实际变化的记录被丢弃）"""
+        moves, edits, reparents = {}, {}, {}
+        for card_id, old in self.moves.items():
+            new = self._current(scene, card_id, lambda card: (card.pos().x(), card.pos().y()),
+                                lambda state: (state['x'], state['y']))
+            if new is not None and new != old:
+                moves[card_id] = (old, new)
+        for card_id, old in self.edits.items():
+            new = self._current(scene, card_id, card_content,
+                                lambda state: {key: state[key] for key in CONTENT_FIELDS})
+            if new is not None and new != old:
+                edits[card_id] = (old, new)
+        for card_id, old in self.reparents.items():
+            new = self._current(scene, card_id, parent_ref,
+                                lambda state: (state['parent_id'], state['index']))
+            if new is not None and new != old:
+                reparents[card_id] = (old, new)
+        added = [card_state(card) for card in self.added.values() if card in scene.cards]
+        delta = CardDelta(self.action or self._default_action(added, moves, edits, reparents),
+                          added, self.removed.values(), moves, edits, reparents)
+        delta.started = self.started
+        return delta
+
+    def _current(self, scene, card_id, from_card, from_state):
+        """卡片的当前值（已在本次操作中删除的卡片取删除时的值）"""
+        if card_id in self.removed:
+            return from_state(self.removed[card_id])
+        card = scene.cards.get(card_id)
+        return from_card(card) if card is not None else None
+
+    def _default_action(self, added, moves, edits, reparents):
+        """没有指定名称的操作按变化内容命名"""
+        if added:
+            return "添加卡片"
+        if self.removed:
+            return "删除卡片"
+        if reparents:
+            return "修改父子关系"
+        if edits:
+            return "编辑卡片"
+        return "移动卡片"
+
+
+# ========== 应用变化量（由命令在场景的撤销 / 重做中调用，期间不记录） ==========
+
+def move_card(card, pos):
+    if card is not None:
+        card.setPos(pos[0], pos[1])
+
+
+def apply_content(card, content):
+    """恢复卡片内容并刷新显示"""
+    if card is None:
+        return
+    for key, attr in CONTENT_FIELDS.items():
+        if key in content:
+            setattr(card, attr, content[key])
+    card.refresh_text(notify=False)
+
+
+def link_card(scene, card, parent_id, index=-1):
+    """
+    把卡片挂到 parent_id 下的第 index 个位置（不触发自动布局，位置由命令中的移动记录恢复）
+    parent_id 为 None 或父卡片不存在时成为根卡片
+    """
+    if card is None:
+        return
+    parent = scene.cards.get(parent_id) if parent_id is not None else None
+    old_parent = card.parent_card
+    if old_parent is not None and card in old_parent.child_cards:
+        old_parent.child_cards.remove(card)
+    card.parent_card = parent
+    if parent is not None:
+        if index < 0 or index > len(parent.child_cards):
+            index = len(parent.child_cards)
+        parent.child_cards.insert(index, card)
+        card.level = parent.level + 1
+    else:
+        card.level = 0
+    card._update_children_levels()
+    scene.mark_connection_topology_dirty()
+
+
+def restore_cards(scene, states, in_removal_order=False):
+    """
+    按 card_state 重新创建卡片，再一次性恢复父子关系
+    Args:
+        in_removal_order: states 是逐张删除时记录的状态、已按删除顺序的逆序排列
+            （每张卡片的下标是删除它那一刻的下标，依次插回即还原删除前的顺序）；
+            为 False 时 states 是同一时刻的状态（添加的卡片），按下标从小到大插入
+    """
+    if not states:
+        return
+    from .card import KnowledgeCard
+
+    created = []
+    for state in states:
+        card = KnowledgeCard(state['id'], state['title'], state['question'], state['answer'],
+                             state['x'], state['y'])
+        for key in ('source_text', 'source_text_start', 'source_text_end'):
+            if key in state:
+                setattr(card, CONTENT_FIELDS[key], state[key])
+        scene.add_card(card)
+        created.append((state, card))
+
+    # 先按下标挂到父卡片下（顺序与删除前 / 添加后一致）
+    if not in_removal_order:
+        created.sort(key=lambda item: item[0].get('index', -1))
+    for state, card in created:
+        link_card(scene, card, state.get('parent_id'), state.get('index', -1))
+    # 删除时仍留在场景中的子卡片重新挂回
+    for state, card in created:
+        for index, child_id in enumerate(state.get('child_ids', ())):
+            child = scene.cards.get(child_id)
+            if child is not None and child.parent_card is not card and \
+                    (child.parent_card is None or child.parent_card not in scene.cards):
+                link_card(scene, child, card.card_id, index)
+
+
+def detach_card(scene, card):
+    """从父卡片和场景中移除卡片"""
+    if card is None:
+        return
+    scene.remove_card(card)
+
+
+def apply_snapshot(scene, cards_data):
+    """
+    把场景恢复到完整快照：按 card_id 与当前卡片比较，只处理差异
+    - 快照中没有的卡片删除，场景中没有的卡片创建
+    - 内容和位置只在不同时修改（未改变的卡片不重绘，选中状态保留）
+    - 父子关系按快照一次性重建：只重写子卡片列表有变化的父卡片，最后统一更新层级
+    Returns:
+        实际改变的卡片数
+    """
+    target = {state['id']: state for state in cards_data}
+    changed = set()
+
+    # 删除多余的卡片（先删除，父卡片的子卡片列表中不再残留）
+    for card in [card for card in scene.cards if card.card_id not in target]:
+        detach_card(scene, card)
+        changed.add(card.card_id)
+
+    # 创建缺少的卡片（父子关系在下面统一恢复）
+    missing = [state for card_id, state in target.items() if scene.cards.get(card_id) is None]
+    if missing:
+        from .card import KnowledgeCard
+        for state in missing:
+            card = KnowledgeCard(state['id'], state['title'], state['question'], state['answer'],
+                                 state['x'], state['y'])
+            card.parent_card = None
+            scene.add_card(card)
+            changed.add(card.card_id)
+
+    # 内容和位置：只修改不同的字段
+    moves = []
+    for card_id, state in target.items():
+        card = scene.cards.get(card_id)
+        content = {key: state[key] for key in CONTENT_FIELDS if key in state}
+        if any(getattr(card, CONTENT_FIELDS[key], None) != value for key, value in content.items()):
+            apply_content(card, content)
+            changed.add(card_id)
+        if card.pos().x() != state['x'] or card.pos().y() != state['y']:
+            moves.append((card, (state['x'], state['y'])))
+            changed.add(card_id)
+    bounds = getattr(scene, 'scene_bounds', None)
+    if moves and bounds is not None:
+        with bounds.bulk_moves(len(moves)):
+            for card, pos in moves:
+                move_card(card, pos)
+    else:
+        for card, pos in moves:
+            move_card(card, pos)
+
+    # 父子关系：按快照重建每个父卡片的子卡片列表（快照中的下标排序，缺少下标时按快照顺序）
+    children = {}
+    for order, state in enumerate(cards_data):
+        parent_id = state.get('parent_id')
+        if parent_id is not None and parent_id in target:
+            children.setdefault(parent_id, []).append((state.get('index', -1), order, state['id']))
+    rewired = False
+    for card in scene.cards:
+        wanted = [scene.cards.get(card_id) for _, _, card_id in sorted(children.get(card.card_id, ()))]
+        if card.child_cards != wanted:
+            card.child_cards = wanted
+            rewired = True
+    for card in scene.cards:
+        parent_id = target[card.card_id].get('parent_id')
+        parent = scene.cards.get(parent_id) if parent_id is not None else None
+        if card.parent_card is not parent:
+            card.parent_card = parent
+            changed.add(card.card_id)
+            rewired = True
+    if rewired:
+        for card in scene.cards:
+            if card.parent_card is None:
+                card.level = 0
+                card._update_children_levels()
+        scene.mark_connection_topology_dirty()
+    return len(changed)
@@ -0,0 +1,82 @@
+"""
+撤销日志 - 超出内存上限的旧历史记录压缩后写入磁盘临时文件，撤销到它们时再读回
+日志文件只追加；丢弃的条目较多时重写文件，历史记录中不再有日志条目时截断为空
+（临时文件在关闭或程序退出时自动删除）
+"""
+
+import pickle
+import tempfile
+import zlib
+
+JOURNAL_COMPRESS_LEVEL = 6
+
+
+class JournalEntry:
+    """
+    已写入日志的历史记录（占位：只保留名称和在日志文件中的位置）
+    撤销到这一条时由 UndoManager 从日志读回原来的命令
+    """
+
+    def __init__(self, action, timestamp, offset, length, size):
+        self.action = action
+        self.timestamp = timestamp
+        self.offset = offset
+        self.length = length  # 压缩后的字节数
+        self.size = size  # 在内存中时的估算字节数
+
+
+class UndoJournal:
+    """一个 UndoManager 的磁盘日志（第一次写入时才创建临时文件）"""
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._file = None
+        self._end = 0
+
+    def write(self, command, size):
+        """压缩写入一条命令，返回 JournalEntry"""
+        data = zlib.compress(pickle.dumps(command, pickle.HIGHEST_PROTOCOL), JOURNAL_COMPRESS_LEVEL)
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix="ai_reader_undo_", dir=self.directory)
+        self._file.seek(self._end)
+        self._file.write(data)
+        entry = JournalEntry(command.action, command.timestamp, self._end, len(data), size)
+        self._end += len(data)
+        return entry
+
+    def read(self, entry):
+        """读回 JournalEntry 对应的命令"""
+        self._file.seek(entry.offset)
+        return pickle.loads(zlib.decompress(self._file.read(entry.length)))
+
+    def bytes_on_disk(self):
+        return self._end
+
+    def compact(self, entries):
+        """只保留 entries（仍在历史记录中的条目）重写日志文件，并更新它们的位置"""
+        if self._file is None:
+            return
+        blocks = []
+        for entry in entries:
+            self._file.seek(entry.offset)
+            blocks.append(self._file.read(entry.length))
+        self._file.seek(0)
+        self._file.truncate()
+        self._end = 0
+        for entry, data in zip(entries, blocks):
+            self._file.write(data)
+            entry.offset = self._end
+            self._end += len(data)
+
+    def clear(self):
+        """丢弃全部条目（文件保留，截断为空）"""
+        if self._file is not None:
+            self._file.seek(0)
+            self._file.truncate()
+        self._end = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._end = 0
@@ -1,82 +1,188 @@
 """撤销/重做管理器"""
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from .undo_commands import UndoCommand, SnapshotCommand
+from .undo_journal import UndoJournal, JournalEntry
+
+HISTORY_MEMORY_BYTES = 16 * 1024 * 1024  # 内存中历史记录的估算上限
+JOURNAL_MAX_BYTES = 256 * 1024 * 1024  # 磁盘日志（压缩后）的上限，超过时才真正丢弃最旧的记录
+COALESCE_WINDOW = 1.5  # 秒：上一次操作结束后这段时间内开始的同类操作合并为一条
+COMPACT_MIN_BYTES = 4 * 1024 * 1024  # 日志文件超过此大小且一半以上已无用时重写
 
 
 class UndoManager:
-    """撤销/重做管理器"""
-    
-    def __init__(self, max_history=50):
-        self.undo_stack: List[Dict[str, Any]] = []
-        self.redo_stack: List[Dict[str, Any]] = []
-        self.max_history = max_history
-        self.is_undoing = False
-    
+    """
+    撤销/重做管理器
+    历史记录是命令（UndoCommand）：普通操作由场景记录为只含变化量的 CardDelta（push），
+    布局等没有经过事务记录的操作仍可保存完整快照（save_state，保存操作前的状态）
+
+    历史记录按估算的字节数限制（不再按条数）：超出 max_bytes 时最旧的命令压缩写入磁盘日志，
+    撤销栈中只留 JournalEntry 占位，撤销到它时再读回；连续的同类操作（拖动、反复编辑）合并为一条
+    """
+
+    def __init__(self, max_bytes=HISTORY_MEMORY_BYTES, journal_dir=None, max_journal_bytes=JOURNAL_MAX_BYTES):
+        self.undo_stack: List[Any] = []  # UndoCommand，最旧的若干条可能是 JournalEntry
+        self.redo_stack: List[UndoCommand] = []
+        self.max_bytes = max_bytes
+        self.max_journal_bytes = max_journal_bytes
+        self.coalesce_window = COALESCE_WINDOW
+        self.journal = UndoJournal(journal_dir)
+        self.is_undoing = False  # 正在执行撤销/重做（期间的修改不记录）
+        self.capture_state = None  # 返回当前全部卡片数据的回调（补全快照的操作后状态）
+        self._pending_snapshot = None  # 还没有操作后状态的快照
+        self._last_pushed = None  # 最近记录的命令（之后没有撤销/重做时可以合并）
+        self._journaled = 0  # 撤销栈底部 JournalEntry 的数量
+        self.merged_count = 0
+        self.journaled_count = 0
+        self.dropped_count = 0
+
+    def push(self, command: UndoCommand):
+        """记录一次操作（与上一条同类操作时间相近时合并）"""
+        if self.is_undoing:
+            return
+        self.finish_snapshot()
+        if self._merge(command):
+            return
+        self._append(command)
+        self._last_pushed = command
+
+    def _merge(self, command):
+        last = self._last_pushed
+        if last is None or not self.undo_stack or self.undo_stack[-1] is not last:
+            return False
+        if command.started - last.updated > self.coalesce_window or not last.merge(command):
+            return False
+        self.merged_count += 1
+        if last.is_empty():
+            # 合并后回到了原状态（例如拖出去又拖回来）
+            self.undo_stack.pop()
+            self._last_pushed = None
+        else:
+            last.size = last.estimate_size()
+            self._enforce_limit()
+        return True
+
     def save_state(self, cards_data: List[Dict[str, Any]], action_name: str = ""):
-        """保存状态到撤销栈"""
+        """
+        保存操作前的完整状态（快照）
+        操作后的状态在下一次记录、撤销或重做时通过 capture_state 取得
+        """
         if self.is_undoing:
             return
-        
-        # 保存当前状态
-        state = {
-            'action': action_name,
-            'cards': [card.copy() for card in cards_data],
-            'timestamp': self._get_timestamp()
-        }
-        
-        self.undo_stack.append(state)
-        
-        # 限制历史记录数量
-        if len(self.undo_stack) > self.max_history:
-            self.undo_stack.pop(0)
-        
+        self.finish_snapshot()
+        command = SnapshotCommand(action_name, [card.copy() for card in cards_data])
+        self._append(command)
+        self._pending_snapshot = command
+        self._last_pushed = None
+
+    def _append(self, command):
+        command.size = command.estimate_size()
+        self.undo_stack.append(command)
+
         # 执行新操作时清空重做栈
         self.redo_stack.clear()
-    
-    def undo(self) -> List[Dict[str, Any]]:
-        """撤销操作"""
+        self._enforce_limit()
+
+    def _enforce_limit(self):
+        """内存中的历史超过上限时，把最旧的命令写入磁盘日志（最新一条始终留在内存中）"""
+        memory = self.memory_bytes()
+        index = self._journaled
+        while memory > self.max_bytes and index < len(self.undo_stack) - 1:
+            command = self.undo_stack[index]
+            if command is self._pending_snapshot:
+                break
+            self.undo_stack[index] = self.journal.write(command, command.size)
+            memory -= command.size
+            self._journaled += 1
+            self.journaled_count += 1
+            index += 1
+
+        # 日志也超过上限时才丢弃最旧的记录
+        journal_bytes = self.journal_bytes()
+        while journal_bytes > self.max_journal_bytes and self._journaled > 0:
+            journal_bytes -= self.undo_stack.pop(0).length
+            self._journaled -= 1
+            self.dropped_count += 1
+        file_bytes = self.journal.bytes_on_disk()
+        if file_bytes > COMPACT_MIN_BYTES and file_bytes > 2 * journal_bytes:
+            self.journal.compact(self.undo_stack[:self._journaled])
+
+    def finish_snapshot(self):
+        """补全最近一次快照的操作后状态（快照对应的操作结束时由场景调用）"""
+        command = self._pending_snapshot
+        self._pending_snapshot = None
+        if command is not None and self.capture_state is not None:
+            command.after = self.capture_state()
+            command.size = command.estimate_size()
+            self._enforce_limit()
+
+    def undo(self) -> Optional[UndoCommand]:
+        """取出要撤销的命令（由场景执行 command.undo）"""
+        self.finish_snapshot()
         if not self.undo_stack:
             return None
-        
-        # 保存当前状态到重做栈
-        current_state = self.undo_stack.pop()
-        self.redo_stack.append(current_state)
-        
-        # 获取上一个状态
-        if self.undo_stack:
-            previous_state = self.undo_stack[-1]
-            self.is_undoing = True
-            return previous_state['cards'].copy()
-        else:
-            # 如果没有更多历史，返回空列表
-            self.is_undoing = True
-            return []
-    
-    def redo(self) -> List[Dict[str, Any]]:
-        """重做操作"""
+        command = self.undo_stack.pop()
+        if isinstance(command, JournalEntry):
+            command = self._load(command)
+        self.redo_stack.append(command)
+        self._last_pushed = None
+        return command
+
+    def _load(self, entry):
+        """从磁盘日志读回命令（日志中不再有历史记录时清空日志文件）"""
+        command = self.journal.read(entry)
+        self._journaled -= 1
+        if self._journaled == 0:
+            self.journal.clear()
+        return command
+
+    def redo(self) -> Optional[UndoCommand]:
+        """取出要重做的命令（由场景执行 command.redo）"""
+        self.finish_snapshot()
         if not self.redo_stack:
             return None
-        
-        # 从重做栈恢复状态
-        state = self.redo_stack.pop()
-        self.undo_stack.append(state)
-        self.is_undoing = True
-        return state['cards'].copy()
-    
+        command = self.redo_stack.pop()
+        self.undo_stack.append(command)
+        self._last_pushed = None
+        return command
+
     def can_undo(self) -> bool:
         """检查是否可以撤销"""
-        return len(self.undo_stack) > 1  # 至少需要2个状态才能撤销
-    
+        return len(self.undo_stack) > 0
+
     def can_redo(self) -> bool:
         """检查是否可以重做"""
         return len(self.redo_stack) > 0
-    
+
+    def memory_bytes(self) -> int:
+        """内存中历史记录（撤销栈和重做栈）的估算字节数"""
+        return sum(command.size for command in self.undo_stack[self._journaled:]) + \
+            sum(command.size for command in self.redo_stack)
+
+    def journal_bytes(self) -> int:
+        """磁盘日志中仍在历史记录里的条目的字节数（压缩后）"""
+        return sum(entry.length for entry in self.undo_stack[:self._journaled])
+
+    def get_stats(self) -> Dict[str, int]:
+        """历史记录的内存 / 磁盘占用统计"""
+        return {
+            'undo_count': len(self.undo_stack),
+            'redo_count': len(self.redo_stack),
+            'memory_bytes': self.memory_bytes(),
+            'max_bytes': self.max_bytes,
+            'journal_entries': self._journaled,
+            'journal_bytes': self.journal_bytes(),
+            'journal_file_bytes': self.journal.bytes_on_disk(),
+            'merged_count': self.merged_count,
+            'journaled_count': self.journaled_count,
+            'dropped_count': self.dropped_count,
+        }
+
     def clear(self):
         """清空历史记录"""
         self.undo_stack.clear()
         self.redo_stack.clear()
-    
-    def _get_timestamp(self) -> str:
-        """获取时间戳"""
-        from datetime import datetime
-        return datetime.now().strftime("%H:%M:%S")
-
+        self.journal.clear()
+        self._pending_snapshot = None
+        self._last_pushed = None
+        self._journaled = 0
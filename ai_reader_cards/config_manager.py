@@ -65,6 +65,10 @@ class ConfigManager:
             },
             "connection": {
                 "default": DEFAULT_CONNECTION_STYLE
+            },
+            "rendering": {
+                "device_coordinate_cache": False,
+                "no_index_bulk_moves": True
             }
         }
         
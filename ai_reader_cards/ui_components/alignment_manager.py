@@ -2,6 +2,8 @@
 
 from PyQt6.QtCore import QObject
 
+from ai_reader_cards.card.mindmap import scene_batch_update
+
 
 class AlignmentManager(QObject):
     """管理卡片对齐功能"""
@@ -14,22 +16,24 @@ class AlignmentManager(QObject):
         if len(cards) < 2:
             return False, "请选择至少两张卡片进行对齐"
 
-        if align_type == "left":
-            self._align_left(cards)
-        elif align_type == "right":
-            self._align_right(cards)
-        elif align_type == "top":
-            self._align_top(cards)
-        elif align_type == "bottom":
-            self._align_bottom(cards)
-        elif align_type == "center_h":
-            self._align_center_horizontal(cards)
-        elif align_type == "center_v":
-            self._align_center_vertical(cards)
-        elif align_type == "distribute_h":
-            self._distribute_horizontal(cards)
-        elif align_type == "distribute_v":
-            self._distribute_vertical(cards)
+        # 批量移动：自动连接检测和重绘在对齐完成后统一执行一次
+        with scene_batch_update(cards):
+            if align_type == "left":
+                self._align_left(cards)
+            elif align_type == "right":
+                self._align_right(cards)
+            elif align_type == "top":
+                self._align_top(cards)
+            elif align_type == "bottom":
+                self._align_bottom(cards)
+            elif align_type == "center_h":
+                self._align_center_horizontal(cards)
+            elif align_type == "center_v":
+                self._align_center_vertical(cards)
+            elif align_type == "distribute_h":
+                self._distribute_horizontal(cards)
+            elif align_type == "distribute_v":
+                self._distribute_vertical(cards)
 
         align_names = {
             "left": "左对齐", "right": "右对齐", "top": "顶对齐",
@@ -56,9 +60,10 @@ class AlignmentManager(QObject):
         start_x = root_card.scenePos().x()
         start_y = root_card.scenePos().y() + y_spacing
 
-        for i, card in enumerate(cards):
-            if card != root_card:
-                card.setPos(start_x + i * x_spacing, start_y)
+        with scene_batch_update(cards):
+            for i, card in enumerate(cards):
+                if card != root_card:
+                    card.setPos(start_x + i * x_spacing, start_y)
 
         return True, "已按层次结构排列卡片"
 
@@ -60,7 +60,7 @@ class MainToolbar(QToolBar):
         # 布局选择
         self.addWidget(QLabel("布局:"))
         self.layout_combo = QComboBox()
-        self.layout_combo.addItems(["mind_map", "logical", "timeline", "fishbone", "auto_arrange"])
+        self.layout_combo.addItems(["mind_map", "logical", "timeline", "fishbone", "auto_arrange", "network"])
         self.layout_combo.currentTextChanged.connect(self.layout_changed.emit)
         self.addWidget(self.layout_combo)
         
@@ -184,6 +184,10 @@ class MenuBar(QMenuBar):
         self.layout_auto_arrange_action = QAction("自动排列", self)
         self.layout_auto_arrange_action.triggered.connect(lambda: self.layout_requested.emit("auto_arrange"))
         layout_menu.addAction(self.layout_auto_arrange_action)
+        
+        self.layout_network_action = QAction("网络布局（关联线）", self)
+        self.layout_network_action.triggered.connect(lambda: self.layout_requested.emit("network"))
+        layout_menu.addAction(self.layout_network_action)
 
         view_menu.addSeparator()
 
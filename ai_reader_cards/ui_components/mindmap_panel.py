@@ -181,10 +181,11 @@ class MindMapPanel(QWidget):
         if self.drawing_btn:
             self.drawing_btn.setChecked(enabled)
     
-    def apply_layout(self, layout_name):
-        """应用布局算法"""
-        from ai_reader_cards.card import LayoutEngine, TreeNode
-        
+    def apply_layout(self, layout_name, on_applied=None, on_failed=None):
+        """
+        应用布局算法：由场景在工作线程中计算（与拖动、插入卡片后的子树布局使用同一个布局引擎），
+        树没有改变时直接使用缓存的结果；结果应用后调用 on_applied，计算失败时调用 on_failed(异常)
+        """
         cards = self.get_all_cards()
         if not cards:
             return
@@ -197,61 +198,5 @@ class MindMapPanel(QWidget):
         else:
             root_card = root_cards[0]
         
-        # 将卡片结构转换为树结构
-        def card_to_tree(card, visited=None):
-            if visited is None:
-                visited = set()
-            if card in visited:
-                return None
-            visited.add(card)
-            
-            tree_node = TreeNode(card.title_text, card.pos().x(), card.pos().y())
-            tree_node.card_ref = card  # 保存卡片引用
-            
-            # 处理子卡片
-            if hasattr(card, 'child_cards') and card.child_cards:
-                for child_card in card.child_cards:
-                    child_tree = card_to_tree(child_card, visited)
-                    if child_tree:
-                        tree_node.add_child(child_tree)
-            
-            return tree_node
-        
-        root_tree = card_to_tree(root_card)
-        if not root_tree:
-            return
-        
-        # 应用布局算法
-        engine = LayoutEngine
-        layout_func = getattr(engine, layout_name, None)
-        if layout_func:
-            layout_func(root_tree)
-            
-            # 如果支持防重叠，应用防重叠算法
-            try:
-                from ai_reader_cards.card import EnhancedLayoutEngine
-                if layout_name == "mind_map":
-                    EnhancedLayoutEngine.mind_map_with_overlap_prevention(root_tree)
-                elif layout_name == "logical":
-                    EnhancedLayoutEngine.logical_with_overlap_prevention(root_tree)
-            except ImportError:
-                pass  # 如果增强布局不可用，使用基本布局
-            
-            # 将布局结果应用回卡片
-            def apply_tree_to_cards(tree_node):
-                if hasattr(tree_node, 'card_ref'):
-                    card = tree_node.card_ref
-                    card.setPos(tree_node.x, tree_node.y)
-                    # 更新卡片的层级信息
-                    if hasattr(card, 'level'):
-                        card.level = tree_node.level
-                for child in tree_node.children:
-                    apply_tree_to_cards(child)
-            
-            apply_tree_to_cards(root_tree)
-            
-            # 保存状态用于撤销
-            if hasattr(self.mindmap_scene, '_save_state_for_undo'):
-                self.mindmap_scene._save_state_for_undo(f"应用布局: {layout_name}")
-            
-            self.update_scene()
\ No newline at end of file
+        self.mindmap_scene.set_layout_type(layout_name)
+        self.mindmap_scene.apply_layout_async(root_card, on_applied, on_failed)
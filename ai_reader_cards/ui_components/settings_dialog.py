@@ -202,7 +202,7 @@ class SettingsDialog(QDialog):
         
         # 布局设置
         self.default_layout_combo = QComboBox()
-        self.default_layout_combo.addItems(["mind_map", "logical", "timeline", "fishbone", "auto_arrange"])
+        self.default_layout_combo.addItems(["mind_map", "logical", "timeline", "fishbone", "auto_arrange", "network"])
         layout.addRow("默认布局:", self.default_layout_combo)
         
         # 连线样式
@@ -210,6 +210,12 @@ class SettingsDialog(QDialog):
         self.default_connection_combo.addItems(["fixed", "bezier", "smart", "gradient"])
         layout.addRow("默认连线样式:", self.default_connection_combo)
         
+        # 绘制设置
+        self.device_cache_checkbox = QCheckBox("卡片使用设备坐标缓存（平移更快，缩放时重新渲染、占用更多显存）")
+        layout.addRow("绘制:", self.device_cache_checkbox)
+        self.bulk_no_index_checkbox = QCheckBox("批量移动卡片时暂停场景索引（大导图布局更快）")
+        layout.addRow("", self.bulk_no_index_checkbox)
+        
         return widget
     
     def on_proxy_enabled_changed(self, enabled):
@@ -300,6 +306,8 @@ class SettingsDialog(QDialog):
         
         self.default_layout_combo.setCurrentText(self.config.get("layout.default", "mind_map"))
         self.default_connection_combo.setCurrentText(self.config.get("connection.default", "fixed"))
+        self.device_cache_checkbox.setChecked(self.config.get("rendering.device_coordinate_cache", False))
+        self.bulk_no_index_checkbox.setChecked(self.config.get("rendering.no_index_bulk_moves", True))
         
         # 更新UI状态
         self.on_proxy_enabled_changed(use_proxy)
@@ -348,6 +356,8 @@ class SettingsDialog(QDialog):
         self.config.set("translation.default_target_language", lang_code)
         self.config.set("layout.default", self.default_layout_combo.currentText())
         self.config.set("connection.default", self.default_connection_combo.currentText())
+        self.config.set("rendering.device_coordinate_cache", self.device_cache_checkbox.isChecked())
+        self.config.set("rendering.no_index_bulk_moves", self.bulk_no_index_checkbox.isChecked())
         
         # 保存到文件
         self.config.save_config()
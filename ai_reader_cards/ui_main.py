@@ -47,6 +47,7 @@ class MainWindow(QMainWindow):
         self.init_ui()
         self.connect_signals()
         self.setup_shortcuts()
+        self._apply_render_settings()
 
     def init_ui(self):
         """初始化用户界面"""
@@ -689,9 +690,19 @@ class MainWindow(QMainWindow):
         dialog.settings_saved.connect(self._on_settings_saved)
         dialog.exec()
     
+    def _apply_render_settings(self):
+        """应用绘制设置（卡片的设备坐标缓存、批量移动时暂停场景索引）"""
+        from ai_reader_cards.config_manager import get_config_manager
+        from ai_reader_cards.card.chrome_cache import set_device_coordinate_cache
+        config = get_config_manager()
+        scene = self.mindmap_panel.mindmap_scene
+        set_device_coordinate_cache(config.get("rendering.device_coordinate_cache", False), scene.cards)
+        scene.scene_bounds.no_index_for_bulk_moves = config.get("rendering.no_index_bulk_moves", True)
+
     def _on_settings_saved(self):
         """设置保存后的回调"""
         self.update_status("设置已保存，部分设置需要重启应用生效")
+        self._apply_render_settings()
         # 重新初始化AI生成器以应用新配置
         try:
             from ai_reader_cards.ai_api import AICardGenerator
@@ -911,17 +922,15 @@ class MainWindow(QMainWindow):
     def _apply_layout(self):
         """应用布局算法（从工具栏）"""
         layout_name = self.main_toolbar.layout_combo.currentText() if self.main_toolbar else "mind_map"
-        self.mindmap_panel.apply_layout(layout_name)
-        # 更新连线系统的布局类型
-        self.mindmap_panel.mindmap_scene.set_layout_type(layout_name)
-        self.update_status(f"已应用布局: {layout_name}")
+        self._apply_layout_from_menu(layout_name)
     
     def _apply_layout_from_menu(self, layout_name):
-        """从菜单应用布局算法"""
-        self.mindmap_panel.apply_layout(layout_name)
-        # 更新连线系统的布局类型
-        self.mindmap_panel.mindmap_scene.set_layout_type(layout_name)
-        self.update_status(f"已应用布局: {layout_name}")
+        """从菜单应用布局算法（场景在后台线程计算，同时更新连线系统的布局类型）"""
+        self.update_status(f"正在计算布局: {layout_name}")
+        self.mindmap_panel.apply_layout(
+            layout_name,
+            lambda: self.update_status(f"已应用布局: {layout_name}"),
+            lambda e: self.update_status(f"布局失败: {layout_name}: {e}"))
     
     def _change_connection_style(self, style):
         """切换连线样式"""
@@ -1038,4 +1047,5 @@ $$\frac{\partial^2 u}{\partial x^2} + \frac{\partial^2 u}{\partial y^2} = 0$$
                 return
 
         self.controller.cleanup()
+        self.mindmap_panel.mindmap_scene.layout_service.shutdown()
         event.accept()
@@ -74,6 +74,7 @@ class MadMapBasedMainWindow(QMainWindow):
         self.init_ui()
         self.connect_signals()
         self.setup_shortcuts()
+        self._apply_render_settings()
     
     def init_ui(self):
         """初始化用户界面"""
@@ -248,9 +249,10 @@ class MadMapBasedMainWindow(QMainWindow):
         self.update_status(f"连线样式已切换: {style}")
     
     def apply_layout(self):
-        """应用布局算法"""
-        self.scene.apply_layout()
-        self.update_status("布局已应用")
+        """应用布局算法（在后台线程计算，结果应用后更新状态栏）"""
+        self.update_status("正在计算布局...")
+        self.scene.apply_layout_async(lambda: self.update_status("布局已应用"),
+                                      lambda e: self.update_status(f"布局失败: {e}"))
     
     def on_generate_card_requested(self, text_content):
         """处理生成卡片请求"""
@@ -357,6 +359,8 @@ class MadMapBasedMainWindow(QMainWindow):
                     data = json.load(f)
                 self.root_node = CardTreeNode.from_dict(data)
                 self.calculate_levels(self.root_node)
+                # 很大的大纲只展开前几层，其余分支折叠（展开时才创建图形项）
+                self.scene.collapse_to_fit(self.root_node, self.scene.MAX_VISIBLE_ON_LOAD)
                 self.refresh_scene()
                 self.scene.apply_layout()
                 self.update_status(f"已加载: {path}")
@@ -372,16 +376,11 @@ class MadMapBasedMainWindow(QMainWindow):
     def refresh_scene(self):
         """刷新场景"""
         self.scene.clear()
-        self.scene.visual_nodes.clear()
-        
-        def add_visual(node):
-            vn = CardVisualNode(node)
-            self.scene.add_visual_node(vn)
-            for c in node.children:
-                add_visual(c)
+        self.scene.clear_visual_nodes()
         
+        # 只为未折叠的节点创建图形项
         if self.root_node:
-            add_visual(self.root_node)
+            self.scene.materialize_tree(self.root_node)
             self.scene.update()
     
     def clear_canvas(self, confirm=True):
@@ -393,7 +392,7 @@ class MadMapBasedMainWindow(QMainWindow):
         
         self.root_node = None
         self.scene.clear()
-        self.scene.visual_nodes.clear()
+        self.scene.clear_visual_nodes()
         self.scene.copied_nodes.clear()
         self.update_status("画布已清空")
     
@@ -570,16 +569,19 @@ class MadMapBasedMainWindow(QMainWindow):
     def _zoom_in(self):
         """放大视图"""
         self.view.scale(1.2, 1.2)
+        self.scene.set_view_scale(self.view.transform().m11())
         self.update_status("视图已放大")
     
     def _zoom_out(self):
         """缩小视图"""
         self.view.scale(0.8, 0.8)
+        self.scene.set_view_scale(self.view.transform().m11())
         self.update_status("视图已缩小")
     
     def _zoom_reset(self):
         """重置缩放"""
         self.view.resetTransform()
+        self.scene.set_view_scale(self.view.transform().m11())
         self.update_status("视图缩放已重置")
     
     def _toggle_toolbar(self, toolbar_id, visible):
@@ -609,9 +611,19 @@ class MadMapBasedMainWindow(QMainWindow):
         dialog.settings_saved.connect(self._on_settings_saved)
         dialog.exec()
     
+    def _apply_render_settings(self):
+        """应用绘制设置（节点的设备坐标缓存、批量移动时暂停场景索引）"""
+        from ai_reader_cards.config_manager import get_config_manager
+        from ai_reader_cards.card.chrome_cache import set_device_coordinate_cache
+        config = get_config_manager()
+        set_device_coordinate_cache(config.get("rendering.device_coordinate_cache", False),
+                                    self.scene.visual_nodes)
+        self.scene.scene_bounds.no_index_for_bulk_moves = config.get("rendering.no_index_bulk_moves", True)
+
     def _on_settings_saved(self):
         """设置保存后的回调"""
         self.update_status("设置已保存，部分设置需要重启应用生效")
+        self._apply_render_settings()
         # 重新初始化AI生成器以应用新配置
         try:
             model = self.main_toolbar.get_selected_model() if self.main_toolbar else "gpt-3.5-turbo"
@@ -669,7 +681,7 @@ class MadMapBasedMainWindow(QMainWindow):
         
         if results:
             # 聚焦到第一个结果
-            first_vn = next((vn for vn in self.scene.visual_nodes if vn.tree_node == results[0]), None)
+            first_vn = self.scene.find_node_by_tree_node(results[0])
             if first_vn:
                 self.view.centerOn(first_vn)
             
@@ -837,7 +849,7 @@ class MadMapBasedMainWindow(QMainWindow):
                 vn.setSelected(vn.tree_node in matched_nodes)
             
             if matched_nodes:
-                first_vn = next((vn for vn in self.scene.visual_nodes if vn.tree_node == matched_nodes[0]), None)
+                first_vn = self.scene.find_node_by_tree_node(matched_nodes[0])
                 if first_vn:
                     self.view.centerOn(first_vn)
                 self.update_status(f"找到 {len(matched_nodes)} 个匹配 '{keyword}' 的结果")
@@ -946,6 +958,11 @@ $$H=\\varepsilon_{0,\\mathbf{k}}+t_{x,\\mathbf{k}}\\tau_{x}+t_{z,\\mathbf{k}}\\t
         # 将键盘事件传递给场景
         self.scene.keyPressEvent(event)
 
+    def closeEvent(self, event):
+        """窗口关闭事件：关闭后台布局的工作线程"""
+        self.scene.layout_service.shutdown()
+        super().closeEvent(event)
+
 
 def main():
     """主函数"""
@@ -0,0 +1,33 @@
+"""CardRegistry 的列表式接口"""
+
+import pytest
+
+from ai_reader_cards.card.card_registry import CardRegistry
+
+
+class Card:
+    def __init__(self, card_id):
+        self.card_id = card_id
+
+
+def test_remove_while_iterating():
+    cards = [Card(f"c{i}") for i in range(5)]
+    registry = CardRegistry(cards)
+
+    for card in registry:
+        registry.remove(card)
+
+    assert len(registry) == 0
+
+
+def test_indexing_and_lookup():
+    cards = [Card(f"c{i}") for i in range(5)]
+    registry = CardRegistry(cards)
+
+    assert registry[0] is cards[0]
+    assert registry[-1] is cards[-1]
+    assert registry[2] is cards[2]
+    assert registry[1:3] == cards[1:3]
+    assert registry.get("c3") is cards[3]
+    with pytest.raises(IndexError):
+        registry[5]
@@ -0,0 +1,127 @@
+"""力导向布局（force_directed_layout）和网络布局（CardLayoutEngine.network）"""
+
+import numpy as np
+
+from ai_reader_cards.card.force_layout import force_directed_layout
+from ai_reader_cards.card.madmap_based_layout import CardLayoutEngine
+from ai_reader_cards.card.tree_models import TreeNode
+
+SIZE = (200, 100)
+
+
+def chains(count=10):
+    """两条互不相连的链：0..count-1 和 count..2*count-1，初始位置随机"""
+    rng = np.random.default_rng(1)
+    n = 2 * count
+    x = rng.uniform(0, 2000, n)
+    y = rng.uniform(0, 2000, n)
+    edges = [(i, i + 1) for i in range(count - 1)] + [(i, i + 1) for i in range(count, n - 1)]
+    return x, y, np.full(n, SIZE[0], dtype=float), np.full(n, SIZE[1], dtype=float), edges
+
+
+def distance(x, y, i, j):
+    return float(np.hypot(x[i] - x[j], y[i] - y[j]))
+
+
+def build_tree(count=20, branching=3):
+    """count 个节点的树，初始位置随机（热启动）"""
+    rng = np.random.default_rng(2)
+    nodes = []
+    for i in range(count):
+        node = TreeNode(f"n{i}", *rng.uniform(0, 2000, 2).tolist())
+        if i:
+            nodes[(i - 1) // branching].add_child(node)
+        nodes.append(node)
+    return nodes
+
+
+def network(nodes, **kwargs):
+    CardLayoutEngine.network(nodes[0], sizes={node: SIZE for node in nodes}, time_budget=None, **kwargs)
+    return [(node.x, node.y) for node in nodes]
+
+
+# ========== force_directed_layout ==========
+
+def test_pinned_nodes_stay_put():
+    x, y, width, height, edges = chains()
+    pinned = (0, 5, 13)
+    new_x, new_y, _ = force_directed_layout(x, y, width, height, edges, pinned=pinned)
+
+    for i in pinned:
+        assert (new_x[i], new_y[i]) == (x[i], y[i])
+    assert not np.allclose(new_x, x)
+
+
+def test_same_seed_is_deterministic():
+    x, y, width, height, edges = chains()
+    first = force_directed_layout(x, y, width, height, edges, seed=7)
+    second = force_directed_layout(x, y, width, height, edges, seed=7)
+
+    assert np.array_equal(first[0], second[0]) and np.array_equal(first[1], second[1])
+    assert first[2] == second[2]
+
+
+def test_extra_edge_pulls_nodes_together():
+    x, y, width, height, edges = chains()
+    a, b = 9, 19  # 两条链的末端
+    plain_x, plain_y, _ = force_directed_layout(x, y, width, height, edges)
+    linked_x, linked_y, _ = force_directed_layout(x, y, width, height, edges + [(a, b)])
+
+    assert distance(linked_x, linked_y, a, b) < distance(plain_x, plain_y, a, b) / 2
+
+
+def test_coincident_nodes_are_separated():
+    n = 6
+    zeros = np.zeros(n)
+    x, y, _ = force_directed_layout(zeros, zeros, np.full(n, 200.0), np.full(n, 100.0),
+                                    [(0, i) for i in range(1, n)], pinned=(0,))
+
+    points = {(round(px), round(py)) for px, py in zip(x, y)}
+    assert len(points) == n
+
+
+# ========== CardLayoutEngine.network ==========
+
+def test_network_keeps_root_in_place():
+    nodes = build_tree()
+    root = (nodes[0].x, nodes[0].y)
+    before = [(node.x, node.y) for node in nodes]
+
+    after = network(nodes)
+
+    assert after[0] == root
+    assert after != before
+
+
+def test_network_is_deterministic():
+    assert network(build_tree()) == network(build_tree())
+
+
+def test_network_honors_associative_links():
+    a, b = 19, 10  # 不同分支中的两个叶子节点
+    plain = build_tree()
+    network(plain)
+
+    linked = build_tree()
+    network(linked, links=[(linked[a].id, linked[b].id)])
+
+    from_targets = build_tree()
+    from_targets[a].associative_line_targets = [from_targets[b].id]
+    network(from_targets)
+
+    def gap(nodes):
+        return float(np.hypot(nodes[a].x - nodes[b].x, nodes[a].y - nodes[b].y))
+
+    assert gap(linked) < gap(plain)
+    assert gap(from_targets) == gap(linked)
+
+
+def test_network_cold_start_from_coincident_nodes():
+    nodes = build_tree()
+    for node in nodes:
+        node.x = node.y = 0.0
+
+    after = network(nodes)
+
+    assert after[0] == (0.0, 0.0)
+    assert len({(round(x), round(y)) for x, y in after}) == len(nodes)
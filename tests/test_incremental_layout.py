@@ -0,0 +1,153 @@
+"""增量布局：插入 / 删除子节点后只重新布局父节点的子树，结果与整体布局一致"""
+
+import numpy as np
+import pytest
+from PyQt6.QtCore import QPointF, QRectF, pyqtSignal
+from PyQt6.QtWidgets import QGraphicsObject
+
+from ai_reader_cards.card import madmap_based_nodes, madmap_based_scene
+from ai_reader_cards.card.madmap_based_layout import CardLayoutEngine
+from ai_reader_cards.card.madmap_based_models import CardTreeNode
+
+
+def random_tree(seed, count=300):
+    """count 个节点的随机树和随机节点大小（同一 seed 得到相同的树）"""
+    rng = np.random.default_rng(seed)
+    nodes = [CardTreeNode("n0")]
+    for i in range(1, count):
+        node = CardTreeNode(f"n{i}")
+        nodes[int(rng.integers(0, i))].add_child(node)
+        nodes.append(node)
+    sizes = {node: (float(rng.integers(80, 320)), float(rng.integers(40, 160))) for node in nodes}
+    return nodes, sizes, rng
+
+
+def coordinates(nodes):
+    return [(node.x, node.y) for node in nodes]
+
+
+@pytest.mark.parametrize("layout_name", CardLayoutEngine.INCREMENTAL_LAYOUTS)
+@pytest.mark.parametrize("seed", range(5))
+def test_insert_then_relayout_subtree_matches_full_layout(layout_name, seed):
+    layout = getattr(CardLayoutEngine, layout_name)
+    nodes, sizes, rng = random_tree(seed)
+    layout(nodes[0], sizes=sizes)
+
+    for _ in range(10):
+        parent = nodes[int(rng.integers(0, len(nodes)))]
+        node = CardTreeNode("new")
+        parent.add_child(node)
+        nodes.append(node)
+        sizes[node] = (float(rng.integers(80, 320)), float(rng.integers(40, 160)))
+        layout(nodes[0], sizes=sizes, start=parent)
+
+    incremental = coordinates(nodes)
+    layout(nodes[0], sizes=sizes)
+    assert incremental == coordinates(nodes)
+
+
+@pytest.mark.parametrize("layout_name", CardLayoutEngine.INCREMENTAL_LAYOUTS)
+def test_delete_then_relayout_subtree_matches_full_layout(layout_name):
+    layout = getattr(CardLayoutEngine, layout_name)
+    nodes, sizes, rng = random_tree(7)
+    layout(nodes[0], sizes=sizes)
+
+    for _ in range(10):
+        node = nodes[int(rng.integers(1, len(nodes)))]
+        parent = node.parent
+        parent.remove_child(node)
+        removed = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            removed.append(current)
+            stack.extend(current.children)
+        nodes = [n for n in nodes if n not in removed]
+        layout(nodes[0], sizes=sizes, start=parent)
+
+    incremental = coordinates(nodes)
+    layout(nodes[0], sizes=sizes)
+    assert incremental == coordinates(nodes)
+
+
+# ========== 场景：AI 连续生成的卡片 ==========
+
+class FakeVisualNode(QGraphicsObject):
+    """CardVisualNode 的替身（只提供场景和布局用到的接口，大小随标题长度变化）"""
+
+    jump_to_source_requested = pyqtSignal(object)
+    jump_to_note_requested = pyqtSignal(object)
+    WIDTH, HEIGHT = 200, 100
+
+    def __init__(self, tree_node):
+        super().__init__()
+        self.tree_node = tree_node
+        self.setPos(tree_node.x, tree_node.y)
+
+    def get_actual_size(self):
+        return 150 + 10 * len(self.tree_node.title), 80 + 5 * (len(self.tree_node.title) % 4)
+
+    def boundingRect(self):
+        return QRectF(0, 0, *self.get_actual_size())
+
+    def paint(self, *args):
+        pass
+
+    def set_detail_level(self, level):
+        pass
+
+    def center_pos(self):
+        width, height = self.get_actual_size()
+        return self.pos() + QPointF(width / 2, height / 2)
+
+
+@pytest.fixture
+def scene(app, monkeypatch):
+    monkeypatch.setattr(madmap_based_scene, "CardVisualNode", FakeVisualNode)
+    monkeypatch.setattr(madmap_based_nodes, "CardVisualNode", FakeVisualNode)
+    return madmap_based_scene.CardMindMapScene()
+
+
+def node_positions(scene):
+    return {vn.tree_node.id: (vn.pos().x(), vn.pos().y()) for vn in scene.visual_nodes}
+
+
+@pytest.mark.parametrize("layout_name", CardLayoutEngine.INCREMENTAL_LAYOUTS)
+def test_streamed_ai_cards_match_full_layout(scene, layout_name):
+    scene.set_layout_type(layout_name)
+    for i in range(30):
+        scene.add_card_from_ai("卡片" * (i % 5 + 1), "q", "a")
+        if i % 7 == 0:
+            scene.flush_pending_relayout()
+    # 再给部分子节点添加子节点
+    for vn in list(scene.visual_nodes[1:10]):
+        child = CardTreeNode("子节点")
+        vn.tree_node.add_child(child)
+        scene.add_visual_node(FakeVisualNode(child))
+        scene.schedule_relayout(vn.tree_node)
+    scene.flush_pending_relayout()
+    incremental = node_positions(scene)
+
+    scene.apply_layout()
+    assert node_positions(scene) == incremental
+
+
+def test_relayout_moves_only_changed_nodes(scene, monkeypatch):
+    scene.set_layout_type("logical")
+    for _ in range(20):
+        scene.add_card_from_ai("卡片", "q", "a")
+    scene.flush_pending_relayout()
+    last = scene.visual_nodes[-1].tree_node
+
+    child = CardTreeNode("新的子节点")
+    last.add_child(child)
+    scene.add_visual_node(FakeVisualNode(child))
+
+    moved = []
+    set_pos = FakeVisualNode.setPos
+    monkeypatch.setattr(FakeVisualNode, "setPos",
+                        lambda self, *args: (moved.append(self.tree_node), set_pos(self, *args)))
+    scene.relayout_subtree(last)
+
+    # 逻辑布局中新节点放在父节点右侧，其它节点都不需要移动
+    assert moved == [child]
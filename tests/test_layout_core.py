@@ -0,0 +1,221 @@
+"""
+NumPy 布局核心：LayoutEngine / CardLayoutEngine 的结果与原来的递归实现完全一致
+（下面的 old_* 是改写为 layout_core 之前的递归实现，作为对照）
+"""
+
+import numpy as np
+import pytest
+
+from ai_reader_cards.card.layout_engine import LayoutEngine
+from ai_reader_cards.card.madmap_based_layout import CardLayoutEngine
+from ai_reader_cards.card.madmap_based_models import CardTreeNode
+
+
+# ========== 原来的递归实现：LayoutEngine（节点视为点） ==========
+
+def old_point_mind_map(root, h_spacing=250, v_spacing=150):
+    def layout(node, depth=0, y_offset=0, direction=1):
+        node.x = depth * h_spacing * direction
+        node.y = y_offset
+        if node.children:
+            child_y = y_offset - v_spacing * (len(node.children) - 1) / 2
+            for c in node.children:
+                layout(c, depth + 1, child_y, direction)
+                child_y += v_spacing
+
+    root.x = 0
+    root.y = 0
+    for side, direction in ((0, -1), (1, 1)):
+        group = [c for i, c in enumerate(root.children) if i % 2 == side]
+        child_y = -v_spacing * (len(group) - 1) / 2
+        for c in group:
+            layout(c, 1, child_y, direction)
+            child_y += v_spacing
+
+
+def old_point_logical(root, h_spacing=250, v_spacing=180):
+    def layout(node, depth=0, x_offset=0):
+        node.x = x_offset
+        node.y = depth * v_spacing
+        if node.children:
+            child_x = x_offset - h_spacing * (len(node.children) - 1) / 2
+            for c in node.children:
+                layout(c, depth + 1, child_x)
+                child_x += h_spacing
+
+    root.x = 0
+    root.y = 0
+    layout(root)
+
+
+def old_point_timeline(root, h_spacing=200):
+    def layout(node, x_offset=0, y_offset=0):
+        node.x = x_offset
+        node.y = y_offset
+        child_x = x_offset + h_spacing
+        for i, c in enumerate(node.children):
+            layout(c, child_x, y_offset + (i - len(node.children) // 2) * 100)
+            child_x += h_spacing
+
+    layout(root)
+
+
+def old_point_fishbone(root, h_spacing=200, v_spacing=100):
+    def layout(node, depth=0, y_offset=0, direction=1):
+        node.x = depth * h_spacing * direction
+        node.y = y_offset
+        for i, c in enumerate(node.children):
+            layout(c, depth + 1, y_offset + (i - len(node.children) // 2) * v_spacing, direction)
+
+    for i, c in enumerate(root.children):
+        layout(c, 1, 0, -1 if i % 2 == 0 else 1)
+
+
+# ========== 原来的递归实现：CardLayoutEngine（动态节点大小） ==========
+
+def old_card_mind_map(root, sizes, h_spacing=200, v_spacing=100):
+    def place_children(node, depth, y_offset):
+        if node.children:
+            total = sum(sizes[c][1] for c in node.children) + v_spacing * (len(node.children) - 1)
+            child_y = y_offset - total / 2 + sizes[node.children[0]][1] / 2
+            for c in node.children:
+                layout(c, depth + 1, child_y)
+                child_y += sizes[c][1] + v_spacing
+
+    def layout(node, depth, y_offset):
+        node.x = depth * h_spacing
+        node.y = y_offset
+        place_children(node, depth, y_offset)
+
+    root.x = 0
+    root.y = 0
+    place_children(root, 0, 0)
+
+
+def old_card_logical(root, sizes, h_spacing=200, v_spacing=120):
+    def layout(node, parent_x=None, parent_y=None, parent_w=None):
+        if parent_x is None:
+            node.x = 0
+            node.y = 0
+        else:
+            node.x = parent_x + parent_w + h_spacing
+            node.y = parent_y
+        if node.children:
+            first_w, first_h = sizes[node.children[0]]
+            layout(node.children[0], node.x, node.y, first_w)
+            current_y = node.y + first_h + v_spacing
+            for child in node.children[1:]:
+                child_w, child_h = sizes[child]
+                layout(child, node.x, current_y, child_w)
+                current_y += child_h + v_spacing
+
+    layout(root)
+
+
+def old_card_timeline(root, sizes, h_spacing=200):
+    def layout(node, x_offset=0, y_offset=0):
+        node.x = x_offset
+        node.y = y_offset
+        child_x = x_offset + sizes[node][0] + h_spacing
+        for i, c in enumerate(node.children):
+            layout(c, child_x, y_offset + (i - len(node.children) // 2) * max(100, sizes[c][1] + 20))
+            child_x += sizes[c][0] + h_spacing
+
+    layout(root)
+
+
+def old_card_fishbone(root, sizes, h_spacing=200, v_spacing=100):
+    def layout(node, depth=0, y_offset=0, direction=1):
+        node.x = depth * h_spacing * direction
+        node.y = y_offset
+        for i, c in enumerate(node.children):
+            spacing = max(v_spacing, sizes[c][1] + 20)
+            layout(c, depth + 1, y_offset + (i - len(node.children) // 2) * spacing, direction)
+
+    for i, c in enumerate(root.children):
+        layout(c, 1, 0, -1 if i % 2 == 0 else 1)
+
+
+# ========== 对照 ==========
+
+def random_tree(seed, count=400, root_pos=(0.0, 0.0)):
+    """随机树（同一 seed 得到相同的树）和随机节点大小"""
+    rng = np.random.default_rng(seed)
+    nodes = [CardTreeNode("n0", x=root_pos[0], y=root_pos[1])]
+    for i in range(1, count):
+        node = CardTreeNode(f"n{i}")
+        # 偏向最近的节点，得到较深的树
+        nodes[int(rng.integers(max(0, i - 20), i))].add_child(node)
+        nodes.append(node)
+    sizes = {node: (float(rng.integers(80, 320)), float(rng.integers(40, 160))) for node in nodes}
+    return nodes, sizes
+
+
+def coordinates(nodes):
+    return [(node.x, node.y) for node in nodes]
+
+
+POINT_LAYOUTS = [
+    (LayoutEngine.mind_map, old_point_mind_map),
+    (LayoutEngine.logical, old_point_logical),
+    (LayoutEngine.timeline, old_point_timeline),
+    (LayoutEngine.fishbone, old_point_fishbone),
+]
+
+CARD_LAYOUTS = [
+    (CardLayoutEngine.mind_map, old_card_mind_map),
+    (CardLayoutEngine.logical, old_card_logical),
+    (CardLayoutEngine.timeline, old_card_timeline),
+    (CardLayoutEngine.fishbone, old_card_fishbone),
+]
+
+
+@pytest.mark.parametrize("new, old", POINT_LAYOUTS, ids=lambda f: f.__name__)
+@pytest.mark.parametrize("seed", range(5))
+def test_point_layouts_match_recursive_implementation(new, old, seed):
+    expected, _ = random_tree(seed)
+    old(expected[0])
+    nodes, _ = random_tree(seed)
+    new(nodes[0])
+
+    assert coordinates(nodes) == coordinates(expected)
+
+
+@pytest.mark.parametrize("new, old", CARD_LAYOUTS, ids=lambda f: f.__name__)
+@pytest.mark.parametrize("seed", range(5))
+def test_card_layouts_match_recursive_implementation(new, old, seed):
+    expected, expected_sizes = random_tree(seed)
+    old(expected[0], expected_sizes)
+    nodes, sizes = random_tree(seed)
+    new(nodes[0], sizes=sizes)
+
+    assert coordinates(nodes) == coordinates(expected)
+
+
+def test_fishbone_keeps_root_position():
+    """鱼骨图不移动根节点（子节点坐标与根节点位置无关）"""
+    expected, _ = random_tree(0, root_pos=(500.0, 300.0))
+    old_point_fishbone(expected[0])
+    nodes, sizes = random_tree(0, root_pos=(500.0, 300.0))
+    LayoutEngine.fishbone(nodes[0])
+    assert coordinates(nodes) == coordinates(expected)
+
+    old_card_fishbone(expected[0], {a: sizes[b] for a, b in zip(expected, nodes)})
+    CardLayoutEngine.fishbone(nodes[0], sizes=sizes)
+    assert coordinates(nodes) == coordinates(expected)
+    assert (nodes[0].x, nodes[0].y) == (500.0, 300.0)
+
+
+def test_deep_tree_needs_no_recursion():
+    """深度远超递归上限的链也能布局"""
+    nodes = [CardTreeNode("n0")]
+    for i in range(1, 5000):
+        node = CardTreeNode(f"n{i}")
+        nodes[-1].add_child(node)
+        nodes.append(node)
+    sizes = {node: (200.0, 100.0) for node in nodes}
+
+    CardLayoutEngine.logical(nodes[0], sizes=sizes)
+
+    assert nodes[-1].x == 4999 * 400.0
+    assert nodes[-1].y == 0.0
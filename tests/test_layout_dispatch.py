@@ -0,0 +1,81 @@
+"""布局类型分派：布局引擎没有的布局（网络、自动排列）不能退化成思维导图布局"""
+
+import time
+
+import pytest
+from PyQt6.QtWidgets import QApplication
+
+from ai_reader_cards.card.card import KnowledgeCard
+from ai_reader_cards.card.mindmap import MindMapScene
+
+
+def build_tree(scene, count=30, branching=3):
+    cards = []
+    for i in range(count):
+        card = KnowledgeCard(f"c{i}", f"卡片{i}", "q", "a", (i % 6) * 300, (i // 6) * 200)
+        scene.add_card(card)
+        if i:
+            parent = cards[(i - 1) // branching]
+            card.parent_card = parent
+            parent.child_cards.append(card)
+            card.level = parent.level + 1
+        cards.append(card)
+    return cards
+
+
+def positions(scene):
+    return {card.card_id: (round(card.pos().x(), 3), round(card.pos().y(), 3)) for card in scene.cards}
+
+
+def layout_async(scene, root, layout_type, timeout=10.0):
+    """设置布局类型并等待后台布局应用完成"""
+    done = []
+    scene.set_layout_type(layout_type)
+    scene.apply_layout_async(root, lambda: done.append(True), done.append)
+    deadline = time.monotonic() + timeout
+    while not done and time.monotonic() < deadline:
+        QApplication.processEvents()
+        time.sleep(0.005)
+    assert done == [True]
+    return positions(scene)
+
+
+@pytest.fixture
+def scene(app):
+    scene = MindMapScene()
+    build_tree(scene)
+    return scene
+
+
+@pytest.mark.parametrize("layout_type", ["network", "auto_arrange"])
+def test_async_layout_is_not_mind_map(scene, layout_type):
+    root = scene.cards.get("c0")
+    mind_map = layout_async(scene, root, "mind_map")
+    root_pos = mind_map["c0"]
+
+    result = layout_async(scene, root, layout_type)
+
+    assert result != mind_map
+    assert result["c0"] == root_pos  # 根卡片保持原位置
+
+
+@pytest.mark.parametrize("layout_type", ["network", "auto_arrange"])
+def test_sync_layout_is_not_mind_map(scene, layout_type):
+    root = scene.cards.get("c0")
+    scene.set_layout_type("mind_map")
+    scene._apply_layout_to_subtree(root)
+    mind_map = positions(scene)
+
+    scene.set_layout_type(layout_type)
+    scene._apply_layout_to_subtree(root)
+
+    assert positions(scene) != mind_map
+
+
+def test_supported_types_use_layout_engine(scene):
+    registry = scene.backend_registry
+    if registry.layout_engine is None:
+        pytest.skip("没有可用的布局引擎")
+    assert registry.supports_layout_type("mind_map")
+    assert not registry.supports_layout_type("network")
+    assert not registry.supports_layout_type("auto_arrange")
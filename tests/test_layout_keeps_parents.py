@@ -0,0 +1,61 @@
+"""布局只移动卡片，不应通过自动连接检测改变父子关系"""
+
+import pytest
+
+from ai_reader_cards.card.card import KnowledgeCard
+from ai_reader_cards.card.mindmap import MindMapScene
+
+
+def build_tree(scene, count, branching=3):
+    """count 张卡片的树（卡片 i 的父卡片为 (i - 1) // branching），位置随意摆放"""
+    cards = []
+    for i in range(count):
+        card = KnowledgeCard(f"c{i}", f"卡片{i}", "q", "a", (i % 20) * 40, (i // 20) * 30)
+        scene.add_card(card)
+        if i:
+            parent = cards[(i - 1) // branching]
+            card.parent_card = parent
+            parent.child_cards.append(card)
+            card.level = parent.level + 1
+        cards.append(card)
+    return cards
+
+
+def parent_map(scene):
+    return {card.card_id: card.parent_card.card_id if card.parent_card else None for card in scene.cards}
+
+
+@pytest.mark.parametrize("layout_type", ["mind_map", "logical", "timeline", "fishbone"])
+def test_layout_leaves_parents_unchanged(app, layout_type):
+    scene = MindMapScene()
+    scene.set_layout_type(layout_type)
+    cards = build_tree(scene, 400)
+    before = parent_map(scene)
+
+    scene._apply_layout_to_subtree(cards[0])
+
+    assert parent_map(scene) == before
+
+
+def test_reconnect_changes_only_that_card(app):
+    scene = MindMapScene()
+    cards = build_tree(scene, 120)
+    scene._apply_layout_to_subtree(cards[0])
+    expected = parent_map(scene)
+
+    leaf = cards[-1]
+    leaf.set_parent_card(cards[1])
+    expected[leaf.card_id] = cards[1].card_id
+
+    assert parent_map(scene) == expected
+
+
+def test_apply_layout_positions_leaves_parents_unchanged(app):
+    scene = MindMapScene()
+    cards = build_tree(scene, 200)
+    before = parent_map(scene)
+
+    # 所有卡片叠在一列，正好落在自动连接的检测范围内
+    scene._apply_layout_positions({card.card_id: (0, i * 20) for i, card in enumerate(cards)})
+
+    assert parent_map(scene) == before
@@ -0,0 +1,58 @@
+"""后台布局服务：结果和异常都回到 GUI 线程的回调"""
+
+import time
+
+from ai_reader_cards.card.layout_service import LayoutService, TreeSnapshot
+
+
+def wait_for(app, condition, timeout=5.0):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    return condition()
+
+
+def snapshot():
+    return TreeSnapshot(["root", "child"], [-1, 0], [100, 100], [50, 50], [True, True])
+
+
+def test_result_reaches_on_ready(app):
+    service = LayoutService()
+    results = []
+    service.submit(snapshot(), lambda snap: {"root": (0, 0), "child": (10, 20)},
+                   lambda snap, positions: results.append(positions),
+                   lambda error: results.append(error))
+
+    assert wait_for(app, lambda: results)
+    assert results == [{"root": (0, 0), "child": (10, 20)}]
+    service.shutdown()
+
+
+def test_failure_reaches_on_error(app):
+    def compute(snap):
+        raise ValueError("布局引擎出错")
+
+    service = LayoutService()
+    ready, errors = [], []
+    service.submit(snapshot(), compute, lambda snap, positions: ready.append(positions), errors.append)
+
+    assert wait_for(app, lambda: errors)
+    assert ready == []
+    assert isinstance(errors[0], ValueError)
+    service.shutdown()
+
+
+def test_stale_result_counted_by_service(app):
+    service = LayoutService()
+    calls = []
+
+    def on_ready(snap, positions):
+        calls.append(positions)
+        return False
+
+    service.submit(snapshot(), lambda snap: {}, on_ready)
+
+    assert wait_for(app, lambda: calls)
+    assert service.dropped_count == 1
+    service.shutdown()
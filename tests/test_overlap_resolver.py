@@ -0,0 +1,86 @@
+"""扫描线重叠消除：结果中没有重叠，只向下移动，深层树不递归"""
+
+import numpy as np
+import pytest
+
+from ai_reader_cards.card.layout_engine import LayoutEngine
+from ai_reader_cards.card.overlap_resolver import resolve_overlap_rects, resolve_tree_overlaps
+from ai_reader_cards.card.tree_models import TreeNode
+
+
+def overlapping_pairs(rects, positions, h_gap=0, v_gap=0):
+    """两两比较（加上间距后）仍然重叠的矩形对（没有面积的矩形不与任何矩形重叠）"""
+    x = np.array([p[0] for p in positions])
+    y = np.array([p[1] for p in positions])
+    w = np.array([r[2] for r in rects]) + h_gap
+    h = np.array([r[3] for r in rects]) + v_gap
+    overlap = ((x[:, None] < x[None, :] + w[None, :]) & (x[None, :] < x[:, None] + w[:, None]) &
+               (y[:, None] < y[None, :] + h[None, :]) & (y[None, :] < y[:, None] + h[:, None]))
+    empty = (w <= 0) | (h <= 0)
+    overlap[empty, :] = False
+    overlap[:, empty] = False
+    np.fill_diagonal(overlap, False)
+    return np.argwhere(np.triu(overlap)).tolist()
+
+
+def random_rects(rng, count, spread):
+    """随机大小、密集摆放的矩形（包括完全重合的和没有面积的）"""
+    rects = [(float(rng.integers(0, spread)), float(rng.integers(0, spread)),
+              float(rng.integers(0, 300)), float(rng.integers(0, 150))) for _ in range(count)]
+    rects += [rects[0]] * 5
+    return rects
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("gaps", [(0, 0), (40, 20)])
+def test_random_rects_have_no_overlaps(seed, gaps):
+    rng = np.random.default_rng(seed)
+    rects = random_rects(rng, 400, 1500)
+
+    positions = resolve_overlap_rects(rects, *gaps)
+
+    assert overlapping_pairs(rects, positions, *gaps) == []
+    for (x, y, _, _), (new_x, new_y) in zip(rects, positions):
+        assert new_x == x
+        assert new_y >= y
+
+
+def test_already_separated_rects_do_not_move():
+    rects = [(i * 300.0, j * 200.0, 200.0, 100.0) for i in range(10) for j in range(10)]
+    assert resolve_overlap_rects(rects) == [(x, y) for x, y, _, _ in rects]
+
+
+def test_tree_overlaps_use_node_sizes():
+    rng = np.random.default_rng(0)
+    nodes = [TreeNode(f"n{i}", float(rng.integers(0, 800)), float(rng.integers(0, 800))) for i in range(300)]
+    for i, node in enumerate(nodes[1:], 1):
+        nodes[(i - 1) // 4].add_child(node)
+    sizes = {node: (float(rng.integers(50, 250)), float(rng.integers(30, 120))) for node in nodes}
+
+    resolve_tree_overlaps(nodes[0], sizes.get, 10, 10)
+
+    rects = [(0, 0, *sizes[node]) for node in nodes]
+    assert overlapping_pairs(rects, [(node.x, node.y) for node in nodes], 10, 10) == []
+
+
+def test_auto_arrange_deep_tree():
+    """深度远超递归上限的链也能完成，且节点间距不小于 h_spacing / v_spacing"""
+    nodes = [TreeNode("n0")]
+    for i in range(1, 5000):
+        node = TreeNode(f"n{i}")
+        nodes[-1].add_child(node)
+        nodes.append(node)
+    for node in nodes[:100]:
+        for k in range(3):
+            node.add_child(TreeNode(f"leaf{k}"))
+
+    LayoutEngine.auto_arrange(nodes[0], 200, 120)
+
+    placed = []
+    stack = [nodes[0]]
+    while stack:
+        node = stack.pop()
+        placed.append(node)
+        stack.extend(node.children)
+    rects = [(0, 0, 0, 0)] * len(placed)
+    assert overlapping_pairs(rects, [(node.x, node.y) for node in placed], 200, 120) == []
@@ -0,0 +1,232 @@
+"""撤销 / 重做：变化量命令、快照按差异恢复、合并连续操作、磁盘日志"""
+
+import pytest
+
+from ai_reader_cards.card.card import KnowledgeCard
+from ai_reader_cards.card.mindmap import MindMapScene
+from ai_reader_cards.card.undo_commands import CardDelta, apply_snapshot, link_card
+from ai_reader_cards.card.undo_journal import JournalEntry
+from ai_reader_cards.card.undo_manager import COALESCE_WINDOW, UndoManager
+
+
+def scene_state(scene):
+    """场景中全部卡片的位置、内容和父子关系（子卡片按顺序）"""
+    return sorted(
+        (card.card_id, card.pos().x(), card.pos().y(), card.title_text, card.level,
+         card.parent_card.card_id if card.parent_card else None,
+         tuple(child.card_id for child in card.child_cards))
+        for card in scene.cards)
+
+
+def children(card):
+    return [child.card_id for child in card.child_cards]
+
+
+def link(parent, child):
+    child.parent_card = parent
+    parent.child_cards.append(child)
+    child.level = parent.level + 1
+
+
+@pytest.fixture
+def scene(app):
+    """根卡片 root 下有 c0..c3，c1 下有 c1a、c1b（卡片相距很远，不会自动连接）"""
+    scene = MindMapScene()
+    with scene.undo_transaction("初始化"):
+        root = KnowledgeCard("root", "root", "q", "a", 0, 0)
+        scene.add_card(root)
+        for i in range(4):
+            card = KnowledgeCard(f"c{i}", f"c{i}", "q", "a", 1000 * (i + 1), 0)
+            scene.add_card(card)
+            link(root, card)
+        for name in ("c1a", "c1b"):
+            card = KnowledgeCard(name, name, "q", "a", 0, 1000 * (len(scene.cards)))
+            scene.add_card(card)
+            link(scene.cards.get("c1"), card)
+    scene.undo_manager.clear()
+    return scene
+
+
+def commit(scene):
+    """提交本轮事件中隐式记录的修改"""
+    scene._commit_implicit_transaction()
+
+
+# ========== 变化量命令 ==========
+
+def test_round_trip_through_undo_and_redo(scene):
+    states = [scene_state(scene)]
+
+    with scene.undo_transaction("添加"):
+        scene.add_card(KnowledgeCard("new", "new", "q", "a", 5000, 5000))
+    states.append(scene_state(scene))
+
+    scene.cards.get("c2").setPos(3000, 3000)
+    commit(scene)
+    states.append(scene_state(scene))
+
+    card = scene.cards.get("c3")
+    scene.record_card_edit(card)
+    card.title_text = "已编辑"
+    card.refresh_text(notify=False)
+    commit(scene)
+    states.append(scene_state(scene))
+
+    with scene.undo_transaction("修改父子关系"):
+        scene.record_card_reparent(scene.cards.get("c0"))
+        link_card(scene, scene.cards.get("c0"), "c1", 0)
+    states.append(scene_state(scene))
+
+    with scene.undo_transaction("删除"):
+        scene.remove_card(scene.cards.get("c2"))
+    states.append(scene_state(scene))
+
+    assert all(isinstance(command, CardDelta) for command in scene.undo_manager.undo_stack)
+    for expected in reversed(states[:-1]):
+        scene.undo()
+        assert scene_state(scene) == expected
+    for expected in states[1:]:
+        scene.redo()
+        assert scene_state(scene) == expected
+
+
+def test_undo_multi_sibling_delete_keeps_order(scene):
+    root = scene.cards.get("root")
+    before = scene_state(scene)
+
+    with scene.undo_transaction("删除"):
+        for card_id in ("c0", "c1", "c2"):
+            scene.remove_card(scene.cards.get(card_id))
+    assert children(root) == ["c3"]
+
+    scene.undo()
+    assert children(root) == ["c0", "c1", "c2", "c3"]
+    assert scene_state(scene) == before
+
+    scene.redo()
+    assert children(root) == ["c3"]
+
+
+def test_undo_subtree_delete_keeps_order(scene):
+    before = scene_state(scene)
+
+    with scene.undo_transaction("删除子树"):
+        for card_id in ("c1", "c1a", "c1b"):
+            scene.remove_card(scene.cards.get(card_id))
+
+    scene.undo()
+    assert children(scene.cards.get("root")) == ["c0", "c1", "c2", "c3"]
+    assert children(scene.cards.get("c1")) == ["c1a", "c1b"]
+    assert scene_state(scene) == before
+
+
+def test_undo_clear_canvas_keeps_order(scene):
+    before = scene_state(scene)
+
+    with scene.undo_transaction("清空"):
+        scene.clear_canvas()
+    assert len(scene.cards) == 0
+
+    scene.undo()
+    assert children(scene.cards.get("root")) == ["c0", "c1", "c2", "c3"]
+    assert scene_state(scene) == before
+
+
+# ========== 快照按差异恢复 ==========
+
+def test_apply_snapshot_keeps_untouched_cards_and_selection(scene):
+    snapshot = scene._capture_cards_data()
+    untouched = {card.card_id: card for card in scene.cards}
+    scene.cards.get("c0").setSelected(True)
+    before = scene_state(scene)
+
+    scene.cards.get("c2").setPos(-500, -500)
+    scene.remove_card(scene.cards.get("c3"))
+    scene.add_card(KnowledgeCard("extra", "extra", "q", "a", 7000, 7000))
+    scene.cards.get("c1a").title_text = "改过"
+
+    changed = apply_snapshot(scene, snapshot)
+
+    assert changed == 4
+    assert scene_state(scene) == before
+    assert scene.cards.get("extra") is None
+    for card_id in ("root", "c0", "c1", "c2", "c1a", "c1b"):
+        assert scene.cards.get(card_id) is untouched[card_id]
+    assert scene.cards.get("c0").isSelected()
+
+
+# ========== 合并连续操作 ==========
+
+def test_drag_sequence_coalesces_within_window(scene):
+    card = scene.cards.get("c0")
+    start = (card.pos().x(), card.pos().y())
+
+    for step in range(5):
+        card.setPos(1000 + step * 10, 2000)
+        commit(scene)
+
+    manager = scene.undo_manager
+    assert len(manager.undo_stack) == 1
+    assert manager.get_stats()['merged_count'] == 4
+
+    scene.undo()
+    assert (card.pos().x(), card.pos().y()) == start
+
+
+def test_moves_outside_window_are_separate(scene):
+    card = scene.cards.get("c0")
+    card.setPos(1100, 2000)
+    commit(scene)
+    scene.undo_manager.undo_stack[-1].updated -= COALESCE_WINDOW + 1
+    card.setPos(1200, 2000)
+    commit(scene)
+
+    assert len(scene.undo_manager.undo_stack) == 2
+
+
+def test_edits_of_different_cards_are_separate(scene):
+    for card_id in ("c0", "c1"):
+        card = scene.cards.get(card_id)
+        scene.record_card_edit(card)
+        card.title_text = card_id + "!"
+        commit(scene)
+
+    assert len(scene.undo_manager.undo_stack) == 2
+
+
+# ========== 磁盘日志 ==========
+
+def make_delta(index):
+    return CardDelta("移动卡片", moves={f"c{index}": ((0, 0), (index, index * 2))})
+
+
+def test_old_entries_spill_to_journal_and_read_back(tmp_path):
+    manager = UndoManager(max_bytes=2000, journal_dir=str(tmp_path))
+    manager.coalesce_window = -1  # 不合并
+    commands = [make_delta(i) for i in range(40)]
+    for command in commands:
+        manager.push(command)
+
+    stats = manager.get_stats()
+    assert stats['memory_bytes'] <= 2000
+    assert stats['journal_entries'] > 0
+    assert stats['journal_bytes'] > 0
+    assert isinstance(manager.undo_stack[0], JournalEntry)
+
+    # 撤销全部：日志中的命令读回后内容不变
+    undone = [manager.undo() for _ in commands]
+    assert [command.moves for command in undone] == [command.moves for command in reversed(commands)]
+    assert manager.get_stats()['journal_entries'] == 0
+    assert manager.journal.bytes_on_disk() == 0
+
+
+def test_journal_limit_drops_oldest(tmp_path):
+    manager = UndoManager(max_bytes=500, journal_dir=str(tmp_path), max_journal_bytes=400)
+    manager.coalesce_window = -1
+    for i in range(40):
+        manager.push(make_delta(i))
+
+    stats = manager.get_stats()
+    assert stats['dropped_count'] > 0
+    assert stats['journal_bytes'] <= 400
+    assert stats['undo_count'] == 40 - stats['dropped_count']